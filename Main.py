@@ -1,206 +1,164 @@
 # environment ~/Documents/GitHub/ParallelProcessing/.venv/bin/python
 
-import baselinejson, threadingjson, forkingjson
-from requests_html import HTML, HTMLSession 
-from multiprocessing import Process, Queue
+import redditcore, executors, workerpool, policy, uichannel, timeline
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import time, io, sys
+import time, io, sys, os
 
-from tkinter import *
+# WIKI_BASE_URL points the scraper at a local stand-in instead of Wikipedia
+WIKI_BASE_URL = os.environ.get("WIKI_BASE_URL", "https://en.wikipedia.org")
 
-session = HTMLSession()
+# results from the workers reach the result box through one buffer drained by a periodic callback,
+# which is where they are turned into text
+UPDATE_INTERVAL_MS = 50
+MAX_LINES_PER_UPDATE = 500 # items inserted per callback, so a burst cannot stall the main loop
+MAX_RESULT_LINES = 2000 # older lines are dropped from the result box
+ui_updates = uichannel.UpdateChannel()
+
+# live timeline on the canvas
+TIMELINE_INTERVAL_MS = 200
+PHASE_COLORS = {"wait": "#d9d2d5", "fetch": "#905f71", "parse": "#4d2132", "write": "#709958"}
+timeline_view = {"method": None, "running": False}
 
 #wiki scraper function
-def wiki_scrape_page(title, queue=None):
-    url = f"https://en.wikipedia.org/wiki/Wikipedia:Contents/{title}"
+def wiki_fetch_page(title, session=None):
+    url = f"{WIKI_BASE_URL}/wiki/Wikipedia:Contents/{title}"
+    start = time.perf_counter()
+    response = policy.get("wiki", url, html=True, session=session)
+    fetched = time.perf_counter()
+    timeline.record("fetch", start, fetched)
+    return page_result(title, response, fetched)
+
+async def wiki_fetch_page_async(title):
+    # wiki_fetch_page on the event loop (AsyncIO methods)
+    url = f"{WIKI_BASE_URL}/wiki/Wikipedia:Contents/{title}"
+    start = time.perf_counter()
+    response = await policy.get_async("wiki", url)
+    fetched = time.perf_counter()
+    timeline.record("fetch", start, fetched)
+    return page_result(title, response, fetched)
+
+def page_result(title, response, fetched):
+    # the result tuple of a fetched Contents page
+    threadOverview = response.html.find("h2") #get all the <h2> elements
+    if threadOverview:
+        threadOverview = response.html.find("div.contentsPage__intro p", first = True)
+        result = ("page", title, threadOverview.text if threadOverview else None)
+    else:
+        result = ("empty", title)
+    timeline.record("parse", fetched)
+    return result
+
+def format_page(result):
+    # display lines for one wiki_fetch_page result
+    kind, title = result[0], result[1]
+    if kind == "page":
+        description = f"Description: {result[2]}\n" if result[2] is not None else "No description found.\n"
+        return [f"\nPage title: {title}\n{description}"]
+    if kind == "empty":
+        return [f"\nPage title: {title}\nNo items found on page."]
+    return [f"\nPage title: {title}\nError occurred: {result[2]}"]
+
+# task run inside the persistent worker pool (no GUI access from the workers)
+def wiki_pool_task(title):
     try:
-        response = session.get(url)
-        threadOverview = response.html.find("h2") #get all the <h2> elements
-        if threadOverview:
-            #print(f"\nPage title: {title}")
-            result_text = f"\nPage title: {title}"
-            threadOverview = response.html.find("div.contentsPage__intro p", first = True)
-            if threadOverview: 
-                result_text += f"\nDescription: {threadOverview.text}\n"
-            else:
-                result_text += "\nNo description found.\n"
-        else:
-            result_text = f"\nPage title: {title}\nNo items found on page."
-
-        #queue for forking (if we are not using queue, send the results back to the main process)
-        if queue is not None:
-            queue.put(result_text)
-            
+        return wiki_fetch_page(title, session=workerpool.worker_session())
     except Exception as e:
-        return f"\nPage title: {title}\nError occurred: {e}"
-    
-    # print in result box
-    #print(result_text)
-    root.after(0, lambda:(
-        result_box.insert(END, result_text + "\n"),
-        result_box.see(END)
-    ))
-    
-    return result_text
+        return ("error", title, str(e))
 
-def wiki_baseline_scraper():
-    r = session.get('https://en.wikipedia.org/wiki/Wikipedia:Contents') # response object
-    titles = [t.text for t in r.html.find('h3')[:13]] # get first 13 titles
+# task run in this process (threads or the event loop)
+def wiki_scrape_page(title):
+    try:
+        return wiki_fetch_page(title)
+    except Exception as e:
+        return ("error", title, str(e))
 
-    startTime = time.perf_counter()
-    for title in titles:
-        wiki_scrape_page(title)
-    endTime = time.perf_counter()
-    elapsed = round(endTime - startTime, 3)
-    print(f"\nTotal Baseline Processing Time: {elapsed} seconds")
-    return elapsed
+async def wiki_scrape_page_async(title):
+    try:
+        return await wiki_fetch_page_async(title)
+    except Exception as e:
+        return ("error", title, str(e))
 
-def wiki_multithreading_scraper():
-    r = session.get('https://en.wikipedia.org/wiki/Wikipedia:Contents') # response object
-    titles = [t.text for t in r.html.find('h3')[:13]] # get first 13 titles
-    startTime = time.perf_counter()
-    threads = []
-    for title in titles:
-        t = threading.Thread(target=wiki_scrape_page, args=(title,))
-        t.start()
-        threads.append(t)
+# the coroutine both tasks become on an event loop (AsyncIO, and HybridAsyncIO inside pool workers)
+wiki_scrape_page.aio = wiki_scrape_page_async
+wiki_pool_task.aio = wiki_scrape_page_async
 
-    for index, t in enumerate(threads):
-        t.join()
-        print(f"Thread {index} completed.")
+def wiki_get_titles():
+    r = policy.get("wiki", f'{WIKI_BASE_URL}/wiki/Wikipedia:Contents', html=True) # response object
+    return [t.text for t in r.html.find('h3')[:13]] # get first 13 titles
 
-    endTime = time.perf_counter()
-    elapsed = round(endTime - startTime, 3)
-    print(f"\nTotal MultiThreading Processing Time: {elapsed} seconds")
-    return elapsed
-
-def wiki_forking_scraper():
-    r = session.get('https://en.wikipedia.org/wiki/Wikipedia:Contents') # response object
-    titles = [t.text for t in r.html.find('h3')[:13]] # get first 13 titles
-
-    queue = Queue() #to get the resuls back from the child processes
+# run the wiki scraper with any method registered in executors.EXECUTORS;
+# every page goes to the result box (picked up by pump_results) as soon as it is scraped
+def wiki_scraper(method):
+    titles = wiki_get_titles()
+    task = wiki_scrape_page if executors.shares_memory(method) else wiki_pool_task
 
     startTime = time.perf_counter()
-    processes = []
-    for title in titles:
-        p = Process(target=wiki_scrape_page, args=(title,queue))
-        p.start()
-        processes.append(p)
-
-    for index, p in enumerate(processes):
-        p.join()
-        print(f"Process {index} completed.")
-
+    for _, result in executors.stream(method, task, [(title,) for title in titles]):
+        with timeline.span("write"):
+            ui_updates.put(result)
     endTime = time.perf_counter()
     elapsed = round(endTime - startTime, 3)
 
-    results = []
-    while not queue.empty():
-        results.append(queue.get())
-
-    print(f"\nTotal Forking Processing Time: {elapsed} seconds")
-    return elapsed, results
+    print(f"\nTotal {method} Processing Time: {elapsed} seconds")
+    return elapsed
 
 def run_scraper():
     selected_website = website_opt.get()
-    method = opt.get()
-    clear_canvas
-    if selected_website == "Wikipedia":
-        run__wiki_scraper()
-    else:
-        run_reddit_scraper()
-
-#wiki scraper
-def run__wiki_scraper():
     method = opt.get()
     clear_canvas()
     result_box.delete(1.0, END)  #clear previous results
-    show_diagram(method)
-    if method == "Baseline":
-        threading.Thread(target=run_wiki_baseline_scraper).start()
-    elif method == "MultiThreading":
-        threading.Thread(target=run_wiki_multithreading_scraper).start()
+    ui_updates.clear()
+    ui_updates.format = format_page if selected_website == "Wikipedia" else redditcore.format_record
+    show_timeline(method)
+    if selected_website == "Wikipedia":
+        threading.Thread(target=run_wiki_scraper, args=(method,)).start()
     else:
-        threading.Thread(target=run_wiki_forking_scraper).start() 
-
-
-def run_wiki_baseline_scraper():
-    time.sleep(0.5)
-    elapsed = wiki_baseline_scraper()
-    root.after(0, lambda: (
-        canvas.delete("status_text"), #remove processing text
-        show_result(elapsed)
-    ))
+        threading.Thread(target=run_reddit_scraper, args=(method,)).start()
 
-def run_wiki_multithreading_scraper():
-    time.sleep(0.5)  #simulate delay for UI refresh
-    elapsed = wiki_multithreading_scraper()
-    root.after(0, lambda: (
-        canvas.delete("status_text"), #remove processing text
-        show_result(elapsed)
-    ))
-
-def run_wiki_forking_scraper():
+#wiki scraper
+def run_wiki_scraper(method):
     time.sleep(0.5)  #simulate delay for UI refresh
-    elapsed, results = wiki_forking_scraper()
+    elapsed = wiki_scraper(method)
+    timeline.enable(False)
 
     def update_gui():
-        result_box.delete(1.0, END)
-        for r in results:
-            result_box.insert(END, r +"\n")
-        result_box.see(END)
-        canvas.delete("status_text"), #remove processing text
+        stop_timeline()
+        canvas.delete("status_text") #remove processing text
         show_result(elapsed)
     root.after(0, update_gui)
 
-#reddit scraper
-def run_reddit_scraper():
-    method = opt.get()
-    clear_canvas()
-    result_box.delete(1.0, END)
-    show_diagram(method)
-    if method == "Baseline":
-        threading.Thread(target=run_reddit_baseline_scraper).start()
-    elif method == "MultiThreading":
-        threading.Thread(target = run_reddit_multithreading_scraper).start()
-    else:
-        threading.Thread(target = run_reddit_forking_scraper).start()
+# results object that queues each record for the result box as soon as it arrives, so the
+# first posts are visible while later pages are still loading; the box is all that keeps them
+class LiveResults:
+    def append(self, record):
+        ui_updates.put(record)
 
-def run_reddit_baseline_scraper():
-    time.sleep(0.5)
-    elapsed, results = baselinejson.run_reddit_baseline()
-    root.after(0, lambda: (
-        update_results(results),
-        canvas.delete("status_text"), #remove processing text
-        show_result(elapsed)
-    ))
-
-def run_reddit_multithreading_scraper():
-    time.sleep(0.5)
-    elapsed, results = threadingjson.run_reddit_multithreading(["webscraping"], 13)
-    root.after(0, lambda: (
-        update_results(results),
-        canvas.delete("status_text"), #remove processing text
-        show_result(elapsed)
-    ))
-
-def run_reddit_forking_scraper():
+#reddit scraper
+def run_reddit_scraper(method):
     time.sleep(0.5)
-    elapsed, results = forkingjson.run_reddit_forking(["webscraping"], 13)
+    elapsed, results = redditcore.run_reddit(method, ["webscraping"], 13, results=LiveResults())
+    timeline.enable(False)
     root.after(0, lambda: (
-        update_results(results),
+        stop_timeline(),
         canvas.delete("status_text"), #remove processing text
         show_result(elapsed)
     ))
 
-def update_results(results):
-    result_box.delete(1.0, END)
-    for r in results:
-        result_box.insert(END, r + "\n")
-    result_box.see(END)
+# the only place results are written to the result box: one insert per batch
+def pump_results():
+    lines = ui_updates.drain_lines(MAX_LINES_PER_UPDATE)
+    if lines:
+        result_box.insert(END, "\n".join(lines) + "\n")
+        excess = int(result_box.index("end-1c").split(".")[0]) - MAX_RESULT_LINES
+        if excess > 0:
+            result_box.delete("1.0", f"{excess + 1}.0")
+        result_box.see(END)
+    root.after(UPDATE_INTERVAL_MS, pump_results)
 
 if __name__ == "__main__":
+    # only the GUI needs tkinter (pool workers started by a forkserver import this module too)
+    from tkinter import *
+
 #GUI setup
     root = Tk()
     root.title("Parallel Processing") #window title
@@ -228,7 +186,7 @@ if __name__ == "__main__":
     # notebook.add(reddit_tab, text = "reddit")
 
     #dropdown menu
-    methods = ["Baseline", "MultiThreading", "Forking"] #different scraping methods
+    methods = list(executors.EXECUTORS) #different scraping methods (Baseline, MultiThreading, Forking, AsyncIO, ...)
     opt = StringVar(root)
     opt.set(methods[0]) #default value
 
@@ -255,72 +213,79 @@ if __name__ == "__main__":
     def clear_canvas():
         canvas.delete("all")
 
-    # diagram display for each method
-    def show_diagram(method):
+    # live timeline: one lane per thread/process, a bar per task phase (see timeline.py)
+    TIMELINE_TOP, TIMELINE_BOTTOM, TIMELINE_RIGHT = 50, 230, 585
+
+    def show_timeline(method):
         clear_canvas()
-        if method == "Baseline":
-            canvas.create_text(300, 20, text="baseline diagram", font = ("Arial", 16, "bold"))
-            # canvas.create_text(300, 40, text="baseline def/description....", font=("Arial", 10))
-            
-            # box
-            canvas.create_rectangle(200, 80, 400, 120, fill="#a3989c", outline="#290f19", width=2)
-            canvas.create_text(300, 100, text = "shared memory", font=("Arial", 12, "italic"))
-
-            # single thread
-            points = [300, 130, 290, 140, 310, 150, 290, 160, 300, 170] #curved line
-            canvas.create_line(points, fill = "#572a3b", width=2, smooth=True)
-            canvas.create_text(300, 210, text="Processing...", font=("Arial", 12), tags="status_text") 
-
-            # for i, color in enumerate(["#a9a9a9", "#8b8b8b", "#696969","#484848", "#303030"]):
-            #     x = 50 + i *100
-            #     canvas.create_rectangle(x, 80, x+80, 120, fill=color, outline="")
-            #     canvas.create_text(x+40, 150, text=f"Thread {i+1}", font=("Arial", 10))
-        elif method == "MultiThreading":
-            canvas.create_text(300, 20, text="multi-threading diagram", font = ("Arial", 16, "bold"))
-            # canvas.create_text(300, 40, text="multithreading def/description....", font=("Arial", 10))
-            
-            canvas.create_rectangle(200, 80, 400, 120, fill="#a3989c", outline="#290f19", width=2)
-            canvas.create_text(300, 100, text = "shared memory", font=("Arial", 12, "italic"))
-
-            # multiple threads
-            thread_colors = ["#31121e", "#4d2132", "#623748", "#905f71", "#bf99a8"]
-            x_positions = [240, 270, 300, 330, 360]
-            
-            for i, x in enumerate(x_positions):
-                points = [x, 130, x-10, 140, x+10, 150, x-10, 160, x, 170] #curved line for each thread
-                canvas.create_line(points, fill = thread_colors[i % len(thread_colors)], width = 2, smooth = True)
-            canvas.create_text(300, 210, text="Processing...", font=("Arial", 12), tags="status_text")
-
-            # for i, color in enumerate(["#696969", "#696969", "#696969","#696969", "#696969"]):
-            #     y = 60 + i *25
-            #     canvas.create_rectangle(80, y, 520, y+20, fill=color, outline="")
-            #     canvas.create_text(300, y+10, text=f"Thread {i+1}", font=("Arial", 10))
-        elif method == "Forking":
-            canvas.create_text(300, 20, text="forking diagram", font = ("Arial", 16, "bold"))
-            #canvas.create_text(300, 40, text="forking def/description....", font=("Arial", 10))
-
-            # forking diagram
-            start_x = 115
-            box_width = 100
-            gap = 40
-            process_colors = ["#4d2132", "#623748", "#905f71"]
-
-            for i in range(3):
-                x1 = start_x + i * (box_width + gap)
-                x2 = x1 + box_width
-                y1, y2 = 80, 120
-                canvas.create_rectangle(x1, y1, x2, y2, fill=process_colors[i%len(process_colors)], outline = "#290f19", width=2)
-                canvas.create_text((x1+x2)/2, 100, text = f"memory {i+1}", font=("Arial", 12, "italic"), fill="white")
-
-                # curved lines
-                points = [(x1+x2)/2, 130, (x1+x2)/2 - 10, 140, (x1+x2)/2 +10, 150, (x1+x2)/2 - 10, 160, (x1+x2)/2, 170]
-                canvas.create_line(points, fill="#4d2132", width=2, smooth=True)
-                canvas.create_text((x1+x2)/2, 180, text = f"Process {i+1}", font=("Arial", 12))
-                canvas.create_text(300, 210, text="Processing...", font=("Arial", 12), tags="status_text")
+        timeline.drain() # drop events left over from an earlier run
+        # bars stay on the canvas; each tick draws only the new events. The time axis spans
+        # `span` seconds from `origin` and doubles when it fills up, so the drawn bars are
+        # rescaled (canvas.scale) a few times per run instead of being redrawn every tick.
+        now = time.perf_counter()
+        timeline_view.update(method=method, running=True, origin=now, last=now, span=1.0, lanes={}, pages=0,
+                             left=None, scale=None, lane_h=None)
+        timeline.enable()
+        for i, phase in enumerate(timeline.PHASES):
+            x = 330 + i * 65
+            canvas.create_rectangle(x, 30, x + 10, 40, fill=PHASE_COLORS[phase], outline="")
+            canvas.create_text(x + 14, 35, text=phase, anchor="w", font=("Arial", 9))
+        canvas.create_text(300, 245, text="Processing...", font=("Arial", 12), tags="status_text")
+        draw_timeline()
+
+    def stop_timeline():
+        timeline_view["running"] = False
+        draw_timeline()
+
+    def draw_timeline():
+        view = timeline_view
+        new = timeline.drain()
+        view["pages"] += sum(1 for e in new if e[3] == "task")
+        bars = sorted((e for e in new if e[3] in PHASE_COLORS), key=lambda e: e[4])
+        for e in bars:
+            view["lanes"].setdefault((e[0], e[1]), len(view["lanes"]))
+            view["last"] = max(view["last"], e[5])
+        lanes = view["lanes"]
+        elapsed = max((time.perf_counter() if view["running"] else view["last"]) - view["origin"], 1e-3)
+        if view["running"]:
+            while elapsed > view["span"]:
+                view["span"] *= 2
+        else:
+            view["span"] = elapsed # the finished run fills the axis
+
+        if lanes:
+            top = TIMELINE_TOP
+            lane_h = (TIMELINE_BOTTOM - top) / len(lanes)
+            left = 95 if lane_h >= 10 else 15
+            scale = (TIMELINE_RIGHT - left) / view["span"]
+            if view["scale"] is not None and (scale, lane_h, left) != (view["scale"], view["lane_h"], view["left"]):
+                canvas.scale("bars", view["left"], top, scale / view["scale"], lane_h / view["lane_h"])
+                canvas.move("bars", left - view["left"], 0)
+            view.update(scale=scale, lane_h=lane_h, left=left)
+            for pid, thread, _, phase, start, stop, _ in bars:
+                x1 = left + max(0.0, start - view["origin"]) * scale
+                x2 = max(x1 + 1, left + (stop - view["origin"]) * scale)
+                y = top + lanes[(pid, thread)] * lane_h
+                canvas.create_rectangle(x1, y, x2, y + max(1, lane_h - 1), fill=PHASE_COLORS[phase], outline="", tags="bars")
+            summary = f"{view['method']}: {len(lanes)} lanes, {view['pages']} pages, {view['pages'] / elapsed:.1f} pages/s"
+        else:
+            summary = f"{view['method']}: waiting for workers..."
+
+        # lane labels and the summary are few; they are redrawn every tick
+        canvas.delete("timeline")
+        if lanes and view["lane_h"] >= 10:
+            pids = {pid for pid, _ in lanes}
+            for (pid, thread), row in lanes.items():
+                label = f"{pid} {thread}" if len(pids) > 1 else thread
+                canvas.create_text(view["left"] - 4, TIMELINE_TOP + row * view["lane_h"] + view["lane_h"] / 2, text=label[-14:], anchor="e", font=("Arial", 8), tags="timeline")
+        canvas.create_text(15, 15, text=summary, anchor="w", font=("Arial", 12, "bold"), tags="timeline")
+
+        if view["running"]:
+            root.after(TIMELINE_INTERVAL_MS, draw_timeline)
 
     #display the result
     def show_result(time_value):
-        canvas.create_text(300, 210, text=f"Total Time: {time_value} seconds", font=("Arial", 12), fill="#709958")
+        canvas.create_text(300, 245, text=f"Total Time: {time_value} seconds", font=("Arial", 12), fill="#709958")
 
     # result box
     result_frame = Frame(frame, bg="white", bd=2, relief="sunken")
@@ -343,4 +308,5 @@ if __name__ == "__main__":
     footer.pack(pady=5)
     footerNames.pack(pady=(0,5))
 
+    root.after(UPDATE_INTERVAL_MS, pump_results)
     root.mainloop()
@@ -0,0 +1,74 @@
+#asyncio engine
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import asynchttp
+
+DEFAULT_CONCURRENCY = 100 # max requests in flight on the event loop
+
+def coroutine_function(func):
+    """
+    The version of a task that runs on the event loop: the coroutine function in its `aio`
+    attribute (set next to the task, e.g. fetch_subreddit.aio = fetch_subreddit_async), or
+    None for tasks that only exist as blocking calls.
+    """
+    return getattr(func, "aio", None)
+
+async def gather_limited(func, arg_list, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Run func(*args) for every args tuple in arg_list on the running event loop, with at most
+    `concurrency` calls in flight. Tasks with a coroutine version are awaited on the loop,
+    their requests going through the loop's asynchttp client, so no thread is involved.
+    Blocking tasks without one are handed to a small executor owned by the loop. Results
+    come back in the same order as arg_list.
+    """
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(concurrency)
+    native = coroutine_function(func)
+    workers = 1 if native is not None else max(1, min(concurrency, len(arg_list)))
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asyncio-io") as pool:
+            async def run_one(args):
+                async with limit:
+                    if native is not None:
+                        return await native(*args)
+                    return await loop.run_in_executor(pool, func, *args)
+
+            return await asyncio.gather(*(run_one(args) for args in arg_list))
+    finally:
+        await asynchttp.close_client()
+
+def run_async(func, arg_list, concurrency=DEFAULT_CONCURRENCY):
+    # start a fresh event loop, run every call on it and wait for all of them
+    return asyncio.run(gather_limited(func, list(arg_list), concurrency))
+
+class LoopThread:
+    """
+    An event loop running in a background thread, for callers that are not coroutines
+    themselves (executors' streaming dispatcher). submit() schedules a coroutine on it and
+    returns a concurrent.futures.Future; close() cancels whatever is still running, closes
+    the loop's HTTP client and stops the thread.
+    """
+
+    def __init__(self, name="asyncio-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    async def _shutdown(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asynchttp.close_client()
+
+    def close(self):
+        self.submit(self._shutdown()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
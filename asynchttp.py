@@ -0,0 +1,347 @@
+#asyncio http/1.1 client for the event-loop methods: keep-alive connections, gzip/deflate, chunked bodies
+
+import asyncio
+import json
+import ssl
+import time
+import weakref
+import zlib
+from datetime import timedelta
+from urllib.parse import urljoin, urlsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+import sessions
+import timeline
+
+READ_CHUNK = 64 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+MAX_REDIRECTS = 30 # as requests
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+_clients = weakref.WeakKeyDictionary() # event loop -> its client
+
+def _timeouts(timeout):
+    # requests-style timeout: one number or (connect, read)
+    if isinstance(timeout, tuple):
+        return timeout
+    return timeout, timeout
+
+class _Decoder:
+    # gzip / deflate (zlib-wrapped or raw) / identity, fed chunk by chunk
+    def __init__(self, encoding):
+        encoding = (encoding or "").strip().lower()
+        self._raw_fallback = encoding == "deflate"
+        if encoding == "gzip":
+            self._zlib = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            self._zlib = zlib.decompressobj()
+        else:
+            self._zlib = None
+
+    def feed(self, data):
+        if self._zlib is None:
+            return data
+        try:
+            return self._zlib.decompress(data)
+        except zlib.error:
+            if not self._raw_fallback:
+                raise
+            # some servers send raw deflate without the zlib header
+            self._raw_fallback = False
+            self._zlib = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._zlib.decompress(data)
+
+    def flush(self):
+        return self._zlib.flush() if self._zlib is not None else b""
+
+class Response:
+    """
+    The parts of a requests response the scrapers use. The body has been read unless the
+    request was made with stream=True; then read it with iter_content() or read(), and close()
+    the response when leaving early (the connection is dropped instead of being drained).
+    """
+
+    def __init__(self, client, key, url, status_code, reason, headers, connection, elapsed, keep_alive):
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.elapsed = elapsed
+        self.encoding = None
+        self.wire_bytes = 0 # body bytes read from the socket, before decompression
+        self.history = [] # the redirect responses that led here, oldest first
+        self._content = None
+        self._client = client
+        self._key = key
+        self._connection = connection
+        self._keep_alive = keep_alive
+        self._read_timeout = None
+        self._html = None
+
+    @property
+    def content(self):
+        if self._content is None:
+            raise RuntimeError("the body of a streamed response has not been read")
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    @property
+    def html(self):
+        if self._html is None:
+            from requests_html import HTML
+            self._html = HTML(url=self.url, html=self.content)
+        return self._html
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            kind = "Client" if self.status_code < 500 else "Server"
+            raise requests.HTTPError(f"{self.status_code} {kind} Error: {self.reason} for url: {self.url}", response=self)
+
+    async def _read(self, count):
+        try:
+            return await asyncio.wait_for(self._connection[0].read(count), self._read_timeout)
+        except asyncio.TimeoutError:
+            raise requests.ReadTimeout(f"Read timed out ({self.url})") from None
+
+    async def _read_exactly(self, count):
+        try:
+            return await asyncio.wait_for(self._connection[0].readexactly(count), self._read_timeout)
+        except asyncio.TimeoutError:
+            raise requests.ReadTimeout(f"Read timed out ({self.url})") from None
+        except asyncio.IncompleteReadError as e:
+            raise requests.ConnectionError(f"Connection closed mid-body ({self.url})") from e
+
+    async def _read_line(self):
+        try:
+            return await asyncio.wait_for(self._connection[0].readuntil(b"\r\n"), self._read_timeout)
+        except asyncio.TimeoutError:
+            raise requests.ReadTimeout(f"Read timed out ({self.url})") from None
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            raise requests.ConnectionError(f"Bad chunked body ({self.url})") from e
+
+    async def _raw_chunks(self):
+        # the body as sent, by Transfer-Encoding: chunked, Content-Length or until the server closes
+        if self.status_code in (204, 304) or self.status_code < 200:
+            return
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            while True:
+                size = int((await self._read_line()).split(b";")[0], 16)
+                if size == 0:
+                    while (await self._read_line()) != b"\r\n":
+                        pass # trailers
+                    return
+                data = await self._read_exactly(size)
+                await self._read_exactly(2)
+                yield data
+        elif "Content-Length" in self.headers:
+            remaining = int(self.headers["Content-Length"])
+            while remaining > 0:
+                data = await self._read(min(READ_CHUNK, remaining))
+                if not data:
+                    raise requests.ConnectionError(f"Connection closed mid-body ({self.url})")
+                remaining -= len(data)
+                yield data
+        else:
+            self._keep_alive = False
+            while True:
+                data = await self._read(READ_CHUNK)
+                if not data:
+                    return
+                yield data
+
+    async def iter_content(self, chunk_size=None):
+        # decoded body pieces as they arrive (chunk_size is accepted for symmetry with requests)
+        if self._content is not None:
+            if self._content:
+                yield self._content
+            return
+        decoder = _Decoder(self.headers.get("Content-Encoding"))
+        finished = False
+        try:
+            async for data in self._raw_chunks():
+                self.wire_bytes += len(data)
+                data = decoder.feed(data)
+                if data:
+                    yield data
+            tail = decoder.flush()
+            if tail:
+                yield tail
+            finished = True
+        except zlib.error as e:
+            raise requests.exceptions.ContentDecodingError(f"Failed to decode response body ({self.url}): {e}") from e
+        finally:
+            if finished:
+                self._release()
+            else:
+                self.close()
+
+    async def read(self):
+        if self._content is None:
+            self._content = b"".join([data async for data in self.iter_content()])
+        return self._content
+
+    def _release(self):
+        # a fully read body: the connection goes back to the idle pool
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._client._checkin(self._key, connection, self._keep_alive)
+
+    def close(self):
+        # an unread or partly read body: drop the connection
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            connection[1].close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+class AsyncClient:
+    """
+    GET over keep-alive HTTP/1.1 connections opened with asyncio.open_connection, so every
+    request runs on the event loop without a thread. Idle connections are kept per host up to
+    sessions.POOL_MAXSIZE. Errors are raised as the requests exceptions the policy retries
+    (ConnectionError, ConnectTimeout, ReadTimeout). One client per event loop (get_client).
+    """
+
+    def __init__(self, headers=None, max_idle=None):
+        self.headers = {"User-Agent": sessions.USER_AGENT, "Accept-Encoding": sessions.ACCEPT_ENCODING,
+                        "Accept": "*/*", **(headers or {})}
+        self.max_idle = max_idle or sessions.POOL_MAXSIZE
+        self._idle = {} # (scheme, host, port) -> [(reader, writer), ...]
+        self._ssl = None
+
+    def _checkout(self, key):
+        idle = self._idle.get(key)
+        while idle:
+            connection = idle.pop()
+            if not connection[0].at_eof() and not connection[1].is_closing():
+                return connection
+            connection[1].close()
+        return None
+
+    def _checkin(self, key, connection, keep_alive):
+        idle = self._idle.setdefault(key, [])
+        if keep_alive and len(idle) < self.max_idle and not connection[1].is_closing():
+            idle.append(connection)
+        else:
+            connection[1].close()
+
+    async def _connect(self, key, timeout):
+        scheme, host, port = key
+        if scheme == "https" and self._ssl is None:
+            self._ssl = ssl.create_default_context()
+        start = time.perf_counter()
+        try:
+            connection = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=self._ssl if scheme == "https" else None, limit=MAX_HEADER_BYTES), timeout)
+        except asyncio.TimeoutError:
+            raise requests.ConnectTimeout(f"Connection to {host} timed out (connect timeout={timeout})") from None
+        except OSError as e:
+            raise requests.ConnectionError(f"Failed to connect to {host}:{port}: {e}") from e
+        timeline.record("connect", start, host=host)
+        return connection
+
+    async def get(self, url, headers=None, timeout=(5, 30), stream=False, allow_redirects=True, **ignored):
+        """
+        GET `url`, following 301/302/303/307/308 redirects as requests does (Location resolved
+        against the current url, at most MAX_REDIRECTS hops). The response's url is the final
+        one and its history holds the redirects.
+        """
+        history = []
+        while True:
+            response = await self._get_once(url, headers, timeout, stream)
+            location = response.headers.get("Location")
+            if not allow_redirects or response.status_code not in REDIRECT_STATUSES or not location:
+                response.history = history
+                return response
+            # the redirect's own body is read so its connection can be reused
+            await response.read()
+            history.append(response)
+            if len(history) > MAX_REDIRECTS:
+                raise requests.TooManyRedirects(f"Exceeded {MAX_REDIRECTS} redirects.", response=response)
+            url = urljoin(url, location)
+
+    async def _get_once(self, url, headers, timeout, stream):
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        key = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+        connect_timeout, read_timeout = _timeouts(timeout)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        lines = [f"GET {target} HTTP/1.1", f"Host: {parts.netloc}"]
+        lines += [f"{name}: {value}" for name, value in {**self.headers, **(headers or {})}.items()]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        start = time.perf_counter()
+        for attempt in range(2):
+            connection = self._checkout(key)
+            reused = connection is not None
+            if connection is None:
+                connection = await self._connect(key, connect_timeout)
+            reader, writer = connection
+            try:
+                writer.write(request)
+                await writer.drain()
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), read_timeout)
+                break
+            except asyncio.TimeoutError:
+                writer.close()
+                raise requests.ReadTimeout(f"Read timed out ({url})") from None
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+                writer.close()
+                if reused and attempt == 0:
+                    continue # the server closed an idle keep-alive connection; try a fresh one
+                raise requests.ConnectionError(f"Connection aborted ({url}): {e!r}") from e
+            except BaseException:
+                # cancelled (e.g. the losing attempt of a hedge): the connection is mid-request
+                writer.close()
+                raise
+
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        version, status, reason = (status_line.split(" ", 2) + [""])[:3]
+        response_headers = CaseInsensitiveDict()
+        for line in header_lines:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                name, value = name.strip(), value.strip()
+                response_headers[name] = f"{response_headers[name]}, {value}" if name in response_headers else value
+        connection_header = response_headers.get("Connection", "").lower()
+        keep_alive = connection_header != "close" and (version != "HTTP/1.0" or connection_header == "keep-alive")
+        response = Response(self, key, url, int(status), reason, response_headers, connection,
+                            timedelta(seconds=time.perf_counter() - start), keep_alive)
+        response._read_timeout = read_timeout
+        response.encoding = requests.utils.get_encoding_from_headers(response_headers)
+        if not stream:
+            try:
+                await response.read()
+            except BaseException:
+                response.close()
+                raise
+        return response
+
+    async def close(self):
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+        self._idle.clear()
+
+def get_client():
+    # the client of the running event loop (connections cannot move between loops)
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = AsyncClient()
+    return client
+
+async def close_client():
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
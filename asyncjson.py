@@ -0,0 +1,12 @@
+#reddit asyncio
+
+import asyncengine
+import redditcore
+
+def child_fetch_top_posts(subreddit, results, limit=10):
+    redditcore.child_fetch_top_posts(subreddit, results, limit)
+
+# pass `results` (any object with append) to receive records as soon as they are produced
+def run_reddit_async(subreddits, limit, concurrency=asyncengine.DEFAULT_CONCURRENCY, results=None):
+    # Every subreddit runs on one event loop
+    return redditcore.run_reddit("AsyncIO", subreddits, limit, results, concurrency=concurrency)
@@ -0,0 +1,180 @@
+#offline benchmark: every method against a local stand-in server, no prompts
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import mockserver
+
+SUBREDDITS = ["webscraping", "learnpython", "datascience", "MachineLearning", "Python", "programming", "computerscience", "technology", "coding", "bigdata"]
+
+def percentile(values, pct):
+    # linear interpolation between the closest ranks
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    k = (len(ordered) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+def summarize(times):
+    return {
+        "runs": len(times),
+        "mean": round(statistics.fmean(times), 4),
+        "stdev": round(statistics.pstdev(times), 4),
+        "min": round(min(times), 4),
+        "max": round(max(times), 4),
+        "p50": round(percentile(times, 50), 4),
+        "p95": round(percentile(times, 95), 4),
+        "p99": round(percentile(times, 99), 4),
+        "times": times,
+    }
+
+def count_errors(site, results):
+    if site == "wiki":
+        return sum(1 for _, intro in results if intro.startswith("Error scraping"))
+    return sum(1 for record in results if record[0] == "error")
+
+def stream_run(site, method, args):
+    # one run through the streaming API: results are counted as they arrive and not kept
+    import testing_wiki, redditcore
+    bounds = {"max_in_flight": args.max_in_flight, "buffer_size": args.buffer_size}
+    errors = 0
+    start = time.perf_counter()
+    if site == "wiki":
+        for _, _, intro in testing_wiki.wiki_stream(method, args.pages, args.text_length, **bounds):
+            errors += intro.startswith("Error scraping")
+    else:
+        for _, record in redditcore.stream_reddit(method, SUBREDDITS[:args.subreddits], args.posts, **bounds):
+            errors += record[0] == "error"
+    return round(time.perf_counter() - start, 3), errors
+
+def bench_method(site, method, args):
+    # warmups are run and thrown away, then `repeats` timed runs
+    import testing_wiki, redditcore, redditfeed, executors, pipeline
+    redditfeed.reset_stats()
+    times = []
+    errors = 0
+    for i in range(args.warmups + args.repeats):
+        if args.stream:
+            elapsed, run_errors = stream_run(site, method, args)
+            if i >= args.warmups:
+                times.append(elapsed)
+                errors += run_errors
+            continue
+        if site == "wiki":
+            elapsed, results = testing_wiki.wiki_run(method, args.pages, args.text_length)
+        else:
+            elapsed, results = redditcore.run_reddit(method, SUBREDDITS[:args.subreddits], args.posts)
+        if i >= args.warmups:
+            times.append(elapsed)
+            errors += count_errors(site, results)
+    summary = summarize(times)
+    summary["errors"] = errors
+    if site == "reddit":
+        # listing bytes on the wire / decoded and the most held at once, over all runs of this method
+        summary["listings"] = redditfeed.stats()
+    if executors.staged(method) and not args.stream:
+        # stage metrics of the last timed run
+        summary["stages"] = pipeline.stats()
+    return summary
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark every scraping method against a local stand-in for Wikipedia and Reddit.")
+    parser.add_argument("--site", choices=["wiki", "reddit", "both"], default="both")
+    parser.add_argument("--methods", nargs="+", help="methods to run (default: every registered method)")
+    parser.add_argument("--repeats", type=int, default=10, help="timed runs per method")
+    parser.add_argument("--warmups", type=int, default=1, help="untimed runs per method before timing")
+    parser.add_argument("--hybrid", default=None, metavar="NxM", help="hybrid modes: N processes x M threads each (default: one process per CPU x 16)")
+    parser.add_argument("--fetch-workers", type=int, default=None, help="pipeline mode: fetch threads (default 16)")
+    parser.add_argument("--parse-workers", type=int, default=None, help="pipeline mode: parse processes (default: one per CPU, 0: threads)")
+    parser.add_argument("--queue-size", type=int, default=None, help="pipeline mode: bounded queue size in front of each stage (default 64)")
+    parser.add_argument("--stream", action="store_true", help="consume results through the bounded streaming API instead of collecting them")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="streaming: tasks running at once (default 64)")
+    parser.add_argument("--buffer-size", type=int, default=None, help="streaming: finished results waiting for the consumer (default 64)")
+    parser.add_argument("--pages", type=int, default=30, help="wiki pages per run")
+    parser.add_argument("--intro-backend", choices=["html", "api"], default="html", help="wiki intros from rendered pages or batched API extracts")
+    parser.add_argument("--buffer-listings", action="store_true", help="read reddit listings whole instead of stream-decoding them")
+    parser.add_argument("--text-length", type=int, default=300, help="intro characters per wiki page")
+    parser.add_argument("--subreddits", type=int, default=10, help="subreddits per run (max 10)")
+    parser.add_argument("--posts", type=int, default=50, help="posts per subreddit")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per request (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="+/- random latency (seconds)")
+    parser.add_argument("--bandwidth", type=float, default=None, help="bytes per second per response (default: unlimited)")
+    parser.add_argument("--removed-per-page", type=int, default=0, help="posts left out of every reddit listing page (short pages)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true", help="keep the HTTP response cache on (default: cold cache)")
+    parser.add_argument("--workdir", default=None, help="where the scrapers write their CSVs (default: a temp dir)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = os.path.abspath(args.output)
+    random.seed(args.seed)
+
+    server = mockserver.MockServer(latency=args.latency, jitter=args.jitter, bandwidth=args.bandwidth,
+                                   error_rate=args.error_rate, seed=args.seed,
+                                   removed_per_page=args.removed_per_page)
+    base_url = server.start()
+
+    # the scraper modules read these when imported, and pool workers inherit them
+    os.environ["WIKI_BASE_URL"] = base_url
+    os.environ["REDDIT_BASE_URL"] = base_url
+    if not args.cache:
+        os.environ["SCRAPER_NO_CACHE"] = "1"
+    import executors, httpcache, transport, throttle, policy, pipeline, testing_wiki, redditfeed
+    pipeline.FETCH_WORKERS = args.fetch_workers or pipeline.FETCH_WORKERS
+    if args.parse_workers is not None:
+        pipeline.PARSE_WORKERS = args.parse_workers
+    pipeline.QUEUE_SIZE = args.queue_size or pipeline.QUEUE_SIZE
+    if args.hybrid:
+        executors.HYBRID_PROCESSES, executors.HYBRID_THREADS = executors.parse_shape(args.hybrid)
+    testing_wiki.WIKI_BASE_URL = base_url
+    testing_wiki.INTRO_BACKEND = args.intro_backend
+    redditfeed.REDDIT_BASE_URL = base_url
+    redditfeed.STREAM_LISTINGS = not args.buffer_listings
+    httpcache.configure(enabled=args.cache)
+
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix="scraper-bench-"))
+
+    methods = args.methods or list(executors.EXECUTORS)
+    sites = ["wiki", "reddit"] if args.site == "both" else [args.site]
+    report = {
+        "config": vars(args),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "results": {},
+    }
+
+    try:
+        for site in sites:
+            report["results"][site] = {}
+            for method in methods:
+                summary = bench_method(site, method, args)
+                report["results"][site][method] = summary
+                print(f"{site:<8}{method:<16}p50 {summary['p50']:>8}s  p95 {summary['p95']:>8}s  p99 {summary['p99']:>8}s  errors {summary['errors']}")
+                if "stages" in summary:
+                    pipeline.print_stats(summary["stages"])
+    finally:
+        server.stop()
+
+    report["server_requests"] = server.requests
+    report["transport"] = transport.stats()
+    report["throttle"] = throttle.snapshot()
+    report["policy"] = policy.stats()
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+    return report
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,254 @@
+#executor strategies
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import asyncengine
+import pipeline
+import streaming
+import workerpool
+import transport
+import timeline
+
+MAX_THREADS = 256 # threads per run at most unless max_workers says otherwise
+
+EXECUTORS = {} # method name -> runner(func, arg_list, **options), in registration order
+DISPATCHERS = {} # method name -> streaming dispatcher (see register_dispatcher)
+_SHARED_MEMORY = set() # methods whose tasks run in this process and can append to a shared list
+_STAGED = set() # methods that take pipeline.Staged tasks and run their stages separately
+
+def register_executor(name, shares_memory=True, staged=False):
+    """
+    Register a concurrency model under the name shown in the GUI and the benchmarks.
+    A runner takes (func, arg_list, **options), calls func(*args) for every args tuple and
+    returns the return values in input order. A staged runner also accepts pipeline.Staged
+    tasks (and a write callback) and records its own stage timings.
+    """
+    def decorator(runner):
+        EXECUTORS[name] = runner
+        for methods, on in ((_SHARED_MEMORY, shares_memory), (_STAGED, staged)):
+            if on:
+                methods.add(name)
+            else:
+                methods.discard(name)
+        return runner
+    return decorator
+
+def shares_memory(method):
+    return method in _SHARED_MEMORY
+
+def staged(method):
+    return method in _STAGED
+
+def register_dispatcher(name):
+    """
+    Register how `name` starts tasks for stream(). A dispatcher is a context manager function
+    taking (func, max_in_flight, **options) - the same options as the method's runner - and
+    yielding (dispatch, chunk) for streaming.ResultStream. Methods without one are streamed
+    through their runner, `chunk` tasks per call.
+    """
+    def decorator(opener):
+        DISPATCHERS[name] = opener
+        return opener
+    return decorator
+
+def _check(method):
+    if method not in EXECUTORS:
+        raise ValueError(f"Unknown method: {method} (choose from {', '.join(EXECUTORS)})")
+
+def run(method, func, arg_list, **options):
+    _check(method)
+    # timeline.wrap records each task's queueing time when the live timeline is on
+    return EXECUTORS[method](func if method in _STAGED else timeline.wrap(func), list(arg_list), **options)
+
+def stream(method, func, arg_iter, max_in_flight=None, buffer_size=None, **options):
+    """
+    Like run(), but yields (index, result) as tasks finish instead of returning one list, with
+    at most max_in_flight tasks running and buffer_size results waiting (streaming.py), so
+    memory stays flat however many args arg_iter produces. arg_iter may be a generator; it is
+    read only as slots free up. Staged methods take pipeline.Staged tasks as in run().
+    """
+    _check(method)
+    max_in_flight = max_in_flight or streaming.MAX_IN_FLIGHT
+    opener = DISPATCHERS.get(method, functools.partial(_runner_dispatch, method))
+    with opener(func if method in _STAGED else timeline.wrap(func), max_in_flight, **options) as (dispatch, chunk):
+        yield from streaming.ResultStream(dispatch, arg_iter, max_in_flight, buffer_size, chunk)
+
+def run_streaming(method, func, arg_iter, callback, max_in_flight=None, buffer_size=None, **options):
+    # callback form of stream(): callback(index, result) in this thread as results come in; returns the count
+    count = 0
+    for index, result in stream(method, func, arg_iter, max_in_flight, buffer_size, **options):
+        callback(index, result)
+        count += 1
+    return count
+
+def _deliver_future(deliver, indices, future):
+    if future.cancelled():
+        return # dropped with the closed stream (tasks still on the event loop when it stops)
+    error = future.exception()
+    if error is not None:
+        deliver(error=error)
+    else:
+        deliver(list(zip(indices, future.result())))
+
+@contextmanager
+def _runner_dispatch(method, func, max_in_flight, **options):
+    # any registered runner: hand it `chunk` tasks at a time from one helper thread per call
+    chunk = max(1, max_in_flight // 4)
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight // chunk), thread_name_prefix="stream") as helpers:
+        def dispatch(items, deliver):
+            indices = [index for index, _ in items]
+            future = helpers.submit(EXECUTORS[method], func, [args for _, args in items], **options)
+            future.add_done_callback(functools.partial(_deliver_future, deliver, indices))
+        yield dispatch, chunk
+
+def _call_one(func, args):
+    return [func(*args)]
+
+@contextmanager
+def _thread_dispatch(func, workers):
+    # one task per thread of a pool of `workers` threads
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        def dispatch(items, deliver):
+            for index, args in items:
+                pool.submit(_call_one, func, args).add_done_callback(functools.partial(_deliver_future, deliver, [index]))
+        yield dispatch, 1
+
+@contextmanager
+def _pool_dispatch(func, processes=None, chunk=1, unit=None):
+    # `chunk` tasks per pool message: unit(func, [args, ...]) runs in a worker and returns their results
+    pool = workerpool.get_pool(processes)
+
+    def dispatch(items, deliver):
+        indices = [index for index, _ in items]
+        arg_list = [args for _, args in items]
+        call = (unit, (func, arg_list)) if unit else (_call_one, (func, arg_list[0]))
+        pool.apply_async(transport.call_packed, call,
+                         callback=lambda batch: deliver(list(zip(indices, transport.unpack(batch, len(indices))))),
+                         error_callback=lambda e: deliver(error=e))
+    yield dispatch, chunk
+
+@register_executor("Baseline")
+def run_serial(func, arg_list):
+    return [func(*args) for args in arg_list]
+
+@register_dispatcher("Baseline")
+def stream_serial(func, max_in_flight):
+    return _thread_dispatch(func, 1)
+
+@register_executor("MultiThreading")
+def run_threads(func, arg_list, max_workers=None):
+    # one thread per item, up to MAX_THREADS, unless max_workers caps it
+    workers = max(1, max_workers or min(len(arg_list), MAX_THREADS))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda args: func(*args), arg_list))
+
+@register_dispatcher("MultiThreading")
+def stream_threads(func, max_in_flight, max_workers=None):
+    return _thread_dispatch(func, min(max_workers or max_in_flight, max_in_flight))
+
+@register_executor("Forking", shares_memory=False)
+def run_processes(func, arg_list, processes=None):
+    # each task's result comes back as one packed message (see transport.py)
+    batches = workerpool.map_tasks(transport.call_packed, [(func, args) for args in arg_list], processes)
+    return [transport.unpack(batch) for batch in batches]
+
+@register_dispatcher("Forking")
+def stream_processes(func, max_in_flight, processes=None):
+    return _pool_dispatch(func, processes)
+
+@register_executor("AsyncIO")
+def run_event_loop(func, arg_list, concurrency=asyncengine.DEFAULT_CONCURRENCY):
+    return asyncengine.run_async(func, arg_list, concurrency)
+
+async def _await_one(limit, native, args):
+    async with limit:
+        return [await native(*args)]
+
+@contextmanager
+def _loop_dispatch(native, concurrency):
+    # every task a coroutine on one event loop running in a helper thread (asyncengine.LoopThread)
+    runner = asyncengine.LoopThread()
+    limit = asyncio.Semaphore(concurrency)
+    try:
+        def dispatch(items, deliver):
+            for index, args in items:
+                runner.submit(_await_one(limit, native, args)).add_done_callback(functools.partial(_deliver_future, deliver, [index]))
+        yield dispatch, 1
+    finally:
+        runner.close()
+
+@register_dispatcher("AsyncIO")
+def stream_event_loop(func, max_in_flight, concurrency=asyncengine.DEFAULT_CONCURRENCY):
+    # blocking tasks without a coroutine version fall back to threads, as in asyncengine.gather_limited
+    native = asyncengine.coroutine_function(func)
+    if native is None:
+        return _thread_dispatch(func, min(concurrency, max_in_flight))
+    return _loop_dispatch(native, min(concurrency, max_in_flight))
+
+def parse_shape(shape):
+    # "4x16" -> (4, 16) processes x threads; "x16" keeps one process per CPU
+    processes, _, threads = shape.lower().partition("x")
+    return (int(processes) if processes else None), int(threads)
+
+# shape of the hybrid modes, e.g. SCRAPER_HYBRID=4x16: worker processes (None: one per CPU) x
+# threads (or requests in flight on the event loop) inside each worker process
+HYBRID_PROCESSES, HYBRID_THREADS = parse_shape(os.environ.get("SCRAPER_HYBRID", "x16"))
+
+def hybrid_chunk_size(num_items, processes, threads):
+    # enough items to keep every thread of a worker busy, and about two chunks per worker for balance
+    return max(threads, -(-num_items // (processes * 2)))
+
+def _run_chunk(engine, func, chunk, width):
+    # runs in a pool worker: one slice of the work on this process's own threads or event loop
+    if engine == "asyncio":
+        return run_event_loop(func, chunk, concurrency=width)
+    return run_threads(func, chunk, max_workers=width)
+
+def run_hybrid(func, arg_list, engine="threads", processes=None, threads=None):
+    """
+    N worker processes x M threads (or an event loop with M requests in flight) each: the
+    work is cut into contiguous chunks, every chunk runs concurrently inside one pool worker
+    and comes back as one packed message. Parsing uses every core while each process still
+    overlaps its network waits.
+    """
+    threads = threads or HYBRID_THREADS
+    processes = processes or HYBRID_PROCESSES or os.cpu_count() or 1
+    size = hybrid_chunk_size(len(arg_list), processes, threads)
+    chunks = [(engine, func, arg_list[i:i + size], threads) for i in range(0, len(arg_list), size)]
+    batches = workerpool.map_tasks(transport.call_packed, [(_run_chunk, args) for args in chunks], processes)
+    return [result for batch, chunk in zip(batches, chunks) for result in transport.unpack(batch, len(chunk[2]))]
+
+@register_executor("Hybrid", shares_memory=False)
+def run_hybrid_threads(func, arg_list, processes=None, threads=None):
+    return run_hybrid(func, arg_list, "threads", processes, threads)
+
+@register_executor("HybridAsyncIO", shares_memory=False)
+def run_hybrid_event_loop(func, arg_list, processes=None, concurrency=None):
+    return run_hybrid(func, arg_list, "asyncio", processes, concurrency)
+
+def _hybrid_dispatch(func, engine, processes, threads):
+    # one chunk of `threads` tasks per pool message, run concurrently inside the worker
+    threads = threads or HYBRID_THREADS
+    return _pool_dispatch(func, processes or HYBRID_PROCESSES, threads, functools.partial(_run_chunk, engine, width=threads))
+
+@register_dispatcher("Hybrid")
+def stream_hybrid_threads(func, max_in_flight, processes=None, threads=None):
+    return _hybrid_dispatch(func, "threads", processes, threads)
+
+@register_dispatcher("HybridAsyncIO")
+def stream_hybrid_event_loop(func, max_in_flight, processes=None, concurrency=None):
+    return _hybrid_dispatch(func, "asyncio", processes, concurrency)
+
+@register_executor("Pipeline", shares_memory=False, staged=True)
+def run_pipeline(func, arg_list, fetch_workers=None, parse_workers=None, queue_size=None, write=None):
+    # fetch threads -> parse processes -> one writer, connected by bounded queues (see pipeline.py)
+    return pipeline.run_staged(func, arg_list, fetch_workers, parse_workers, queue_size, write)
+
+@register_dispatcher("Pipeline")
+def stream_pipeline(func, max_in_flight, fetch_workers=None, parse_workers=None, queue_size=None):
+    # fetch threads, each sending its task's parts to the parse processes; the consumer is the writer
+    task = pipeline.pooled(func, parse_workers)
+    return _thread_dispatch(task, min(fetch_workers or pipeline.FETCH_WORKERS, max_in_flight))
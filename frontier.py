@@ -0,0 +1,235 @@
+#crawl frontier for wiki title discovery: breadth-first (or priority) expansion from seed pages
+
+import hashlib
+import heapq
+import html
+import queue
+import re
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, unquote
+
+LINK_PATTERN = re.compile(r'href="/wiki/([^"#?]+)')
+TITLE_SAFE = ";:@$!*(),/~" # characters MediaWiki leaves unescaped in /wiki/ links
+FETCH_WORKERS = 8 # pages expanded at once
+MAX_PENDING = 10000 # discovered titles buffered before the crawl waits for the scrapers
+
+_DONE = object()
+_POLL = 0.1 # seconds between checks for a closed stream while the queue is full
+
+def normalize_title(title):
+    # "/wiki/foo%20bar#History", "Foo bar" and "Foo_bar" are all the article "Foo_bar" (escaped like a wiki link)
+    title = unquote(html.unescape(title))
+    if title.startswith("/wiki/"):
+        title = title[len("/wiki/"):]
+    title = "_".join(title.split("#", 1)[0].replace("_", " ").split())
+    return quote(title[:1].upper() + title[1:], safe=TITLE_SAFE)
+
+def is_article(title):
+    # File:, Category:, Help:, Wikipedia: ... pages are not articles
+    return bool(title) and ":" not in title
+
+def page_links(text):
+    # /wiki/ link targets of a page, in document order
+    return LINK_PATTERN.findall(text)
+
+class SeenSet:
+    """
+    Set of strings kept as 64-bit hashes in one open-addressing table (an array of unsigned
+    64-bit ints, at most half full): 16-32 bytes per entry instead of ~100 for a set of str,
+    so millions of titles fit in tens of MB. Two titles sharing a hash would count as one;
+    at 10 million titles the chance of that happening at all is below 1 in 100000.
+    """
+
+    def __init__(self, capacity=1024):
+        self._table = array("Q", bytes(8 * (1 << max(4, (2 * capacity - 1).bit_length()))))
+        self._mask = len(self._table) - 1
+        self._len = 0
+
+    @staticmethod
+    def _hash(key):
+        # 0 marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+    def _find(self, h):
+        # slot holding h, or the empty slot where it would go
+        table, mask = self._table, self._mask
+        i = h & mask
+        while table[i] and table[i] != h:
+            i = (i + 1) & mask
+        return i
+
+    def add(self, key):
+        # True if key was not in the set yet
+        h = self._hash(key)
+        i = self._find(h)
+        if self._table[i]:
+            return False
+        self._table[i] = h
+        self._len += 1
+        if 2 * self._len > len(self._table):
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self._table
+        self._table = array("Q", bytes(16 * len(old)))
+        self._mask = len(self._table) - 1
+        for h in old:
+            if h:
+                self._table[self._find(h)] = h
+
+    def __contains__(self, key):
+        return bool(self._table[self._find(self._hash(key))])
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def nbytes(self):
+        return len(self._table) * self._table.itemsize
+
+class Frontier:
+    """
+    Pages still to expand, lowest priority value first. Breadth-first by default (priority =
+    depth); pass priority(title, depth) for another order. Ties go to the page discovered
+    first and each wave of pages is handled in pop order, so the same seeds on the same site
+    always give the same titles in the same order. Seeds are depth 0; titles are discovered
+    up to max_depth link hops away and only pages below max_depth are expanded.
+    """
+
+    def __init__(self, seeds, max_depth=1, priority=None):
+        self.max_depth = max_depth
+        self.priority = priority or (lambda title, depth: depth)
+        self.seen = SeenSet()
+        self.expanded = 0
+        self.errors = 0
+        self._heap = []
+        self._order = 0
+        self._seed_articles = []
+        for seed in seeds:
+            seed = normalize_title(seed)
+            if self.seen.add(seed):
+                self._push(seed, 0)
+                if is_article(seed):
+                    self._seed_articles.append(seed)
+
+    def _push(self, title, depth):
+        heapq.heappush(self._heap, (self.priority(title, depth), self._order, depth, title))
+        self._order += 1
+
+    def __len__(self):
+        return len(self._heap)
+
+    def crawl(self, fetch_links, limit=None, workers=FETCH_WORKERS):
+        """
+        Yield article titles (normalized, never twice) until `limit` or the frontier is empty.
+        fetch_links(title) returns the link targets of one page; up to `workers` pages are
+        fetched at once. A page that fails to load counts in `errors` and is skipped.
+        """
+        emitted = 0
+        for title in self._seed_articles:
+            if limit is not None and emitted >= limit:
+                return
+            yield title
+            emitted += 1
+
+        def links(title):
+            try:
+                return fetch_links(title)
+            except Exception:
+                return None
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while self._heap and (limit is None or emitted < limit):
+                wave = [heapq.heappop(self._heap) for _ in range(min(workers, len(self._heap)))]
+                for (_, _, depth, _), found in zip(wave, pool.map(links, [entry[3] for entry in wave])):
+                    if found is None:
+                        self.errors += 1
+                        continue
+                    self.expanded += 1
+                    for link in found:
+                        link = normalize_title(link)
+                        if not is_article(link) or not self.seen.add(link):
+                            continue
+                        yield link
+                        emitted += 1
+                        if limit is not None and emitted >= limit:
+                            return
+                        if depth + 1 < self.max_depth:
+                            self._push(link, depth + 1)
+
+class TitleStream:
+    """
+    A crawl running in a background thread, so scraping can start on the first titles while
+    later ones are still being discovered. Iterate it for titles, or take them in batches.
+    At most max_pending titles wait in between. A consumer that stops early closes the
+    stream (leaving the loop does, or use it as a context manager), which stops the crawl.
+    """
+
+    def __init__(self, frontier, fetch_links, limit=None, workers=FETCH_WORKERS, max_pending=MAX_PENDING):
+        self.frontier = frontier
+        self.error = None
+        self._queue = queue.Queue(max_pending)
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(fetch_links, limit, workers), name="frontier", daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        # wait for room, but give up once the consumer has closed the stream
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=_POLL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _run(self, fetch_links, limit, workers):
+        crawl = self.frontier.crawl(fetch_links, limit, workers)
+        try:
+            for title in crawl:
+                if not self._put(title):
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            # ends the crawl's fetch pool when the consumer left early
+            crawl.close()
+            self._put(_DONE)
+
+    def __iter__(self):
+        try:
+            while True:
+                title = self._queue.get()
+                if title is _DONE:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                yield title
+        finally:
+            self.close()
+
+    def batches(self, size):
+        # lists of `size` titles (the last one may be shorter), in discovery order
+        batch = []
+        try:
+            for title in self:
+                batch.append(title)
+                if len(batch) >= size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            self.close()
+
+    def close(self):
+        self._closed.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
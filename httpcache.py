@@ -0,0 +1,416 @@
+#http response cache
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import throttle
+import workerpool
+
+ENABLED = os.environ.get("SCRAPER_NO_CACHE", "") in ("", "0")
+CACHE_DIR = os.environ.get("SCRAPER_CACHE_DIR", ".http_cache") # None keeps the cache in memory only
+MAX_BYTES = 200 * 1024 * 1024 # total size of stored bodies before LRU eviction
+MAX_AGE = 0 # seconds a stored response is served without asking the server again (0 = always revalidate)
+STREAM_CHUNK_SIZE = 16 * 1024 # pieces a stored body is handed to streaming callers in
+
+_lock = threading.Lock()
+_memory = OrderedDict() # url -> (meta, body), oldest first
+_memory_bytes = 0
+_disk_bytes = None # estimate of the on-disk size, filled by the first scan
+_stats = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0}
+_UNSET = object()
+
+# configure() at run time reaches pool workers however they were started
+workerpool.share_settings(__name__, "ENABLED", "CACHE_DIR", "MAX_BYTES", "MAX_AGE")
+
+def configure(enabled=_UNSET, directory=_UNSET, max_bytes=_UNSET, max_age=_UNSET):
+    """
+    Change the cache settings. directory=None switches to an in-memory cache, enabled=False
+    bypasses the cache entirely (cold-cache benchmarks). Pool workers get the settings that
+    are in place when the pool starts (workerpool.share_settings); the SCRAPER_NO_CACHE /
+    SCRAPER_CACHE_DIR environment variables work for every process.
+    """
+    global ENABLED, CACHE_DIR, MAX_BYTES, MAX_AGE, _disk_bytes
+    with _lock:
+        if enabled is not _UNSET:
+            ENABLED = enabled
+        if directory is not _UNSET:
+            CACHE_DIR = directory
+            _disk_bytes = None
+        if max_bytes is not _UNSET:
+            MAX_BYTES = max_bytes
+        if max_age is not _UNSET:
+            MAX_AGE = max_age
+
+def clear():
+    global _memory_bytes, _disk_bytes
+    with _lock:
+        _memory.clear()
+        _memory_bytes = 0
+        if CACHE_DIR and os.path.isdir(CACHE_DIR):
+            for name in os.listdir(CACHE_DIR):
+                os.remove(os.path.join(CACHE_DIR, name))
+        _disk_bytes = 0
+
+def stats():
+    # counts for this process: fresh local hits, 304 revalidations, full downloads
+    with _lock:
+        return dict(_stats)
+
+class CachedResponse:
+    """Response served from the cache; offers the parts of a requests response the scrapers use."""
+
+    def __init__(self, url, status_code, content, headers):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.encoding = "utf-8" # as `text` decodes it
+        self.from_cache = True
+        self._html = None
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    @property
+    def html(self):
+        if self._html is None:
+            from requests_html import HTML
+            self._html = HTML(url=self.url, html=self.content)
+        return self._html
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=STREAM_CHUNK_SIZE, decode_unicode=False):
+        # the stored body in pieces, for callers that stream (get_stream)
+        for i in range(0, len(self.content), chunk_size or STREAM_CHUNK_SIZE):
+            yield self.content[i:i + (chunk_size or STREAM_CHUNK_SIZE)]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+class AsyncCachedResponse(CachedResponse):
+    # CachedResponse for coroutines (get_stream_async): iter_content is an async generator
+    async def iter_content(self, chunk_size=STREAM_CHUNK_SIZE):
+        for chunk in CachedResponse.iter_content(self, chunk_size):
+            yield chunk
+
+class _Spool:
+    """
+    The body of a streamed 200, collected as the caller reads it and stored by commit() once
+    it has been read to the end. On disk it goes straight to a temporary file, so streaming
+    callers do not hold the whole body in memory; the in-memory cache keeps the chunks.
+    """
+
+    def __init__(self, url, meta):
+        self.url = url
+        self.meta = meta
+        self.size = 0
+        self._chunks = []
+        self._file = None
+        self._tmp = None
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if CACHE_DIR is None:
+            self._chunks.append(chunk)
+            return
+        if self._file is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            self._tmp = f"{_paths(self.url)[1]}.{os.getpid()}.{threading.get_ident()}.tmp"
+            self._file = open(self._tmp, "wb")
+        self._file.write(chunk)
+
+    def commit(self):
+        if self._file is None:
+            _store(self.url, self.meta, b"".join(self._chunks))
+            return
+        self._file.close()
+        if self.size > MAX_BYTES:
+            self.discard()
+            return
+        meta_path, body_path = _paths(self.url)
+        os.replace(self._tmp, body_path)
+        self._file = None
+        _write_atomic(meta_path, json.dumps(self.meta).encode("utf-8"))
+        _stored_on_disk(self.size)
+
+    def discard(self):
+        # the caller stopped early or the read failed: nothing is stored
+        self._chunks = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            try:
+                os.remove(self._tmp)
+            except OSError:
+                pass
+
+class _StoringResponse:
+    # a live streamed response (requests) whose body is stored once the caller has read all of it
+    def __init__(self, response, spool):
+        self._response = response
+        self._spool = spool
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        complete = False
+        try:
+            for chunk in self._response.iter_content(chunk_size=chunk_size):
+                self._spool.write(chunk)
+                yield chunk
+            complete = True
+        finally:
+            self._spool.commit() if complete else self._spool.discard()
+
+    def close(self):
+        self._spool.discard()
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class _AsyncStoringResponse(_StoringResponse):
+    # the same for an asynchttp response
+    async def iter_content(self, chunk_size=None):
+        complete = False
+        try:
+            async for chunk in self._response.iter_content(chunk_size):
+                self._spool.write(chunk)
+                yield chunk
+            complete = True
+        finally:
+            self._spool.commit() if complete else self._spool.discard()
+
+def _key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+def _paths(url):
+    key = _key(url)
+    return os.path.join(CACHE_DIR, key + ".json"), os.path.join(CACHE_DIR, key + ".body")
+
+def _lookup(url):
+    if CACHE_DIR is None:
+        with _lock:
+            entry = _memory.get(url)
+            if entry is not None:
+                _memory.move_to_end(url)
+            return entry
+
+    meta_path, body_path = _paths(url)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None
+    # the body's mtime is the LRU clock, shared by every process using the directory
+    os.utime(body_path)
+    return meta, body
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _store(url, meta, body):
+    global _memory_bytes
+    if len(body) > MAX_BYTES:
+        return
+    if CACHE_DIR is None:
+        with _lock:
+            old = _memory.pop(url, None)
+            if old is not None:
+                _memory_bytes -= len(old[1])
+            _memory[url] = (meta, body)
+            _memory_bytes += len(body)
+            _stats["stored"] += 1
+            while _memory_bytes > MAX_BYTES:
+                _, (_, evicted) = _memory.popitem(last=False)
+                _memory_bytes -= len(evicted)
+                _stats["evicted"] += 1
+        return
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    meta_path, body_path = _paths(url)
+    _write_atomic(body_path, body)
+    _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+    _stored_on_disk(len(body))
+
+def _stored_on_disk(size):
+    # account for a body just written to CACHE_DIR, evicting if the directory got too big
+    global _disk_bytes
+    with _lock:
+        _stats["stored"] += 1
+        if _disk_bytes is None:
+            _disk_bytes = _scan_disk()[1]
+        else:
+            _disk_bytes += size
+        if _disk_bytes > MAX_BYTES:
+            _evict_disk()
+
+def _scan_disk():
+    bodies = []
+    total = 0
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith(".body"):
+            continue
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        bodies.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+    return bodies, total
+
+def _evict_disk():
+    # drop least recently used entries until the directory fits in MAX_BYTES (caller holds _lock)
+    global _disk_bytes
+    bodies, total = _scan_disk()
+    bodies.sort()
+    for _, size, path in bodies:
+        if total <= MAX_BYTES:
+            break
+        for p in (path, path[:-len(".body")] + ".json"):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+        total -= size
+        _stats["evicted"] += 1
+    _disk_bytes = total
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+def _prepare(url, kwargs, cached=CachedResponse):
+    # (stored entry or None, cached response if it is fresh enough to serve); adds its validators to kwargs
+    entry = _lookup(url)
+    if entry is None:
+        return None, None
+    meta, body = entry
+    if MAX_AGE and time.time() - meta["stored_at"] < MAX_AGE:
+        _count("hits")
+        return entry, cached(url, 200, body, meta["headers"])
+    headers = dict(kwargs.pop("headers", None) or {})
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    kwargs["headers"] = headers
+    return entry, None
+
+def _revalidated(url, entry, cached=CachedResponse):
+    # a 304 for a stored entry: serve the stored body
+    meta, body = entry
+    _count("revalidated")
+    meta["stored_at"] = time.time()
+    _store(url, meta, body)
+    return cached(url, 200, body, meta["headers"])
+
+def _meta(url, response):
+    # what is stored with a 200, or None when it could never be revalidated or reused
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if response.status_code != 200 or not (etag or last_modified or MAX_AGE):
+        return None
+    return {
+        "url": url,
+        "etag": etag,
+        "last_modified": last_modified,
+        "stored_at": time.time(),
+        "headers": {"Content-Type": response.headers.get("Content-Type", "")},
+    }
+
+def _complete(url, entry, response):
+    # the stored body on 304, otherwise the live response (stored when it can be revalidated later)
+    if entry is not None and response.status_code == 304:
+        return _revalidated(url, entry)
+    _count("misses")
+    meta = _meta(url, response)
+    if meta is not None:
+        _store(url, meta, response.content)
+    return response
+
+def get(session, url, **kwargs):
+    """
+    session.get(url) through the cache and the per-host throttle. A stored response is
+    revalidated with a conditional GET (If-None-Match / If-Modified-Since) and reused on 304, or
+    served directly while younger than MAX_AGE. Returns either the live response or a
+    CachedResponse.
+    """
+    if not ENABLED:
+        return throttle.request(session, url, **kwargs)
+    entry, fresh = _prepare(url, kwargs)
+    if fresh is not None:
+        return fresh
+    return _complete(url, entry, throttle.request(session, url, **kwargs))
+
+async def get_async(client, url, **kwargs):
+    # get() on the event loop, with an asynchttp.AsyncClient in place of the session
+    if not ENABLED:
+        return await throttle.request_async(client, url, **kwargs)
+    entry, fresh = _prepare(url, kwargs)
+    if fresh is not None:
+        return fresh
+    return _complete(url, entry, await throttle.request_async(client, url, **kwargs))
+
+def get_stream(session, url, **kwargs):
+    """
+    get() for callers that read the body in chunks (stream=True) and may stop early. A stored
+    response is revalidated the same way; a 304 (or a fresh entry) comes back as a
+    CachedResponse that iterates the stored body. A 200 that can be revalidated later is
+    stored as it is read, once the caller has read it to the end; a body left partly read is
+    not stored.
+    """
+    kwargs["stream"] = True
+    if not ENABLED:
+        return throttle.request(session, url, **kwargs)
+    entry, fresh = _prepare(url, kwargs)
+    if fresh is not None:
+        return fresh
+    response = throttle.request(session, url, **kwargs)
+    if entry is not None and response.status_code == 304:
+        response.close()
+        return _revalidated(url, entry)
+    _count("misses")
+    meta = _meta(url, response)
+    return response if meta is None else _StoringResponse(response, _Spool(url, meta))
+
+async def get_stream_async(client, url, **kwargs):
+    # get_stream() on the event loop; stored bodies come back as AsyncCachedResponse
+    kwargs["stream"] = True
+    if not ENABLED:
+        return await throttle.request_async(client, url, **kwargs)
+    entry, fresh = _prepare(url, kwargs, AsyncCachedResponse)
+    if fresh is not None:
+        return fresh
+    response = await throttle.request_async(client, url, **kwargs)
+    if entry is not None and response.status_code == 304:
+        await response.read() # no body: the connection goes back to the pool
+        return _revalidated(url, entry, AsyncCachedResponse)
+    _count("misses")
+    meta = _meta(url, response)
+    return response if meta is None else _AsyncStoringResponse(response, _Spool(url, meta))
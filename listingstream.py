@@ -0,0 +1,98 @@
+#streaming reddit listing decoder
+
+import json
+import re
+
+# the post fields the scrapers use (id for incremental runs)
+POST_FIELDS = ("id", "title", "author", "ups", "num_comments", "permalink", "selftext")
+
+_SIGNIFICANT = re.compile(rb'[{}\[\]"\\]')
+_OPEN = b"{["
+_QUOTE, _BACKSLASH, _CLOSE_OBJECT, _CLOSE_ARRAY = ord('"'), ord("\\"), ord("}"), ord("]")
+
+class ListingDecoder:
+    """
+    Incremental decoder for a top.json listing fed in byte chunks. It jumps between braces,
+    brackets and quotes to find where each post of data.children starts and ends; a finished
+    post is decoded on its own and only POST_FIELDS are kept, so no more than one post's
+    bytes and dict are held at a time. Everything outside the posts (the cursor, dist, ...)
+    is kept as a small skeleton document and decoded by close().
+    """
+
+    def __init__(self, fields=POST_FIELDS):
+        self.fields = fields
+        self.peak_buffered = 0 # most bytes held at once (skeleton + the post being read)
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False      # the next byte is escaped (a chunk ended on a backslash)
+        self._in_children = False
+        self._post = None          # bytes of the post being read
+        self._skeleton = bytearray()
+
+    def _take(self, chunk, start, end):
+        # bytes between two structural points go to the post being read or the skeleton;
+        # commas and whitespace between posts are dropped
+        if self._post is not None:
+            self._post += chunk[start:end]
+        elif not self._in_children:
+            self._skeleton += chunk[start:end]
+
+    def _finish_post(self):
+        data = json.loads(self._post).get("data", {})
+        self._post = None
+        return {"data": {field: data[field] for field in self.fields if field in data}}
+
+    def feed(self, chunk):
+        # returns the posts completed by this chunk, as {"data": {field: value}} in listing order
+        posts = []
+        pos = start = 0
+        if self._escaped and chunk:
+            pos, self._escaped = 1, False
+        while True:
+            m = _SIGNIFICANT.search(chunk, pos)
+            if m is None:
+                break
+            i = m.start()
+            c = chunk[i]
+            pos = i + 1
+            if self._in_string:
+                if c == _BACKSLASH:
+                    if pos >= len(chunk):
+                        self._escaped = True
+                    pos += 1
+                elif c == _QUOTE:
+                    self._in_string = False
+                continue
+            if c == _QUOTE:
+                self._in_string = True
+            elif c in _OPEN:
+                if self._in_children and self._depth == 3:
+                    # a post starts
+                    self._take(chunk, start, i)
+                    self._post, start = bytearray(), i
+                elif c == _OPEN[1] and self._depth == 2 and self._post is None:
+                    self._take(chunk, start, i)
+                    start = i
+                    if self._skeleton.rstrip().endswith(b'"children":'):
+                        self._take(chunk, start, pos)
+                        start = pos
+                        self._in_children = True
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._in_children and self._depth == 3 and c == _CLOSE_OBJECT:
+                    self._take(chunk, start, pos)
+                    start = pos
+                    self.peak_buffered = max(self.peak_buffered, len(self._skeleton) + len(self._post))
+                    posts.append(self._finish_post())
+                elif self._in_children and self._depth == 2 and c == _CLOSE_ARRAY:
+                    self._take(chunk, start, i)
+                    start = i
+                    self._in_children = False
+        self._take(chunk, start, len(chunk))
+        self.peak_buffered = max(self.peak_buffered, len(self._skeleton) + len(self._post or b""))
+        return posts
+
+    def close(self):
+        # the listing without its posts, e.g. {"kind": "Listing", "data": {"after": ..., "children": []}}
+        return json.loads(self._skeleton)
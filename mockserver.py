@@ -0,0 +1,289 @@
+#local stand-in for Wikipedia and Reddit (offline benchmarks)
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+CATEGORIES = ["General_reference", "Culture_and_the_arts", "Geography_and_places", "Health_and_fitness",
+              "History_and_events", "Human_activities", "Mathematics_and_logic", "Natural_and_physical_sciences",
+              "People_and_self", "Philosophy_and_thinking", "Religion_and_belief_systems", "Society_and_social_sciences",
+              "Technology_and_applied_sciences"]
+WORDS = ("the of and to in is was for on as with by that from at his an are which were technology science "
+         "system method process energy tool early modern first used development research industry practical").split()
+WRITE_CHUNK = 16 * 1024
+API_MAX_TITLES = 50 # titles per action API request, like the real API for anonymous clients
+EXTRACTS_LIMIT = 20 # intros per request with prop=extracts&exintro (TextExtracts' exlimit maximum)
+LEAD_PARAGRAPHS = 3 # paragraphs before the first section, returned by exintro
+ARTICLE_LINKS = 8 # "See also" links per article, into a graph of `graph` articles
+# articles whose links are percent-encoded, as on the real site (/wiki/Newton%27s_laws_of_motion, ...)
+SPECIAL_TITLES = ["Newton's_laws_of_motion", "Café", "AT&T"]
+ESCAPED = re.compile(r"%[0-9A-Fa-f]{2}")
+
+def _sentence(rng, words):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+def article_title(index):
+    return f"Article_{index:05d}"
+
+def article_paragraphs(title, seed, paragraphs=40):
+    # (sentences, reference number) per paragraph of an article, the same for the page and the API
+    rng = random.Random(f"{seed}:{title.replace(' ', '_')}")
+    result = []
+    for _ in range(paragraphs):
+        sentences = " ".join(_sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(2, 6)))
+        result.append((sentences, rng.randint(1, 99)))
+    return result
+
+def article_links(title, seed, graph):
+    # link targets of an article: other articles (some with a section anchor) plus links that are not articles
+    rng = random.Random(f"{seed}:links:{title.replace(' ', '_')}")
+    links = [f"/wiki/{article_title(rng.randrange(graph))}" for _ in range(ARTICLE_LINKS)]
+    links[1] += "#History"
+    links.append(f"/wiki/{quote(rng.choice(SPECIAL_TITLES), safe='')}")
+    return links + ["/wiki/Category:Technology", f"/wiki/File:{title}.png", "#cite_note-1"]
+
+def render_article(title, seed, paragraphs=40, graph=100000):
+    # deterministic article body: a lead, some noise paragraphs wiki pages really have, a long tail, then "See also"
+    parts = ['<p class="mw-empty-elt"></p>', "<p>Coordinates: 51°30′N 0°7′W</p>"]
+    for sentences, ref in article_paragraphs(title, seed, paragraphs):
+        parts.append(f"<p><b>{title.replace('_', ' ')}</b> {sentences}<sup class=\"reference\">[{ref}]</sup></p>")
+    links = "".join(f'<li><a href="{href}">{href.rsplit("/", 1)[-1]}</a></li>' for href in article_links(title, seed, graph))
+    parts.append(f'<h2>See also</h2><ul>{links}</ul>')
+    return (f"<!DOCTYPE html><html><head><title>{title}</title></head><body>"
+            f"<h1>{title.replace('_', ' ')}</h1><div id=\"mw-content-text\"><div class=\"mw-parser-output\">"
+            + "\n".join(parts) + "</div></div></body></html>")
+
+def render_contents():
+    items = "".join(f"<h3>{name.replace('_', ' ')}</h3>" for name in CATEGORIES)
+    return f"<!DOCTYPE html><html><body><h2>Contents</h2>{items}</body></html>"
+
+def render_contents_page(name, articles):
+    links = "".join(f'<li><a href="/wiki/{article_title(i)}">{article_title(i)}</a></li>' for i in range(articles))
+    return (f"<!DOCTYPE html><html><body><h2>{name.replace('_', ' ')}</h2>"
+            f"<div class=\"contentsPage__intro\"><p>Overview of {name.replace('_', ' ')} articles.</p></div>"
+            f"<a href=\"/wiki/Help:Contents\">Help</a><ul>{links}</ul></body></html>")
+
+def article_revision(title, seed, revision=0):
+    # revision id of an article; changing the server's `revision` setting "edits" every article
+    digest = hashlib.md5(f"{seed}:{revision}:{title.replace(' ', '_')}".encode("utf-8")).hexdigest()
+    return int(digest[:7], 16)
+
+def article_extract(title, seed, paragraphs=40):
+    # plain-text lead section as TextExtracts returns it (explaintext, exintro): no markup or reference marks
+    name = title.replace("_", " ")
+    lead = article_paragraphs(title, seed, paragraphs)[:LEAD_PARAGRAPHS]
+    return "\n".join(["Coordinates: 51°30′N 0°7′W"] + [f"{name} {sentences}" for sentences, _ in lead])
+
+def render_api(query, config):
+    # minimal MediaWiki action API: action=query with prop=revisions and/or prop=extracts
+    # (exintro, explaintext, excontinue) for titles=A|B|..., in the formatversion=2 shape
+    if query.get("action", [""])[0] != "query":
+        return json.dumps({"error": {"code": "badvalue", "info": "only action=query is supported"}})
+    titles = [t for t in query.get("titles", [""])[0].split("|") if t][:API_MAX_TITLES]
+    props = query.get("prop", [""])[0].split("|")
+    normalized = []
+    pages = []
+    for title in titles:
+        if ESCAPED.search(title):
+            # MediaWiki takes titles as they are: a percent escape left in one is an invalid title
+            pages.append({"title": title, "invalidreason": "The requested page title contains invalid characters", "invalid": True})
+            continue
+        name = title.replace("_", " ")
+        if name != title:
+            normalized.append({"from": title, "to": name})
+        page = {"ns": 0, "title": name}
+        if "revisions" in props:
+            revid = article_revision(name, config["seed"], config["revision"])
+            page["revisions"] = [{"revid": revid, "parentid": revid - 1}]
+        pages.append(page)
+
+    result = {"batchcomplete": True, "query": {"normalized": normalized, "pages": pages}}
+    if "extracts" in props:
+        # only EXTRACTS_LIMIT pages get their extract per request; the client follows `continue`
+        offset = int(query.get("excontinue", ["0"])[0])
+        for page in [page for page in pages if not page.get("invalid")][offset:offset + EXTRACTS_LIMIT]:
+            page["extract"] = article_extract(page["title"], config["seed"], config["paragraphs"])
+        if offset + EXTRACTS_LIMIT < len(pages):
+            result["continue"] = {"excontinue": offset + EXTRACTS_LIMIT, "continue": "||"}
+            del result["batchcomplete"]
+    return json.dumps(result)
+
+def render_listing(subreddit, limit, after, total, seed, removed=0):
+    # `removed` posts of every page are left out, as reddit drops removed posts from a page without refilling it
+    start = int(after[3:]) if after and after.startswith("t3_") else 0
+    end = min(start + min(limit, 100), total)
+    children = []
+    for n in range(start + removed, end):
+        rng = random.Random(f"{seed}:{subreddit}:{n}")
+        selftext = " ".join(_sentence(rng, rng.randint(5, 15)) for _ in range(rng.randint(0, 8)))
+        post_id = f"{subreddit.lower()}{n}"
+        children.append({"kind": "t3", "data": {
+            "id": post_id, "name": f"t3_{n}", "subreddit": subreddit,
+            "title": _sentence(rng, rng.randint(4, 12)), "author": f"user_{rng.randint(1, 5000)}",
+            "ups": total - n + rng.randint(0, 50), "score": total - n, "num_comments": rng.randint(0, 900),
+            "permalink": f"/r/{subreddit}/comments/{post_id}/post_{n}/", "selftext": selftext,
+            "created_utc": 1700000000 - n * 3600}})
+    next_after = f"t3_{end}" if end < total else None
+    return json.dumps({"kind": "Listing", "data": {"after": next_after, "dist": len(children), "children": children}})
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive, like the real sites
+    disable_nagle_algorithm = True # headers and body are separate writes; Nagle + delayed ACK would add ~40 ms
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        config = self.server.config
+        delay, fail = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self._send(503, b"Service Unavailable", "text/plain", {"Retry-After": "1"})
+
+        url = urlparse(self.path)
+        path = unquote(url.path)
+        query = parse_qs(url.query)
+        self.server.count(path)
+
+        if path in config["redirects"]:
+            status, location = config["redirects"][path]
+            return self._send(status, b"", "text/plain", {"Location": location})
+
+        listing = re.match(r"^/r/([^/]+)/top\.json$", path)
+        if listing:
+            body = render_listing(listing.group(1), int(query.get("limit", ["25"])[0]), query.get("after", [None])[0],
+                                  config["posts_per_subreddit"], config["seed"], config["removed_per_page"])
+            return self._send(200, body.encode("utf-8"), "application/json; charset=UTF-8", compress=True)
+        if path == "/w/api.php":
+            return self._send(200, render_api(query, config).encode("utf-8"), "application/json; charset=utf-8")
+        if path == "/wiki/Wikipedia:Contents":
+            return self._send(200, render_contents().encode("utf-8"), "text/html; charset=UTF-8")
+        if path.startswith("/wiki/Wikipedia:Contents/"):
+            body = render_contents_page(path.rsplit("/", 1)[1], config["articles"])
+            return self._send(200, body.encode("utf-8"), "text/html; charset=UTF-8")
+        if path.startswith("/wiki/"):
+            body = render_article(path[len("/wiki/"):], config["seed"], config["paragraphs"], config["graph"])
+            return self._send(200, body.encode("utf-8"), "text/html; charset=UTF-8")
+        return self._send(404, b"Not Found", "text/plain")
+
+    def _send(self, status, body, content_type, extra_headers=None, compress=False):
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        # gzip/deflate when the client asks for it (and the server's `compression` setting is on)
+        accepted = self.headers.get("Accept-Encoding", "") if compress and self.server.config["compression"] else ""
+        encoding = "gzip" if "gzip" in accepted else "deflate" if "deflate" in accepted else None
+        if encoding:
+            body = gzip.compress(body, mtime=0) if encoding == "gzip" else zlib.compress(body)
+            extra_headers = {**(extra_headers or {}), "Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == 200:
+            self.send_header("ETag", etag)
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        # bandwidth cap: write in chunks and sleep for the time each chunk would take on the wire
+        bandwidth = self.server.config["bandwidth"]
+        try:
+            for i in range(0, len(body), WRITE_CHUNK):
+                chunk = body[i:i + WRITE_CHUNK]
+                self.wfile.write(chunk)
+                if bandwidth:
+                    time.sleep(len(chunk) / bandwidth)
+        except (BrokenPipeError, ConnectionResetError):
+            # client stopped reading early (streaming extractor)
+            self.close_connection = True
+
+class MockServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server that serves synthetic Wikipedia pages and Reddit top.json listings.
+    Per-request latency, jitter, bandwidth and error rate are drawn from one seeded RNG, so a
+    run is reproducible. Use as a context manager; `base_url` is the address to point the
+    scrapers at.
+    """
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, jitter=0.0, bandwidth=None, error_rate=0.0, seed=0,
+                 articles=500, paragraphs=40, posts_per_subreddit=1000, revision=0, graph=100000, compression=True,
+                 removed_per_page=0, redirects=None):
+        super().__init__(("127.0.0.1", port), MockHandler)
+        self.config = {"latency": latency, "jitter": jitter, "bandwidth": bandwidth, "error_rate": error_rate,
+                       "seed": seed, "articles": articles, "paragraphs": paragraphs,
+                       "posts_per_subreddit": posts_per_subreddit, "revision": revision, "graph": graph,
+                       "compression": compression, "removed_per_page": removed_per_page,
+                       "redirects": dict(redirects or {})} # request path -> (status, Location)
+        self.rng = random.Random(seed)
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # clients closing keep-alive or half-read connections is normal here
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def draw(self):
+        # latency (seconds) and whether this request fails, in request order
+        config = self.config
+        with self._lock:
+            delay = max(0.0, config["latency"] + self.rng.uniform(-config["jitter"], config["jitter"]))
+            fail = self.rng.random() < config["error_rate"]
+        return delay, fail
+
+    def count(self, path):
+        kind = "reddit" if path.startswith("/r/") else "wiki"
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic Wikipedia/Reddit pages locally.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--bandwidth", type=float, default=None, help="bytes per second per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = MockServer(args.port, args.latency, args.jitter, args.bandwidth, args.error_rate, args.seed)
+    print(f"Serving on {server.base_url} (WIKI_BASE_URL / REDDIT_BASE_URL)")
+    server.serve_forever()
@@ -0,0 +1,227 @@
+#staged fetch -> parse -> write pipeline: bounded queues between stages, per-stage metrics
+
+import functools
+import os
+import queue
+import threading
+import time
+import timeline
+import transport
+import workerpool
+
+FETCH_WORKERS = 16 # network threads
+PARSE_WORKERS = None # parse processes (None: one per CPU, 0: parse on the fetch stage's side, in threads)
+QUEUE_SIZE = 64 # items waiting in front of a stage before the stage before it blocks
+SAMPLE_INTERVAL = 0.01 # seconds between queue depth samples
+
+_STOP = object()
+_lock = threading.Lock()
+_last_stats = {}
+
+class Stage:
+    """
+    One step of a Pipeline: `workers` threads call func(item) on items from a bounded input
+    queue and pass the return value on (with fan_out, every item of the returned iterable).
+    A full queue downstream blocks the workers, so a slow stage holds back the ones before it
+    instead of letting work pile up in memory.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=QUEUE_SIZE, fan_out=False):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.fan_out = fan_out
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0 # waiting for room downstream (backpressure)
+        self.depth_samples = []
+
+class Pipeline:
+    """
+    Stages connected by bounded queues. run(items) feeds the first stage from the calling
+    thread and returns once the last stage has handled everything; stats() then gives each
+    stage's items, utilization (busy time / workers x wall time), time blocked on the next
+    stage and input queue depth, which points at the stage to scale. An exception in a stage
+    function is raised from run() after the pipeline has drained.
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.elapsed = 0.0
+        self._error = None
+        self._queues = [queue.Queue(stage.queue_size) for stage in stages]
+        self._running = [stage.workers for stage in stages]
+        self._running_lock = threading.Lock()
+
+    def _put(self, index, item):
+        if index < len(self._queues):
+            self._queues[index].put(item)
+
+    def _work(self, index):
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                break
+            start = time.perf_counter()
+            blocked = 0.0
+            try:
+                result = stage.func(item)
+                # a fan-out generator hands on each output as soon as it is produced
+                for output in (result if stage.fan_out else [result]):
+                    put_start = time.perf_counter()
+                    self._put(index + 1, output)
+                    blocked += time.perf_counter() - put_start
+            except Exception as e:
+                self._error = self._error or e
+            with self._running_lock:
+                stage.items += 1
+                stage.busy_seconds += time.perf_counter() - start - blocked
+                stage.blocked_seconds += blocked
+        with self._running_lock:
+            self._running[index] -= 1
+            last = self._running[index] == 0
+        if last and index + 1 < len(self.stages):
+            # the stage is drained: let the next one finish
+            for _ in range(self.stages[index + 1].workers):
+                self._put(index + 1, _STOP)
+
+    def _sample(self, stop):
+        while not stop.wait(SAMPLE_INTERVAL):
+            for stage, inbox in zip(self.stages, self._queues):
+                stage.depth_samples.append(inbox.qsize())
+
+    def run(self, items):
+        start = time.perf_counter()
+        threads = [threading.Thread(target=self._work, args=(i,), name=f"{stage.name}-{n}", daemon=True)
+                   for i, stage in enumerate(self.stages) for n in range(stage.workers)]
+        stop_sampling = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(stop_sampling,), name="pipeline-sampler", daemon=True)
+        for thread in threads:
+            thread.start()
+        sampler.start()
+        for item in items:
+            self._put(0, item)
+        for _ in range(self.stages[0].workers):
+            self._put(0, _STOP)
+        for thread in threads:
+            thread.join()
+        stop_sampling.set()
+        sampler.join()
+        self.elapsed = time.perf_counter() - start
+        if self._error is not None:
+            raise self._error
+
+    def stats(self):
+        wall = max(self.elapsed, 1e-9)
+        summary = {}
+        for stage in self.stages:
+            depths = stage.depth_samples or [0]
+            summary[stage.name] = {"workers": stage.workers, "items": stage.items,
+                                   "utilization": round(stage.busy_seconds / (stage.workers * wall), 3),
+                                   "blocked_s": round(stage.blocked_seconds, 3),
+                                   "queue_mean": round(sum(depths) / len(depths), 1), "queue_max": max(depths),
+                                   "queue_size": stage.queue_size}
+        return summary
+
+def first_part(parts):
+    return parts[0]
+
+class Staged:
+    """
+    A task split for the pipeline: fetch(*args) does the I/O and yields one or more raw parts,
+    parse(part) turns a part into its result on any process (module-level functions, so it
+    pickles), and combine(parsed parts, in order) gives the task's result. Called directly it
+    runs all three in the calling thread, so any other executor can run it as a plain task.
+    """
+
+    def __init__(self, fetch, parse, combine=first_part):
+        self.fetch = fetch
+        self.parse = parse
+        self.combine = combine
+
+    def __call__(self, *args):
+        return self.combine([self.parse(part) for part in self.fetch(*args)])
+
+def _whole(func, *args):
+    return [func(*args)]
+
+def _same(part):
+    return part
+
+def run_staged(task, arg_list, fetch_workers=None, parse_workers=None, queue_size=None, write=None):
+    """
+    Run a Staged task for every args tuple as a three-stage pipeline: fetch on threads, parse
+    in the worker pool (one part in flight per process), then one writer thread that calls
+    write(task_index, parsed_part) as parts arrive. Returns the combined results in input
+    order, like every executor; the stage metrics are kept for stats().
+    """
+    if not isinstance(task, Staged):
+        # a plain task is all fetch stage
+        task, parse_workers = Staged(functools.partial(_whole, task), _same), 0
+    fetch_workers = fetch_workers or FETCH_WORKERS
+    parse_workers = PARSE_WORKERS if parse_workers is None else parse_workers
+    queue_size = queue_size or QUEUE_SIZE
+    parts = [[] for _ in arg_list]
+
+    def fetch(job):
+        index, args = job
+        return ((index, seq, part) for seq, part in enumerate(task.fetch(*args)))
+
+    if parse_workers == 0:
+        parse_stage = Stage("parse", lambda job: (job[0], job[1], task.parse(job[2])), max(1, os.cpu_count() or 1), queue_size)
+    else:
+        processes = parse_workers or os.cpu_count() or 1
+        pool = workerpool.get_pool(processes)
+        parse_in_pool = lambda part: transport.unpack(pool.apply(transport.call_packed, (task.parse, (part,))))
+        parse_stage = Stage("parse", lambda job: (job[0], job[1], parse_in_pool(job[2])), processes, queue_size)
+
+    def store(job):
+        index, seq, parsed = job
+        parts[index].append((seq, parsed))
+        if write is not None:
+            with timeline.span("write"):
+                write(index, parsed)
+
+    pipeline = Pipeline([Stage("fetch", fetch, fetch_workers, queue_size, fan_out=True), parse_stage,
+                         Stage("write", store, 1, queue_size)])
+    try:
+        pipeline.run(enumerate(arg_list))
+    finally:
+        with _lock:
+            _last_stats.clear()
+            _last_stats.update(pipeline.stats())
+    return [task.combine([parsed for _, parsed in sorted(task_parts, key=lambda p: p[0])]) for task_parts in parts]
+
+class _Pooled:
+    # a Staged task whose parts are parsed in the worker pool, one part in flight per call
+    def __init__(self, task, processes):
+        self.task = task
+        self.pool = workerpool.get_pool(processes)
+
+    def __call__(self, *args):
+        return self.task.combine([transport.unpack(self.pool.apply(transport.call_packed, (self.task.parse, (part,))))
+                                  for part in self.task.fetch(*args)])
+
+def pooled(task, parse_workers=None):
+    """
+    One callable per task for executors.stream(): the calling thread fetches, the pool
+    parses (parse_workers as in run_staged) and the combined result is returned. Plain
+    functions are returned as they are.
+    """
+    parse_workers = PARSE_WORKERS if parse_workers is None else parse_workers
+    if not isinstance(task, Staged) or parse_workers == 0:
+        return task
+    return _Pooled(task, parse_workers or os.cpu_count() or 1)
+
+def stats():
+    # per-stage metrics of the last pipeline run
+    with _lock:
+        return {name: dict(values) for name, values in _last_stats.items()}
+
+def print_stats(summary):
+    for name, values in summary.items():
+        print(f"  {name:<8}{values['workers']:>4} workers  {values['items']:>6} items  utilization {values['utilization']:>6.1%}"
+              f"  blocked {values['blocked_s']:>7}s  queue mean {values['queue_mean']:>6} max {values['queue_max']:>4}/{values['queue_size']}")
@@ -0,0 +1,267 @@
+#request policy per source: timeouts, retries with jittered exponential backoff, hedged requests
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import requests
+import asynchttp
+import sessions
+import httpcache
+import throttle
+
+class RequestPolicy:
+    """
+    How requests to one source are made. `timeout` is passed to requests (connect, read).
+    Failed attempts (connection errors, timeouts, `retry_statuses`) are retried up to `retries`
+    times after a random sleep of up to backoff * 2**attempt seconds (capped at max_backoff),
+    or the server's Retry-After if that is longer. With `hedge` on (opt-in: a duplicate costs
+    the host a second request), once `hedge_min_samples` latencies are known a duplicate
+    request is sent when an attempt runs past the `hedge_percentile` latency; the first
+    response wins and the other is closed.
+    """
+
+    def __init__(self, timeout=(5, 30), retries=3, backoff=0.25, max_backoff=8.0, hedge=False,
+                 hedge_percentile=95, hedge_min_samples=20, retry_statuses=(429, 500, 502, 503, 504)):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.retry_statuses = retry_statuses
+        self._latencies = deque(maxlen=256)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def hedge_delay(self):
+        # seconds to wait before sending a duplicate, None while hedging is off or not warmed up
+        if not self.hedge:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))]
+
+    def backoff_delay(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        return max(delay, retry_after or 0)
+
+# wiki pages are cheap, cacheable reads, so their slow tail is hedged; reddit rate-limits
+# per client and a duplicate listing request eats into that budget, so it is not
+POLICIES = {
+    "wiki": RequestPolicy(hedge=True),
+    "reddit": RequestPolicy(timeout=(5, 15)),
+}
+DEFAULT_POLICY = RequestPolicy()
+
+_stats = {"requests": 0, "retries": 0, "timeouts": 0, "hedged": 0, "hedge_wins": 0}
+_stats_lock = threading.Lock()
+_hedge_pool = None
+_hedge_slots = None
+_hedge_pid = None
+_pool_lock = threading.Lock()
+
+def get_policy(source):
+    return POLICIES.get(source, DEFAULT_POLICY)
+
+def configure(source, **settings):
+    """Change settings of one source's policy, e.g. configure("reddit", retries=5, hedge=False)."""
+    policy = POLICIES.setdefault(source, RequestPolicy())
+    for name, value in settings.items():
+        if name.startswith("_") or not hasattr(policy, name):
+            raise ValueError(f"Unknown policy setting: {name}")
+        setattr(policy, name, value)
+    return policy
+
+def stats():
+    # counts for this process
+    with _stats_lock:
+        return dict(_stats)
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+def _pool():
+    """
+    The threads that carry hedged attempts, one per pooled connection (sessions.POOL_MAXSIZE),
+    and the semaphore of their free places: an attempt only goes to the pool when a thread is
+    free to start it at once. Rebuilt after a fork since threads do not survive it.
+    """
+    global _hedge_pool, _hedge_slots, _hedge_pid
+    with _pool_lock:
+        if _hedge_pool is None or _hedge_pid != os.getpid():
+            _hedge_pool = ThreadPoolExecutor(max_workers=sessions.POOL_MAXSIZE, thread_name_prefix="hedge")
+            _hedge_slots = threading.BoundedSemaphore(sessions.POOL_MAXSIZE)
+            _hedge_pid = os.getpid()
+        return _hedge_pool, _hedge_slots
+
+def _submit(pool, slots, *args):
+    # _send on a free hedge thread, or None when every thread is busy
+    if not slots.acquire(blocking=False):
+        return None
+    future = pool.submit(_send, *args)
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+def _close(future):
+    # the losing attempt of a hedge: release its connection
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+def _send(policy, send, url, html, session, kwargs):
+    # one timed attempt, on the caller's session or else the session of the thread it runs in
+    session = session or sessions.get_session(html=html)
+    start = time.perf_counter()
+    response = send(session, url, **kwargs)
+    if response.status_code < 400:
+        policy.record(time.perf_counter() - start)
+    return response
+
+def _attempt(policy, send, url, html, session, kwargs):
+    delay = policy.hedge_delay()
+    if delay is None:
+        return _send(policy, send, url, html, session, kwargs)
+
+    # the primary keeps the caller's session (its headers, cookies, worker pool); the duplicate
+    # uses the hedge thread's own, so the two never share one session at the same time.
+    # With the hedge threads all busy the attempt is made here, without a duplicate.
+    pool, slots = _pool()
+    primary = _submit(pool, slots, policy, send, url, html, session, kwargs)
+    if primary is None:
+        return _send(policy, send, url, html, session, kwargs)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    hedge = _submit(pool, slots, policy, send, url, html, None, kwargs)
+    if hedge is None:
+        return primary.result()
+    _count("hedged")
+    done, pending = wait([primary, hedge], return_when=FIRST_COMPLETED)
+    winner = done.pop()
+    if winner.exception() is not None and pending:
+        # the first one to finish failed; the other may still succeed
+        winner = pending.pop()
+        winner.exception()
+    for future in (primary, hedge):
+        if future is not winner:
+            future.cancel()
+            future.add_done_callback(_close)
+    if winner is hedge:
+        _count("hedge_wins")
+    return winner.result()
+
+def get(source, url, html=False, session=None, send=httpcache.get, **kwargs):
+    """
+    GET `url` under the policy of `source` ("wiki", "reddit", ...). `send(session, url, **kwargs)`
+    performs one attempt: httpcache.get by default, throttle.request for streamed bodies that
+    bypass the cache. Returns the final response (callers still call raise_for_status) or raises
+    the last connection error once the retries are used up.
+    """
+    policy = get_policy(source)
+    kwargs.setdefault("timeout", policy.timeout)
+    _count("requests")
+    for attempt in range(policy.retries + 1):
+        last = attempt == policy.retries
+        try:
+            response = _attempt(policy, send, url, html, session, kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if isinstance(e, requests.Timeout):
+                _count("timeouts")
+            if last:
+                raise
+            _count("retries")
+            time.sleep(policy.backoff_delay(attempt))
+            continue
+
+        if response.status_code not in policy.retry_statuses or last:
+            return response
+        retry_after = throttle.parse_retry_after(response.headers.get("Retry-After"))
+        response.close()
+        _count("retries")
+        time.sleep(policy.backoff_delay(attempt, retry_after))
+
+async def _send_async(policy, send, url, client, kwargs):
+    start = time.perf_counter()
+    response = await send(client, url, **kwargs)
+    if response.status_code < 400:
+        policy.record(time.perf_counter() - start)
+    return response
+
+def _close_task(task):
+    if not task.cancelled() and task.exception() is None:
+        task.result().close()
+
+async def _attempt_async(policy, send, url, client, kwargs):
+    # _attempt with both tries as tasks on the loop; the loser is cancelled, which drops its connection
+    delay = policy.hedge_delay()
+    if delay is None:
+        return await _send_async(policy, send, url, client, kwargs)
+
+    tasks = [asyncio.ensure_future(_send_async(policy, send, url, client, kwargs))]
+    winner = None
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            _count("hedged")
+            tasks.append(asyncio.ensure_future(_send_async(policy, send, url, client, kwargs)))
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() is not None and pending:
+            # the first one to finish failed; the other may still succeed
+            winner = pending.pop()
+            await asyncio.wait([winner])
+    finally:
+        # also when this coroutine is cancelled itself: no attempt is left running
+        for task in tasks:
+            if task is not winner:
+                task.cancel()
+                task.add_done_callback(_close_task)
+    if winner is not tasks[0]:
+        _count("hedge_wins")
+    return winner.result()
+
+async def get_async(source, url, client=None, send=httpcache.get_async, **kwargs):
+    """
+    get() for coroutines: the same policy, with the requests made on the running event loop by
+    its asynchttp client (or `client`). `send(client, url, **kwargs)` is a coroutine function:
+    httpcache.get_async by default, throttle.request_async for streamed bodies.
+    """
+    policy = get_policy(source)
+    client = client or asynchttp.get_client()
+    kwargs.setdefault("timeout", policy.timeout)
+    _count("requests")
+    for attempt in range(policy.retries + 1):
+        last = attempt == policy.retries
+        try:
+            response = await _attempt_async(policy, send, url, client, kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if isinstance(e, requests.Timeout):
+                _count("timeouts")
+            if last:
+                raise
+            _count("retries")
+            await asyncio.sleep(policy.backoff_delay(attempt))
+            continue
+
+        if response.status_code not in policy.retry_statuses or last:
+            return response
+        retry_after = throttle.parse_retry_after(response.headers.get("Retry-After"))
+        response.close()
+        _count("retries")
+        await asyncio.sleep(policy.backoff_delay(attempt, retry_after))
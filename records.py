@@ -0,0 +1,126 @@
+#compact storage for scraped reddit records: posts in columns, formatted only when displayed
+
+import pickle
+import threading
+import time
+import tracemalloc
+from array import array
+
+class RecordBatch:
+    """
+    A sequence of redditcore records that appends like a list and iterates the records back
+    in order. Posts are stored column by column, with index, upvotes and comments in int32
+    arrays and the strings in one list per field, rather than one tuple per post. The few
+    other records (header, error, skipped) are kept as they are, with their position.
+    Appends take a lock, so threads of a shared-memory run can fill one batch. A batch
+    pickles as its columns (the ints as one array, the strings one by one), which is how
+    worker results cross process boundaries.
+    """
+
+    def __init__(self, records=()):
+        self._ints = array("i") # index, upvotes, comments of every post, flattened
+        self._titles = []
+        self._authors = []
+        self._permalinks = []
+        self._texts = []
+        self._others = [] # (position, record) of the records that are not posts
+        self._len = 0
+        self._lock = threading.Lock()
+        self.extend(records)
+
+    def append(self, record):
+        with self._lock:
+            if record[0] == "post":
+                _, i, title, author, upvotes, comments, permalink, text = record
+                self._ints.extend((i, upvotes, comments))
+                self._titles.append(title)
+                self._authors.append(author)
+                self._permalinks.append(permalink)
+                self._texts.append(text)
+            else:
+                self._others.append((self._len, record))
+            self._len += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        # records appended while iterating are not seen
+        with self._lock:
+            length, others = self._len, list(self._others)
+        post = 0
+        other = 0
+        ints = self._ints
+        for position in range(length):
+            if other < len(others) and others[other][0] == position:
+                yield others[other][1]
+                other += 1
+                continue
+            yield ("post", ints[3 * post], self._titles[post], self._authors[post], ints[3 * post + 1],
+                   ints[3 * post + 2], self._permalinks[post], self._texts[post])
+            post += 1
+
+    def posts(self):
+        return len(self._titles)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+def sample_posts(n):
+    # n post records shaped like reddit's (for the size report below); every string is its own
+    # object, as when decoded from a listing, since pickle sends a string shared by all posts once
+    return [("post", i, f"Post number {i} about scraping data with Python", f"user_{i % 5000}", 1000 + i, i % 700,
+             f"/r/Python/comments/{i:x}/post_number_{i}_about_scraping/", f"Self text of post {i}. " * 6) for i in range(1, n + 1)]
+
+def measure(n=100000):
+    """
+    Memory held by n posts as eager lines (the two formatted display strings per post that
+    results used to keep), as record tuples and as a RecordBatch, and how large their pickles
+    are and how long pickling and unpickling each takes. Memory is traced allocation, in bytes
+    per post; the strings shared by every representation are created before tracing starts.
+    """
+    import redditcore
+    posts = sample_posts(n)
+    report = {}
+
+    def traced(build):
+        tracemalloc.start()
+        try:
+            value = build()
+            return value, tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+
+    builds = {
+        "lines": lambda: [line for post in posts for line in redditcore.format_record(post)],
+        "tuples": lambda: [("post", *post[1:]) for post in posts],
+        "batch": lambda: RecordBatch(posts),
+    }
+    for name, build in builds.items():
+        value, traced_bytes = traced(build)
+        start = time.perf_counter()
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        dumped = time.perf_counter()
+        pickle.loads(payload)
+        loaded = time.perf_counter()
+        report[name] = {"bytes_per_post": round(traced_bytes / n, 1), "pickle_bytes_per_post": round(len(payload) / n, 1),
+                        "dumps_ms": round((dumped - start) * 1000, 1), "loads_ms": round((loaded - dumped) * 1000, 1)}
+        del value, payload
+    return report
+
+if __name__ == "__main__":
+    n = 100000
+    print(f"{n} posts:")
+    print(f"{'':<8}{'Bytes/post':>12}{'Pickled/post':>14}{'dumps (ms)':>12}{'loads (ms)':>12}")
+    for name, row in measure(n).items():
+        print(f"{name:<8}{row['bytes_per_post']:>12}{row['pickle_bytes_per_post']:>14}{row['dumps_ms']:>12}{row['loads_ms']:>12}")
@@ -0,0 +1,317 @@
+#reddit scraping core (fetch, parse, write) shared by every method
+
+import requests
+import redditfeed
+import records
+import executors
+import pipeline
+import json
+import os
+import re
+import time
+import timeline
+import sink
+import store
+
+# one consolidated output per run: {prefix}_top_posts.csv (or .jsonl)
+FIELDS = ["Subreddit", "Index", "Title", "Author", "Upvotes", "Comments", "URL", "Post Text"]
+
+REDDIT_URL = "https://www.reddit.com" # records keep the permalink; the full URL is built on output
+
+# the listing cursor and post count, read from a raw page without decoding the posts (quotes inside post text are escaped)
+AFTER_PATTERN = re.compile(rb'(?<!\\)"after":\s*(?:null|"([^"]*)")')
+DIST_PATTERN = re.compile(rb'(?<!\\)"dist":\s*(\d+)')
+
+def csv_prefix(method):
+    return sink.file_prefix(method)
+
+def unchanged(post_data, seen):
+    # incremental runs: the post's upvotes are what an earlier run stored
+    return seen is not None and seen.get(post_data.get('id') or store.post_id(post_data['permalink'])) == str(post_data['ups'])
+
+def post_record(i, post_data):
+    title = post_data['title']
+    author = post_data['author']
+    upvotes = post_data['ups']
+    comments = post_data['num_comments']
+    permalink = post_data['permalink']
+    text = post_data.get('selftext', '')
+
+    # If text long shorten it
+    short_text = (text[:200] + "...") if len(text) > 200 else text
+
+    # If no text must be link or media
+    if text == "":
+        short_text = "[No text content]"
+
+    return ("post", i, title, author, upvotes, comments, permalink, short_text)
+
+class SubredditScrape:
+    # the records of one scrape_subreddit run, built post by post as the listing is read
+    def __init__(self, subreddit, limit, seen):
+        self.subreddit = subreddit
+        self.limit = limit
+        self.seen = seen
+        self.count = 0
+        self.skipped = 0
+
+    def header(self):
+        return ("header", self.subreddit, self.limit, os.getpid())
+
+    def post(self, post):
+        # the next post's record, or None when it is unchanged since the last run
+        self.count += 1
+        if unchanged(post['data'], self.seen):
+            self.skipped += 1
+            return None
+        return post_record(self.count, post['data'])
+
+    def footer(self):
+        return [("skipped", self.subreddit, self.skipped)] if self.seen is not None else []
+
+def scrape_subreddit(subreddit, limit=10, seen=None):
+    """
+    Fetch and parse one subreddit, yielding compact records as it goes:
+    ("header", subreddit, limit, pid), ("post", index, title, author, upvotes, comments, permalink, text)
+    and ("error", message). Turn them into display lines with format_record and into output
+    rows with post_row. With `seen` (post id -> upvotes as stored by store.CrawlState), posts
+    whose upvotes are unchanged are not processed, and a final ("skipped", subreddit, count)
+    record says how many.
+    """
+    scrape = SubredditScrape(subreddit, limit, seen)
+    try:
+        yield scrape.header()
+
+        # Stream posts page by page (follows the `after` cursor past 100 posts)
+        for post in redditfeed.iter_top_posts(subreddit, limit):
+            record = scrape.post(post)
+            if record is not None:
+                yield record
+
+        yield from scrape.footer()
+
+    except Exception as e:
+        yield error_record(e)
+
+def error_record(e):
+    # the ("error", message) record of a failed scrape
+    if isinstance(e, requests.exceptions.RequestException):
+        message = f"Error accessing URL: {e}"
+    elif isinstance(e, json.JSONDecodeError):
+        message = f"Error decoding JSON: {e}"
+    else:
+        message = f"Unexpected error: {e}"
+    print(message)
+    return ("error", message)
+
+async def scrape_subreddit_async(subreddit, limit=10, seen=None):
+    # scrape_subreddit as an async generator, for tasks on the event loop
+    scrape = SubredditScrape(subreddit, limit, seen)
+    try:
+        yield scrape.header()
+        async for post in redditfeed.iter_top_posts_async(subreddit, limit):
+            record = scrape.post(post)
+            if record is not None:
+                yield record
+        for record in scrape.footer():
+            yield record
+    except Exception as e:
+        yield error_record(e)
+
+def fetch_listing_parts(subreddit, limit, seen=None):
+    """
+    Pipeline fetch stage of one subreddit: a header part, then one ("page", ...) part per raw
+    listing page, following the cursor without decoding the posts (parse_listing_part does
+    that in a pool worker). Pages may hold fewer posts than asked for (reddit leaves removed
+    posts out), so numbering and the limit go by the listing's post count, as in
+    redditfeed.iter_top_posts.
+    """
+    yield ("header", subreddit, limit, os.getpid())
+    first, after = 1, None
+    try:
+        while first <= limit:
+            count = min(redditfeed.PAGE_SIZE, limit - first + 1)
+            body = redditfeed.fetch_listing_body(subreddit, count, after)
+            match = DIST_PATTERN.search(body)
+            returned = min(count, int(match.group(1)) if match else len(json.loads(body)['data']['children']))
+            yield ("page", subreddit, first, count, body, seen)
+            match = AFTER_PATTERN.search(body)
+            if not returned or not match or not match.group(1):
+                break
+            after = match.group(1).decode("utf-8")
+            first += returned
+    except requests.exceptions.RequestException as e:
+        error1 = f"Error accessing URL: {e}"
+        print(error1)
+        yield ("error", error1)
+    except Exception as e:
+        error3 = f"Unexpected error: {e}"
+        print(error3)
+        yield ("error", error3)
+
+def parse_listing_part(part):
+    # pipeline parse stage (runs in a pool worker): the records of one part
+    if part[0] != "page":
+        return [part]
+    _, subreddit, first, count, body, seen = part
+    start = time.perf_counter()
+    try:
+        posts = json.loads(body)['data']['children'][:count]
+        batch = records.RecordBatch(post_record(i, post['data']) for i, post in enumerate(posts, start=first) if not unchanged(post['data'], seen))
+    except json.JSONDecodeError as e:
+        return [("error", f"Error decoding JSON: {e}")]
+    except Exception as e:
+        return [("error", f"Unexpected error: {e}")]
+    if seen is not None:
+        batch.append(("skipped", subreddit, len(posts) - len(batch)))
+    timeline.record("parse", start, task=subreddit)
+    return batch
+
+def combine_listing(parts):
+    # one subreddit's records in order, with a single ("skipped", ...) total at the end
+    batch, skipped = records.RecordBatch(), None
+    for part in parts:
+        for record in part:
+            if record[0] == "skipped":
+                skipped = (record[0], record[1], (skipped[2] if skipped else 0) + record[2])
+            else:
+                batch.append(record)
+    if skipped:
+        batch.append(skipped)
+    return batch
+
+# the pipeline method's unit of work (other methods run it as one task)
+SUBREDDIT_TASK = pipeline.Staged(fetch_listing_parts, parse_listing_part, combine_listing)
+
+def format_record(record):
+    # display lines for one record (a post is followed by an empty line); only called to show results
+    kind = record[0]
+    if kind == "header":
+        _, subreddit, limit, pid = record
+        return [f"\nTop {limit} posts from r/{subreddit} (PID {pid}):\n"]
+    if kind == "post":
+        _, i, title, author, upvotes, comments, permalink, short_text = record
+        link = REDDIT_URL + permalink
+        formatted_posts = (f"Post {i}:\n" f"    Title: {title}\n"f"    Author: {author}\n"f"    Upvotes: {upvotes}\n"f"    Comments: {comments}\n" f"    URL: {link}\n" f"    Text: {short_text}\n")
+        return [formatted_posts, ""]
+    if kind == "skipped":
+        _, subreddit, count = record
+        return [f"Skipped {count} unchanged posts from r/{subreddit}\n"]
+    return [record[1]]
+
+def post_row(subreddit, record):
+    # output row (FIELDS order) for a ("post", ...) record
+    _, i, title, author, upvotes, comments, permalink, short_text = record
+    return (subreddit, i, title, author, upvotes, comments, REDDIT_URL + permalink, short_text)
+
+def deliver(subreddit, record, results, out=None, crawled=None):
+    # one record to the run's writer, the results and (incremental runs) the crawl bookkeeping
+    if out is not None and record[0] == "post":
+        with timeline.span("write"):
+            out.put(post_row(subreddit, record))
+    if crawled is not None and record[0] in ("post", "skipped"):
+        crawled.append((subreddit, record))
+    results.append(record)
+
+def child_fetch_top_posts(subreddit, results, limit=10, out=None, seen=None, crawled=None):
+    # shared-memory task: records go to `results`, rows to the run's writer (if any)
+    for record in scrape_subreddit(subreddit, limit, seen):
+        deliver(subreddit, record, results, out, crawled)
+
+def fetch_subreddit(subreddit, limit, seen=None):
+    # worker task: the whole subreddit goes back as one batch of compact records
+    return records.RecordBatch(scrape_subreddit(subreddit, limit, seen))
+
+# the event-loop versions of the two tasks (asyncengine.coroutine_function)
+async def child_fetch_top_posts_async(subreddit, results, limit=10, out=None, seen=None, crawled=None):
+    async for record in scrape_subreddit_async(subreddit, limit, seen):
+        deliver(subreddit, record, results, out, crawled)
+
+async def fetch_subreddit_async(subreddit, limit, seen=None):
+    return records.RecordBatch([record async for record in scrape_subreddit_async(subreddit, limit, seen)])
+
+child_fetch_top_posts.aio = child_fetch_top_posts_async
+fetch_subreddit.aio = fetch_subreddit_async
+
+def record_crawl(state, crawled):
+    # remember the upvotes of every post delivered, count the skipped ones
+    versions = {}
+    for subreddit, record in crawled:
+        if record[0] == "skipped":
+            state.skipped["reddit"] += record[2]
+        else:
+            state.fetched["reddit"] += 1
+            versions.setdefault(subreddit, {})[store.post_id(record[6])] = record[4]
+    for subreddit, posts in versions.items():
+        state.update("reddit", subreddit, posts)
+
+def run_reddit(method, subreddits, limit, results=None, output=None, incremental=None, **options):
+    """
+    Scrape the top `limit` posts of every subreddit with the given executor method and return
+    (elapsed seconds, records). Every method does the same work on the same inputs; only the
+    concurrency model changes. Pass `results` (any object with append) to receive records as they
+    are produced; methods that run outside this process deliver them when their task finishes.
+    Records become text only when shown (format_record) or written (post_row).
+    All posts are written by one background writer to `output` (default {prefix}_top_posts.csv;
+    a .jsonl path writes JSON Lines, a .db path upserts into the SQLite store).
+    Pass a store.CrawlState as `incremental` to skip posts whose upvotes have not changed since
+    it last saw them; the listing pages themselves are still read.
+    """
+    output = output or f"{csv_prefix(method)}_top_posts.csv"
+    results = records.RecordBatch() if results is None else results
+    seen = {subreddit: incremental.versions("reddit", subreddit) for subreddit in subreddits} if incremental is not None else {}
+    crawled = [] if incremental is not None else None
+
+    startTime = time.perf_counter()
+    with sink.ResultSink(output, FIELDS, table="posts", method=method) as out:
+        if executors.staged(method):
+            # the pipeline's writer stage writes rows page by page; lines and bookkeeping follow in order
+            def write(i, batch):
+                for record in batch:
+                    if record[0] == "post":
+                        out.put(post_row(subreddits[i], record))
+            batches = executors.run(method, SUBREDDIT_TASK, [(subreddit, limit, seen.get(subreddit)) for subreddit in subreddits], write=write, **options)
+            for subreddit, batch in zip(subreddits, batches):
+                for record in batch:
+                    deliver(subreddit, record, results, None, crawled)
+        elif executors.shares_memory(method):
+            executors.run(method, child_fetch_top_posts, [(subreddit, results, limit, out, seen.get(subreddit), crawled) for subreddit in subreddits], **options)
+        else:
+            for subreddit, batch in zip(subreddits, executors.run(method, fetch_subreddit, [(subreddit, limit, seen.get(subreddit)) for subreddit in subreddits], **options)):
+                for record in batch:
+                    deliver(subreddit, record, results, out, crawled)
+    if incremental is not None:
+        record_crawl(incremental, crawled)
+    endTime = time.perf_counter()
+    elapsed = round(endTime-startTime, 3)
+
+    return elapsed, results
+
+def stream_reddit(method, subreddits, limit, output=None, incremental=None, max_in_flight=None, buffer_size=None, **options):
+    """
+    run_reddit for runs too large to keep: yields (subreddit, record) as each subreddit
+    finishes, in the order they finish, and keeps nothing once a subreddit has been handed
+    over. At most max_in_flight subreddits are scraped at once and buffer_size finished ones
+    wait for the consumer (executors.stream); `subreddits` may be a generator. Rows go to
+    `output` as in run_reddit. With `incremental`, each subreddit's crawl state is updated
+    when it has been written.
+    """
+    output = output or f"{csv_prefix(method)}_top_posts.csv"
+    task = SUBREDDIT_TASK if executors.staged(method) else fetch_subreddit
+    pending = {}
+
+    def arg_iter():
+        for i, subreddit in enumerate(subreddits):
+            pending[i] = subreddit
+            yield (subreddit, limit, incremental.versions("reddit", subreddit) if incremental is not None else None)
+
+    with sink.ResultSink(output, FIELDS, table="posts", method=method) as out:
+        for i, batch in executors.stream(method, task, arg_iter(), max_in_flight, buffer_size, **options):
+            subreddit = pending.pop(i)
+            for record in batch:
+                if record[0] == "post":
+                    with timeline.span("write"):
+                        out.put(post_row(subreddit, record))
+                yield subreddit, record
+            if incremental is not None:
+                record_crawl(incremental, [(subreddit, record) for record in batch if record[0] in ("post", "skipped")])
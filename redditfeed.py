@@ -0,0 +1,196 @@
+#paginated reddit listings
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+import httpcache
+import policy
+import time
+import timeline
+import workerpool
+from listingstream import ListingDecoder
+
+PAGE_SIZE = 100 # reddit returns at most 100 posts per listing request
+# where listings are fetched from; REDDIT_BASE_URL points the scrapers at a local stand-in (benchmark.py)
+REDDIT_BASE_URL = os.environ.get("REDDIT_BASE_URL", "https://www.reddit.com")
+STREAM_LISTINGS = True # decode listings as they arrive and keep only the fields the scrapers use
+STREAM_CHUNK_SIZE = 16 * 1024
+workerpool.share_settings(__name__, "REDDIT_BASE_URL", "STREAM_LISTINGS") # set at run time by the benchmarks
+
+_lock = threading.Lock()
+_stats = {"pages": 0, "wire_bytes": 0, "body_bytes": 0, "peak_buffered": 0}
+
+def _count(wire_bytes, body_bytes, peak_buffered):
+    with _lock:
+        _stats["pages"] += 1
+        _stats["wire_bytes"] += wire_bytes
+        _stats["body_bytes"] += body_bytes
+        _stats["peak_buffered"] = max(_stats["peak_buffered"], peak_buffered)
+
+def stats():
+    """
+    Listing pages read in this process: bytes on the wire (compressed) and after decoding, and
+    the most listing bytes one page held in memory at once (the whole body unless streamed).
+    """
+    with _lock:
+        summary = dict(_stats)
+    summary["compression_ratio"] = round(summary["body_bytes"] / summary["wire_bytes"], 2) if summary["wire_bytes"] else None
+    return summary
+
+def reset_stats():
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0
+
+def listing_url(subreddit, limit, after=None):
+    json_url = f"{REDDIT_BASE_URL}/r/{subreddit}/top.json?limit={limit}&t=all"
+    if after:
+        json_url += f"&after={after}"
+    return json_url
+
+def listing_body(subreddit, response, start):
+    # the (decompressed) body of a buffered listing response whose request began at `start`
+    response.raise_for_status()
+    timeline.record("fetch", start, task=subreddit, bytes=len(response.content))
+    wire_bytes = int(response.headers.get("Content-Length") or len(response.content))
+    _count(wire_bytes, len(response.content), len(response.content))
+    return response.content
+
+def parse_listing(subreddit, body):
+    # the posts and the next-page cursor of a buffered listing body
+    fetched = time.perf_counter()
+    data = json.loads(body)
+    timeline.record("parse", fetched, task=subreddit)
+    return data['data']['children'], data['data'].get('after')
+
+class StreamedListing:
+    """
+    A listing page decoded chunk by chunk as it arrives, each post keeping only
+    listingstream.POST_FIELDS, with download and parse time on the timeline. feed() every
+    chunk, then finish() with the bytes read from the socket for (posts, cursor). Used by the
+    blocking and the async streaming paths.
+    """
+
+    def __init__(self, subreddit, start):
+        self.subreddit = subreddit
+        self.posts = []
+        self._decoder = ListingDecoder()
+        self._body_bytes = 0
+        self._read_start = start
+
+    def feed(self, chunk):
+        self._body_bytes += len(chunk)
+        parse_start = time.perf_counter()
+        self.posts.extend(self._decoder.feed(chunk))
+        read_end = time.perf_counter()
+        timeline.record("fetch", self._read_start, parse_start, task=self.subreddit, bytes=len(chunk))
+        timeline.record("parse", parse_start, read_end, task=self.subreddit)
+        self._read_start = read_end
+
+    def finish(self, wire_bytes):
+        _count(wire_bytes, self._body_bytes, self._decoder.peak_buffered)
+        return self.posts, self._decoder.close()['data'].get('after')
+
+def fetch_listing_body(subreddit, limit, after=None):
+    # raw (decompressed) body of one top.json page
+    start = time.perf_counter()
+    # runs on the prefetch thread, so listing_body names the task explicitly
+    return listing_body(subreddit, policy.get("reddit", listing_url(subreddit, limit, after)), start)
+
+def fetch_listing_page_streaming(subreddit, limit, after=None):
+    """
+    Same result as the buffered path, but the (gzip/deflate) response is decoded chunk by
+    chunk as it arrives (StreamedListing). Goes through the response cache like the buffered
+    path (httpcache.get_stream): a stored page is revalidated with its ETag / Last-Modified and
+    read from the cache on 304.
+    """
+    start = time.perf_counter()
+    with policy.get("reddit", listing_url(subreddit, limit, after), send=httpcache.get_stream, stream=True) as response:
+        response.raise_for_status()
+        listing = StreamedListing(subreddit, start)
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            listing.feed(chunk)
+        # bytes read from the socket, before decompression (none when the cache served the page)
+        wire_bytes = 0 if getattr(response, "from_cache", False) else response.raw.tell()
+    return listing.finish(wire_bytes)
+
+def fetch_listing_page(subreddit, limit, after=None):
+    # one top.json page; returns the posts and the cursor for the next page (None at the end)
+    if STREAM_LISTINGS:
+        return fetch_listing_page_streaming(subreddit, limit, after)
+    return parse_listing(subreddit, fetch_listing_body(subreddit, limit, after))
+
+class Pages:
+    # the budget and cursor of a walk through a subreddit's listing pages
+    def __init__(self, subreddit, limit, page_size):
+        self.subreddit = subreddit
+        self.page_size = page_size
+        self.remaining = limit
+        self.next = (subreddit, min(page_size, limit)) # fetch_listing_page arguments, None when done
+
+    def take(self, posts, after):
+        # the posts of a fetched page that are wanted; sets up the next page
+        posts = posts[:self.remaining]
+        self.remaining -= len(posts)
+        self.next = None
+        if after and self.remaining > 0 and posts:
+            self.next = (self.subreddit, min(self.page_size, self.remaining), after)
+        return posts
+
+def iter_top_posts(subreddit, limit, page_size=PAGE_SIZE):
+    """
+    Yield up to `limit` top posts from r/<subreddit>, following the `after` cursor past the
+    100-post cap. While the caller works through one page the next one is already being fetched
+    on a helper thread, so at most two pages are held in memory at any time.
+    Request and JSON errors are raised from the generator.
+    """
+    pages = Pages(subreddit, limit, page_size)
+    prefetch = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"prefetch-{subreddit}")
+    try:
+        pending = prefetch.submit(fetch_listing_page, *pages.next)
+        while pending is not None:
+            posts = pages.take(*pending.result())
+            # start on the next page before handing this one out
+            pending = prefetch.submit(fetch_listing_page, *pages.next) if pages.next else None
+            yield from posts
+    finally:
+        prefetch.shutdown(wait=False, cancel_futures=True)
+
+# the same, as coroutines for the event-loop methods (requests go through the loop's asynchttp client)
+
+async def fetch_listing_body_async(subreddit, limit, after=None):
+    start = time.perf_counter()
+    return listing_body(subreddit, await policy.get_async("reddit", listing_url(subreddit, limit, after)), start)
+
+async def fetch_listing_page_streaming_async(subreddit, limit, after=None):
+    start = time.perf_counter()
+    response = await policy.get_async("reddit", listing_url(subreddit, limit, after), send=httpcache.get_stream_async, stream=True)
+    try:
+        response.raise_for_status()
+        listing = StreamedListing(subreddit, start)
+        async for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            listing.feed(chunk)
+    finally:
+        response.close()
+    return listing.finish(getattr(response, "wire_bytes", 0))
+
+async def fetch_listing_page_async(subreddit, limit, after=None):
+    if STREAM_LISTINGS:
+        return await fetch_listing_page_streaming_async(subreddit, limit, after)
+    return parse_listing(subreddit, await fetch_listing_body_async(subreddit, limit, after))
+
+async def iter_top_posts_async(subreddit, limit, page_size=PAGE_SIZE):
+    # iter_top_posts as an async generator; the next page is prefetched by a task on the loop
+    pages = Pages(subreddit, limit, page_size)
+    pending = asyncio.ensure_future(fetch_listing_page_async(*pages.next))
+    try:
+        while pending is not None:
+            posts = pages.take(*await pending)
+            pending = asyncio.ensure_future(fetch_listing_page_async(*pages.next)) if pages.next else None
+            for post in posts:
+                yield post
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -0,0 +1,102 @@
+#shared http sessions
+
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+import timeline
+
+USER_AGENT = 'Mozilla/5.0 (compatible; Python WebScraper 1.0)'
+ACCEPT_ENCODING = "gzip, deflate" # compressed transfer; responses are decompressed as they are read
+
+POOL_CONNECTIONS = 10 # number of hosts kept in the connection pool
+POOL_MAXSIZE = 20     # keep-alive connections kept (and allowed at once) per host
+POOL_BLOCK = True     # wait for a free connection instead of going over POOL_MAXSIZE per host
+
+_local = threading.local()
+_lock = threading.Lock()
+_adapter = None
+_adapter_pid = None
+
+def configure(pool_connections=None, pool_maxsize=None, pool_block=None):
+    """
+    Change the pool settings. Sessions created after this call use a fresh pool with the new
+    limits; call it before starting a run.
+    """
+    global POOL_CONNECTIONS, POOL_MAXSIZE, POOL_BLOCK, _adapter
+    with _lock:
+        if pool_connections is not None:
+            POOL_CONNECTIONS = pool_connections
+        if pool_maxsize is not None:
+            POOL_MAXSIZE = pool_maxsize
+        if pool_block is not None:
+            POOL_BLOCK = pool_block
+        _adapter = None
+    _local.__dict__.clear()
+
+# connections that report DNS + connect (+ TLS handshake) time to the timeline
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        timeline.record("connect", start, host=self.host)
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        timeline.record("connect", start, host=self.host)
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+def _shared_adapter():
+    # one connection pool per process, shared by every thread's session;
+    # rebuilt after a fork so a child never reuses sockets opened by its parent
+    global _adapter, _adapter_pid
+    pid = os.getpid()
+    with _lock:
+        if _adapter is None or _adapter_pid != pid:
+            _adapter = TimedHTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK)
+            _adapter_pid = pid
+        return _adapter
+
+def _new_session(html):
+    if html:
+        from requests_html import HTMLSession
+        session = HTMLSession()
+    else:
+        session = requests.Session()
+        session.headers["User-Agent"] = USER_AGENT
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    adapter = _shared_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session(html=False):
+    """
+    Return the session owned by the calling thread in this process. Sessions keep their own
+    cookies and headers but share one keep-alive connection pool, capped per host.
+    Use html=True for an HTMLSession (responses with .html) for the Wikipedia scrapers.
+    """
+    if getattr(_local, "pid", None) != os.getpid():
+        _local.__dict__.clear()
+        _local.pid = os.getpid()
+    key = "html" if html else "plain"
+    session = getattr(_local, key, None)
+    if session is None:
+        session = _new_session(html)
+        setattr(_local, key, session)
+    return session
@@ -0,0 +1,133 @@
+#single background writer per run: every worker's rows end up in one CSV, JSON Lines or SQLite file
+
+import csv
+import json
+import os
+import queue
+import threading
+import time
+import store
+
+# output file prefix per method, e.g. threading_top_posts.csv
+PREFIXES = {"Baseline": "baseline", "MultiThreading": "threading", "Forking": "forking", "AsyncIO": "asyncio",
+            "Hybrid": "hybrid", "HybridAsyncIO": "hybrid_asyncio"}
+
+FSYNC_INTERVAL = 1.0 # seconds between fsyncs while a run is writing
+BATCH_SIZE = 1000 # rows per write call at most
+MAX_PENDING = 10000 # rows queued before put() blocks (the writer is behind)
+
+_CLOSE = object()
+
+def file_prefix(method):
+    return PREFIXES.get(method, method.lower())
+
+class FileWriter:
+    """ResultSink backend for .jsonl (JSON Lines) and CSV (header row first) files."""
+
+    def __init__(self, path, fields):
+        self.fields = fields
+        self.format = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        if self.format == "csv":
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(fields)
+
+    def write(self, rows):
+        if self.format == "csv":
+            self._csv.writerows(rows)
+        else:
+            self._file.write("".join(json.dumps(dict(zip(self.fields, row)), ensure_ascii=False) + "\n" for row in rows))
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+class ResultSink:
+    """
+    Writer thread for one output file. Workers in this process call put(row), which only
+    queues the row; the writer takes whatever is queued (up to BATCH_SIZE rows), writes it in
+    one go and fsyncs at most every FSYNC_INTERVAL seconds, plus once on close(). Rows are
+    sequences in `fields` order. A path ending in .jsonl writes JSON Lines, .db/.sqlite upserts
+    into the `table` ("posts" or "intros") of a store.ScrapeStore, anything else writes CSV with
+    a header row. Use as a context manager.
+    """
+
+    def __init__(self, path, fields, table=None, method=None, batch_size=BATCH_SIZE, fsync_interval=FSYNC_INTERVAL, max_pending=MAX_PENDING):
+        self.path = path
+        self.fields = list(fields)
+        if store.is_store_path(path):
+            self.format = "sqlite"
+            self._backend = store.StoreWriter(path, table, method)
+        else:
+            self._backend = FileWriter(path, self.fields)
+            self.format = self._backend.format
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.rows = 0
+        self.batches = 0
+        self.fsyncs = 0
+        self._error = None
+        self._queue = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._run, name=f"sink-{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    def put(self, row):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(row)
+
+    def _write(self, rows):
+        self._backend.write(rows)
+        self.rows += len(rows)
+        self.batches += 1
+
+    def _sync(self):
+        self._backend.sync()
+        self.fsyncs += 1
+
+    def _run(self):
+        last_sync = time.monotonic()
+        closing = False
+        while not closing:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _CLOSE:
+                closing = True
+                batch.pop()
+            if self._error is not None or not batch:
+                continue # keep draining so put() never blocks on a dead writer
+            try:
+                self._write(batch)
+                if time.monotonic() - last_sync >= self.fsync_interval:
+                    self._sync()
+                    last_sync = time.monotonic()
+            except Exception as e:
+                self._error = e
+        try:
+            if self._error is None:
+                self._sync()
+        except Exception as e:
+            self._error = e
+        finally:
+            self._backend.close()
+
+    def close(self):
+        # write what is queued, fsync and close; raises the writer's error, if it had one
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,95 @@
+#start-up report: import time of the heavy dependencies and how fast each method gets its workers going
+
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODULES = ["requests", "requests_html", "numpy", "tkinter", "executors", "redditcore", "testing_wiki", "Main"]
+PROBE_TASKS = 32 # tasks per probe run
+
+def import_time(module):
+    # milliseconds to import `module` in a fresh interpreter (cumulative time from -X importtime), or None
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, cwd=HERE)
+    if proc.returncode != 0:
+        return None
+    last = [line for line in proc.stderr.splitlines() if line.startswith("import time:")][-1]
+    return round(int(last.split("|")[1]) / 1000, 1)
+
+def probe_task(i):
+    # what a GUI wiki pool task needs before its first request: an HTML session
+    import workerpool
+    workerpool.worker_session()
+    return os.getpid()
+
+def measure(method, processes=None):
+    # runs in a fresh interpreter: import cost, first (cold) and second (warm) run of PROBE_TASKS tasks
+    start = time.perf_counter()
+    import executors, timeline
+    imported = time.perf_counter()
+    options = {"processes": processes} if processes and not executors.shares_memory(method) else {}
+    timeline.enable()
+    executors.run(method, probe_task, [(i,) for i in range(PROBE_TASKS)], **options)
+    cold = time.perf_counter()
+    executors.run(method, probe_task, [(i,) for i in range(PROBE_TASKS)], **options)
+    warm = time.perf_counter()
+    spawn = timeline.summarize(timeline.drain(settle=0.2)).get("spawn")
+    return {"import_ms": round((imported - start) * 1000, 1), "cold_ms": round((cold - imported) * 1000, 1),
+            "warm_ms": round((warm - cold) * 1000, 1), "spawn_mean_ms": spawn["mean_ms"] if spawn else None}
+
+def measure_in_subprocess(method, start_method=None, processes=None):
+    env = dict(os.environ)
+    if start_method:
+        env["SCRAPER_START_METHOD"] = start_method
+    command = [sys.executable, os.path.abspath(__file__), "--measure", method]
+    if processes:
+        command += ["--processes", str(processes)]
+    proc = subprocess.run(command, capture_output=True, text=True, cwd=HERE, env=env)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def report(processes=None):
+    import executors
+    result = {"imports_ms": {module: import_time(module) for module in MODULES}, "methods": {}}
+    start_methods = [m for m in ("fork", "forkserver", "spawn") if m in multiprocessing.get_all_start_methods()]
+    for method in executors.EXECUTORS:
+        # methods that run in this process start the same way whatever the start method
+        for start_method in ([None] if executors.shares_memory(method) else start_methods):
+            name = method if start_method is None else f"{method} ({start_method})"
+            result["methods"][name] = measure_in_subprocess(method, start_method, processes)
+    return result
+
+def print_report(result):
+    print("Import time (fresh interpreter, cumulative):")
+    for module, ms in result["imports_ms"].items():
+        print(f"  {module:<16}{'not available' if ms is None else f'{ms} ms'}")
+    print(f"\nStart-up per method ({PROBE_TASKS} tasks; cold = first run, warm = second run):")
+    for name, row in result["methods"].items():
+        if "error" in row:
+            print(f"  {name:<28}error: {row['error']}")
+            continue
+        spawn = "" if row["spawn_mean_ms"] is None else f"  spawn {row['spawn_mean_ms']:>7} ms/worker"
+        print(f"  {name:<28}import {row['import_ms']:>7} ms  cold {row['cold_ms']:>8} ms  warm {row['warm_ms']:>7} ms{spawn}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report import and worker start-up time of every method.")
+    parser.add_argument("--processes", type=int, default=None, help="pool size of the process-based methods (default: one per CPU)")
+    parser.add_argument("--output", default=None, help="also write the report as JSON")
+    parser.add_argument("--measure", default=None, help=argparse.SUPPRESS) # internal: one method in this process
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.processes)))
+        sys.exit(0)
+
+    result = report(args.processes)
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
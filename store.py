@@ -0,0 +1,193 @@
+#SQLite store for scraped posts and intros (one row per post id / article title)
+
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site TEXT NOT NULL,
+    method TEXT,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    subreddit TEXT NOT NULL,
+    rank INTEGER,
+    title TEXT,
+    author TEXT,
+    score INTEGER,
+    comments INTEGER,
+    url TEXT,
+    text TEXT,
+    fetched_at REAL NOT NULL,
+    changed_at REAL NOT NULL,
+    run_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS posts_subreddit_score ON posts (subreddit, score DESC);
+CREATE INDEX IF NOT EXISTS posts_score ON posts (score DESC);
+CREATE INDEX IF NOT EXISTS posts_fetched_at ON posts (fetched_at);
+CREATE INDEX IF NOT EXISTS posts_changed_at ON posts (changed_at);
+CREATE TABLE IF NOT EXISTS intros (
+    title TEXT PRIMARY KEY,
+    rank INTEGER,
+    intro TEXT,
+    fetched_at REAL NOT NULL,
+    changed_at REAL NOT NULL,
+    run_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS intros_fetched_at ON intros (fetched_at);
+CREATE INDEX IF NOT EXISTS intros_changed_at ON intros (changed_at);
+"""
+
+# changed_at only moves when the content differs, so repeated runs find what is new
+UPSERT_POST = """
+INSERT INTO posts (id, subreddit, rank, title, author, score, comments, url, text, fetched_at, changed_at, run_id)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    changed_at = CASE WHEN posts.score IS NOT excluded.score OR posts.comments IS NOT excluded.comments
+                      OR posts.title IS NOT excluded.title OR posts.text IS NOT excluded.text
+                      THEN excluded.fetched_at ELSE posts.changed_at END,
+    subreddit = excluded.subreddit, rank = excluded.rank, title = excluded.title, author = excluded.author,
+    score = excluded.score, comments = excluded.comments, url = excluded.url, text = excluded.text,
+    fetched_at = excluded.fetched_at, run_id = excluded.run_id
+"""
+UPSERT_INTRO = """
+INSERT INTO intros (title, rank, intro, fetched_at, changed_at, run_id) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (title) DO UPDATE SET
+    changed_at = CASE WHEN intros.intro IS NOT excluded.intro THEN excluded.fetched_at ELSE intros.changed_at END,
+    rank = excluded.rank, intro = excluded.intro, fetched_at = excluded.fetched_at, run_id = excluded.run_id
+"""
+
+STORE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+def is_store_path(path):
+    return path.endswith(STORE_EXTENSIONS)
+
+def post_id(url):
+    # reddit permalinks look like .../comments/<id>/<slug>/
+    if "/comments/" in url:
+        return url.split("/comments/", 1)[1].split("/", 1)[0]
+    return url
+
+class ScrapeStore:
+    """
+    Scraped posts and intros in one SQLite file (WAL mode, so readers never block the writer).
+    Posts are keyed by reddit post id and intros by article title; writing the same item again
+    updates it in place. Each write call is one transaction.
+    """
+
+    def __init__(self, path="scrapes.db"):
+        self.path = path
+        # opened by the caller, then used by a sink's writer thread (one thread at a time)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.run_id = None
+
+    def begin_run(self, site, method=None):
+        with self.conn:
+            self.run_id = self.conn.execute("INSERT INTO runs (site, method, started_at) VALUES (?, ?, ?)",
+                                            (site, method, time.time())).lastrowid
+        return self.run_id
+
+    def upsert_posts(self, rows):
+        # rows in redditcore.FIELDS order: subreddit, index, title, author, upvotes, comments, url, text
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(UPSERT_POST, [(post_id(url), subreddit, rank, title, author, score, comments, url, text, now, now, self.run_id)
+                                                for subreddit, rank, title, author, score, comments, url, text in rows])
+
+    def upsert_intros(self, rows):
+        # rows in testing_wiki.FIELDS order: index, title, intro
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(UPSERT_INTRO, [(title, rank, intro, now, now, self.run_id) for rank, title, intro in rows])
+
+    def top_posts(self, subreddit, n=10):
+        # highest scored posts of one subreddit (posts_subreddit_score index)
+        return self.conn.execute("SELECT id, title, author, score, comments, url FROM posts WHERE subreddit = ? ORDER BY score DESC LIMIT ?",
+                                 (subreddit, n)).fetchall()
+
+    def last_run(self, site):
+        # (id, method, started_at) of the latest run for "reddit" or "wiki", or None
+        return self.conn.execute("SELECT id, method, started_at FROM runs WHERE site = ? ORDER BY id DESC LIMIT 1", (site,)).fetchone()
+
+    def changed_since(self, table, since):
+        # rows of "posts" or "intros" that were new or changed at or after the `since` timestamp
+        if table not in ("posts", "intros"):
+            raise ValueError(f"Unknown table: {table}")
+        return self.conn.execute(f"SELECT * FROM {table} WHERE changed_at >= ? ORDER BY changed_at", (since,)).fetchall()
+
+    def changes_in_last_run(self, table):
+        # what the latest run added or changed compared to the runs before it
+        run = self.last_run("reddit" if table == "posts" else "wiki")
+        return [] if run is None else self.changed_since(table, run[2])
+
+    def close(self):
+        self.conn.close()
+
+class StoreWriter:
+    """ResultSink backend: each batch of rows becomes one upsert transaction."""
+
+    def __init__(self, path, table, method=None):
+        if table not in ("posts", "intros"):
+            raise ValueError(f"Unknown table: {table}")
+        self.store = ScrapeStore(path)
+        self.store.begin_run("reddit" if table == "posts" else "wiki", method)
+        self._upsert = self.store.upsert_posts if table == "posts" else self.store.upsert_intros
+
+    def write(self, rows):
+        self._upsert(rows)
+
+    def sync(self):
+        pass # every batch is already a committed transaction
+
+    def close(self):
+        self.store.close()
+
+class CrawlState:
+    """
+    What earlier runs saw, for incremental crawls: a version per item (wiki revision id, reddit
+    score) grouped by kind ("wiki", "reddit") and scope (subreddit). Items whose version has
+    not changed are skipped; `skipped` and `fetched` count them per kind for this process.
+    """
+
+    def __init__(self, path="crawl_state.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS crawl_state (
+            kind TEXT NOT NULL, scope TEXT NOT NULL, key TEXT NOT NULL, version TEXT, seen_at REAL NOT NULL,
+            PRIMARY KEY (kind, scope, key))""")
+        self.skipped = {"wiki": 0, "reddit": 0}
+        self.fetched = {"wiki": 0, "reddit": 0}
+
+    def versions(self, kind, scope=""):
+        # key -> version recorded by earlier runs
+        return dict(self.conn.execute("SELECT key, version FROM crawl_state WHERE kind = ? AND scope = ?", (kind, scope)))
+
+    def update(self, kind, scope, versions):
+        now = time.time()
+        with self.conn:
+            self.conn.executemany("INSERT INTO crawl_state (kind, scope, key, version, seen_at) VALUES (?, ?, ?, ?, ?) "
+                                  "ON CONFLICT (kind, scope, key) DO UPDATE SET version = excluded.version, seen_at = excluded.seen_at",
+                                  [(kind, scope, key, str(version), now) for key, version in versions.items()])
+
+    def report(self):
+        return ", ".join(f"{kind}: {self.fetched[kind]} fetched, {self.skipped[kind]} unchanged and skipped" for kind in self.skipped)
+
+    def copy(self, path):
+        # a CrawlState at `path` holding the same versions, with its own counts (one benchmark run)
+        state = CrawlState(path)
+        self.conn.backup(state.conn)
+        return state
+
+    def restore(self, other):
+        # take over the versions of `other` (e.g. what the last benchmark run saw)
+        other.conn.backup(self.conn)
+
+    def close(self):
+        self.conn.close()
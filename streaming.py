@@ -0,0 +1,116 @@
+#bounded result streams: results are handed over as tasks finish, with a cap on tasks in flight
+
+import queue
+import threading
+
+MAX_IN_FLIGHT = 64 # tasks started but not yet finished
+BUFFER_SIZE = 64 # finished results waiting for the consumer before finishing tasks block
+
+_DONE = object()
+_POLL = 0.1 # seconds between checks for a closed stream while blocked
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+class ResultStream:
+    """
+    Iterate over (index, result) pairs in the order tasks finish, where index is the position
+    of the task's args in arg_iter. arg_iter is read lazily by a feeder thread that starts a
+    task only when one of the max_in_flight slots is free. Finished results wait in a queue of
+    buffer_size; when the consumer falls behind, finishing tasks block on it and hold on to
+    their slots, so no new work starts. At most max_in_flight + buffer_size results exist at
+    once, however long arg_iter is.
+
+    dispatch(items, deliver) starts the tasks for a list of (index, args) without waiting for
+    them; when they are done it calls deliver(pairs) with their (index, result) pairs or
+    deliver(error=exception). Items are dispatched `chunk` at a time. The first task error
+    is raised from the iteration. Closing the stream (or leaving the loop early) stops the
+    feeder; tasks already running finish and their results are dropped.
+    """
+
+    def __init__(self, dispatch, arg_iter, max_in_flight=None, buffer_size=None, chunk=1):
+        self.max_in_flight = max(1, max_in_flight or MAX_IN_FLIGHT)
+        self.chunk = max(1, min(chunk, self.max_in_flight))
+        self.started = 0
+        self.finished = 0
+        self._dispatch = dispatch
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._out = queue.Queue(buffer_size or BUFFER_SIZE)
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._fed = False
+        self._feeder = threading.Thread(target=self._feed, args=(iter(arg_iter),), name="stream-feeder", daemon=True)
+        self._feeder.start()
+
+    def _acquire(self):
+        while not self._closed.is_set():
+            if self._slots.acquire(timeout=_POLL):
+                return True
+        return False
+
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._out.put(item, timeout=_POLL)
+                return
+            except queue.Full:
+                pass
+
+    def _start(self, items):
+        with self._lock:
+            self.started += len(items)
+        try:
+            self._dispatch(items, self._deliver)
+        except Exception as e:
+            self._deliver(error=e)
+
+    def _feed(self, arg_iter):
+        items = []
+        try:
+            for index, args in enumerate(arg_iter):
+                if not self._acquire():
+                    return
+                items.append((index, args))
+                if len(items) >= self.chunk:
+                    self._start(items)
+                    items = []
+            if items:
+                self._start(items)
+        except Exception as e:
+            # arg_iter itself failed
+            self._put(_Failure(e))
+        finally:
+            with self._lock:
+                self._fed = True
+                done = self.finished == self.started
+            if done:
+                self._put(_DONE)
+
+    def _deliver(self, pairs=(), error=None):
+        if error is not None:
+            self._put(_Failure(error))
+            return
+        for pair in pairs:
+            self._put(pair)
+        with self._lock:
+            self.finished += len(pairs)
+            done = self._fed and self.finished == self.started
+        self._slots.release(len(pairs))
+        if done:
+            self._put(_DONE)
+
+    def __iter__(self):
+        try:
+            while True:
+                item = self._out.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        self._closed.set()
@@ -1,43 +1,88 @@
 # environment ~/Documents/GitHub/ParallelProcessing/.venv/bin/python
-import tkinter as tk
-from tkinter import messagebox
 import csv
-import threadingjson, forkingjson
-from multiprocessing import Process, Queue
-import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import redditcore
+import redditfeed
+import executors
+import transport
+import httpcache
+import timeline
+import store
+import sys
 import time
 import os
-import urllib.request
-import json
-import numpy as np
+import tempfile
+import tracemalloc
 
 
-# Reddit sequential runner
-def run_reddit_sequential(subreddits=None, limit=10):
-    results = []
-
-    startTime = time.perf_counter()
-    # Process each subreddit one after another
-    for subreddit in subreddits:
-        threadingjson.child_fetch_top_posts(subreddit, results, limit)
-        # results.append(f"Completed fetching posts for subreddit: {subreddit}")
-    
-    endTime = time.perf_counter()
-    elapsed = round(endTime-startTime, 3)
-    results.append(f"\nTotal Sequential Processing Time: {elapsed} seconds")
-
+# Reddit runner for one method (any name registered in executors.EXECUTORS)
+def run_reddit_method(method, subreddits, limit, incremental=None):
+    elapsed, _ = redditcore.run_reddit(method, subreddits, limit, incremental=incremental)
+    print(f"\nTotal {method} Processing Time: {elapsed} seconds")
     return elapsed
 
+def compare_listing_paths(subreddits, limit):
+    """
+    Read each subreddit's listing with the buffered path (whole body, json.loads) and the
+    streaming path and print bytes on the wire, bytes decoded and peak traced memory per
+    listing. Both must produce the same output rows. Returns the per-listing rows.
+    """
+    rows = []
+    print(f"{'Subreddit':<20}{'Path':<8}{'Wire (KiB)':>12}{'Body (KiB)':>12}{'Peak (KiB)':>12}{'Time (ms)':>11}")
+    # both paths read from the network: with the cache on, the second read would be a 304
+    cached = httpcache.ENABLED
+    httpcache.configure(enabled=False)
+    try:
+        for subreddit in subreddits:
+            outputs = {}
+            for name, streaming in (("buffer", False), ("stream", True)):
+                redditfeed.STREAM_LISTINGS = streaming
+                redditfeed.reset_stats()
+                tracemalloc.start()
+                start = time.perf_counter()
+                try:
+                    records = list(redditcore.scrape_subreddit(subreddit, limit))
+                    peak = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+                elapsed = time.perf_counter() - start
+                outputs[name] = [redditcore.post_row(subreddit, record) for record in records if record[0] == "post"]
+                bandwidth = redditfeed.stats()
+                row = {"subreddit": subreddit, "path": name, "wire_kib": round(bandwidth["wire_bytes"] / 1024, 1),
+                       "body_kib": round(bandwidth["body_bytes"] / 1024, 1), "peak_kib": round(peak / 1024, 1),
+                       "ms": round(elapsed * 1000, 1)}
+                rows.append(row)
+                print(f"{subreddit[:18]:<20}{name:<8}{row['wire_kib']:>12}{row['body_kib']:>12}{row['peak_kib']:>12}{row['ms']:>11}")
+            if outputs["buffer"] != outputs["stream"]:
+                print(f"  r/{subreddit}: streaming output differs from the buffered path")
+    finally:
+        redditfeed.STREAM_LISTINGS = True
+        httpcache.configure(enabled=cached)
+    return rows
+
 
 if __name__ == "__main__":
+    import numpy as np # only for the summary statistics
+
+    # --no-cache: fetch everything from the network (cold-cache benchmark)
+    if "--no-cache" in sys.argv:
+        httpcache.configure(enabled=False)
+    # --incremental: skip posts whose upvotes are unchanged since an earlier run (crawl_state.db)
+    crawl_state = store.CrawlState() if "--incremental" in sys.argv else None
+    # --buffer-listings: read listings whole and json.loads them instead of the streaming decoder
+    if "--buffer-listings" in sys.argv:
+        redditfeed.STREAM_LISTINGS = False
+
     # Define subreddits to scrape
     subreddits = ["webscraping", "learnpython", "datascience", "MachineLearning", "Python", "programming", "computerscience", "technology", "coding", "bigdata"]
 
-    # Initialize time accumulators
-    baseline_times = []
-    multithreading_times = []
-    forking_times = []
+    # per-phase timings of every task, written next to results_reddit.csv
+    timeline.enable()
+
+    # Initialize time accumulators (one per registered method)
+    methods = list(executors.EXECUTORS)
+    times = {method: [] for method in methods}
+    reports = {}
+    state_dir = tempfile.TemporaryDirectory(prefix="crawl-state-") if crawl_state is not None else None # removed at exit
 
     # Get test parameters
     size = 30
@@ -50,28 +95,48 @@ if __name__ == "__main__":
     print(f"Number of Tests: {size}")
     print(f"Number of Subreddits: {num_subs}")
     print(f"Number of Pages per Test: {limit}")
+    # --compare-listing: report wire bytes / peak memory of the buffered and streaming listing paths and stop
+    if "--compare-listing" in sys.argv:
+        compare_listing_paths(subreddits[:num_subs], limit)
+        sys.exit(0)
     print("\nStarting tests...")
     print("-" * 70)
 
-    # Run tests
+    # Run tests (every method gets the same subreddits and limit)
     for i in range(size):
-        baseline_times.append(run_reddit_sequential(subreddits[:num_subs], limit))
-        multithreading_times.append(threadingjson.run_reddit_multithreading(subreddits[:num_subs], limit))
-        forking_times.append(forkingjson.run_reddit_forking(subreddits[:num_subs], limit))
-    
-    avr_baseline = np.round(np.mean(baseline_times), 3)
-    avr_multithreading = np.round(np.mean(multithreading_times), 3)
-    avr_forking = np.round(np.mean(forking_times), 3)
-
-    std_baseline = np.round(np.std(baseline_times), 3)
-    std_multithreading = np.round(np.std(multithreading_times), 3)
-    std_forking = np.round(np.std(forking_times), 3)
+        for method in methods:
+            # every run starts from the crawl state as it was before the tests, so all methods skip the same items
+            run_state = crawl_state.copy(os.path.join(state_dir.name, f"{method}_{i}.db")) if crawl_state is not None else None
+            run_start = time.perf_counter()
+            times[method].append(run_reddit_method(method, subreddits[:num_subs], limit, run_state))
+            timeline.record("run", run_start, task=method)
+            if run_state is not None:
+                reports[method] = run_state.report()
+                if i == size - 1 and method == methods[-1]:
+                    crawl_state.restore(run_state) # the next session continues from what this one saw
+                run_state.close()
+
+    averages = {method: np.round(np.mean(times[method]), 3) for method in methods}
+    deviations = {method: np.round(np.std(times[method]), 3) for method in methods}
 
     print("-" * 70)
     print("\nTest Results:")
-    print(f"\nAverage Baseline Time: {avr_baseline} seconds")
-    print(f"\nAverage Threading Time: {avr_multithreading} seconds")
-    print(f"\nAverage Forking Time: {avr_forking} seconds")
+    for method in methods:
+        print(f"\nAverage {method} Time: {averages[method]} seconds")
+
+    # result transport cost of the process-based methods
+    ipc = transport.stats()
+    print(f"\nWorker result transport: {ipc['results']} task results, {ipc['bytes_per_result']} bytes/result, {ipc['us_per_result']} us/result")
+
+    if crawl_state is not None:
+        print("\nIncremental crawl (per run):")
+        for method in methods:
+            print(f"  {method}: {reports[method]}")
+
+    # Chrome trace (chrome://tracing / Perfetto) and per-method phase summary
+    phases = timeline.write_reports(timeline.split_by_run(timeline.drain(settle=0.2)), "results_reddit_trace.json", "results_reddit_phases.json")
+    print("\nPhase timings (results_reddit_trace.json, results_reddit_phases.json):")
+    timeline.print_summary(phases)
 
     # Add to csv file
     if not os.path.exists("results_reddit.csv"):
@@ -80,6 +145,5 @@ if __name__ == "__main__":
             writer.writerow(["Method", "Average Time (seconds)", "Number of Subreddits", "Posts per Subreddit", "Standard Deviation (seconds)"])
     with open("results_reddit.csv", mode="a", newline="", encoding="utf-8") as csvfile:
         writer = csv.writer(csvfile)
-        writer.writerow(["Baseline", avr_baseline, num_subs, limit, std_baseline])
-        writer.writerow(["MultiThreading", avr_multithreading, num_subs, limit, std_multithreading])
-        writer.writerow(["Forking", avr_forking, num_subs, limit, std_forking])
\ No newline at end of file
+        for method in methods:
+            writer.writerow([method, averages[method], num_subs, limit, deviations[method]])
@@ -1,25 +1,30 @@
 # environment ~/Documents/GitHub/ParallelProcessing/.venv/bin/python
 
-import tkinter as tk
-from tkinter import messagebox
 import csv
-from requests_html import HTML, HTMLSession 
-from multiprocessing import Process, Queue
-import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import executors
+import frontier
+import pipeline
+import sink
+import store
+import transport
+import workerpool
+import sessions
+import httpcache
+import policy
+import timeline
+import sys
+import codecs
+import tracemalloc
+from wikistream import IntroExtractor
 import time
 import os
-import numpy as np
-
-def get_session():
-    return HTMLSession()
+import tempfile
+from urllib.parse import unquote, urlencode
+import asyncengine
 
 #wiki scraper function
-from requests_html import HTMLSession
 import re
 
-session = HTMLSession()
-
 def is_noise_paragraph(text):
     """Return True if this paragraph looks like noise (coords, empty, tiny, etc)."""
     if not text:
@@ -37,23 +42,29 @@ def is_noise_paragraph(text):
         return True
     return False
 
-def get_wiki_intro(title, max_accumulate, min_chars=120):
-    """
-    Return a robust introduction for a Wikipedia article title (string with underscores or spaces).
-    It collects direct child <p> elements in div.mw-parser-output, skipping noise, and may
-    join several consecutive paragraphs until min_chars or max_accumulate is reached.
-    """
-    url = f"https://en.wikipedia.org/wiki/{title}"
-    r = session.get(url)
-    # select direct child <p> inside the article body
-    paras = r.html.find('div.mw-parser-output > p')
+# where articles are fetched from; WIKI_BASE_URL points the scrapers at a local stand-in (benchmark.py)
+WIKI_BASE_URL = os.environ.get("WIKI_BASE_URL", "https://en.wikipedia.org")
+
+INTRO_BACKEND = "html" # "html": one rendered page per title; "api": batched intro extracts from the action API
+STREAM_INTROS = True # use the early-terminating streaming extractor in wiki_scrape_page
+STREAM_CHUNK_SIZE = 16 * 1024
+REVISION_BATCH = 50 # titles per revision lookup (the action API's limit for anonymous clients)
+EXTRACT_BATCH = 20 # titles per extracts task: exintro returns at most 20 intros per request
+WIKI_SEEDS = ["Wikipedia:Contents/Technology_and_applied_sciences"] # pages the title crawl starts from
+WIKI_MAX_DEPTH = 3 # link hops from a seed page; titles at the last hop are listed but not expanded
+DISCOVERY_BATCH = 100 # titles handed to the executor at a time while the crawl keeps discovering
+# the settings above that the command-line flags change, for pool workers that are not forked from this process
+workerpool.share_settings(__name__, "WIKI_BASE_URL", "INTRO_BACKEND", "STREAM_INTROS")
+FIELDS = ["Index", "Title", "Post Text"] # one consolidated output per run: wiki_{prefix}_intros.csv (or .jsonl / .db)
+
+def select_intro(paragraphs, max_accumulate, min_chars=120):
+    # paragraphs of the intro, in order, skipping noise, until min_chars and max_accumulate are reached
     intro_parts = []
     accumulated = 0
 
-    for p in paras:
-        text = p.text or ""
+    for text in paragraphs:
         # some <p> may only contain a reference span; treat as empty
-        text = text.strip()
+        text = (text or "").strip()
         if is_noise_paragraph(text):
             # skip and continue scanning
             continue
@@ -65,6 +76,24 @@ def get_wiki_intro(title, max_accumulate, min_chars=120):
         # stop if we've collected a decent-sized intro
         if accumulated >= min_chars and accumulated >= max_accumulate:
             break
+    return intro_parts
+
+def get_wiki_intro(title, max_accumulate, min_chars=120, session=None, stats=None):
+    """
+    Return a robust introduction for a Wikipedia article title (string with underscores or spaces).
+    It collects direct child <p> elements in div.mw-parser-output, skipping noise, and may
+    join several consecutive paragraphs until min_chars or max_accumulate is reached.
+    Uses the calling thread's pooled session unless `session` is given. If a `stats` dict is
+    passed, bytes read and fetch/parse times are recorded in it.
+    """
+    url = f"{WIKI_BASE_URL}/wiki/{title}"
+    start = time.perf_counter()
+    r = policy.get("wiki", url, html=True, session=session)
+    fetched = time.perf_counter()
+    timeline.record("fetch", start, fetched, bytes=len(r.content))
+    # select direct child <p> inside the article body
+    paras = r.html.find('div.mw-parser-output > p')
+    intro_parts = select_intro((p.text for p in paras), max_accumulate, min_chars)
 
     # fallback: if nothing found in direct <p> children, attempt to find first <p> anywhere
     if not intro_parts:
@@ -72,6 +101,11 @@ def get_wiki_intro(title, max_accumulate, min_chars=120):
         if p_any and p_any.text and not is_noise_paragraph(p_any.text.strip()):
             intro_parts = [p_any.text.strip()]
 
+    timeline.record("parse", fetched)
+    if stats is not None:
+        stats.update(bytes_read=len(r.content), fetch_seconds=fetched - start,
+                     parse_seconds=time.perf_counter() - fetched, stopped_early=False)
+
     if not intro_parts:
         return "No description found."
 
@@ -79,16 +113,104 @@ def get_wiki_intro(title, max_accumulate, min_chars=120):
     return "\n\n".join(intro_parts)
 
 
-# Example usage inside your existing wiki_scrape_page:
-def wiki_scrape_page(title, max_accumulate, queue=None):
-    url = f"https://en.wikipedia.org/wiki/{title}"
+class StreamedIntro:
+    """
+    The intro of a page read in chunks: each chunk is decoded and fed to an IntroExtractor,
+    with its download and parse time on the timeline. feed() returns True once the intro is
+    complete, so the caller can stop reading. Used by the blocking and the async streaming paths.
+    """
+
+    def __init__(self, max_accumulate, min_chars, encoding, start):
+        self.extractor = IntroExtractor(max_accumulate, is_noise_paragraph, min_chars)
+        self.bytes_read = 0
+        self.parse_seconds = 0.0
+        self._decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+        self._read_start = start
+
+    @property
+    def done(self):
+        return self.extractor.done
+
+    def feed(self, chunk):
+        self.bytes_read += len(chunk)
+        parse_start = time.perf_counter()
+        self.extractor.feed(self._decoder.decode(chunk))
+        read_end = time.perf_counter()
+        self.parse_seconds += read_end - parse_start
+        # download and parsing alternate chunk by chunk
+        timeline.record("fetch", self._read_start, parse_start, bytes=len(chunk))
+        timeline.record("parse", parse_start, read_end)
+        self._read_start = read_end
+        return self.extractor.done
+
+    def result(self):
+        self.extractor.close()
+        return self.extractor.result()
+
+def parse_intro(text, max_accumulate, min_chars=120):
+    # the intro of a whole page, by the streaming extractor's rules
+    extractor = IntroExtractor(max_accumulate, is_noise_paragraph, min_chars)
+    extractor.feed(text)
+    extractor.close()
+    return extractor.result()
+
+def get_wiki_intro_streaming(title, max_accumulate, min_chars=120, session=None, stats=None):
+    """
+    Same result as get_wiki_intro, but the page is read in chunks and fed to an incremental
+    parser. Reading stops (and the connection is released) as soon as the intro budget is met,
+    so the rest of a long article is never downloaded or parsed. Goes through the response
+    cache (httpcache.get_stream): a stored page, e.g. one the title crawl fetched, is
+    revalidated and read from the cache on 304. A page is only stored when it was read to the
+    end, since a partial body cannot be.
+    """
+    url = f"{WIKI_BASE_URL}/wiki/{title}"
+    start = time.perf_counter()
+    with policy.get("wiki", url, html=True, session=session, send=httpcache.get_stream, stream=True) as r:
+        r.raise_for_status()
+        intro = StreamedIntro(max_accumulate, min_chars, r.encoding, start)
+        for chunk in r.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            if intro.feed(chunk):
+                break
+    # closing the response before the end drops the connection instead of draining the body
+    result = intro.result()
+
+    if stats is not None:
+        total = time.perf_counter() - start
+        stats.update(bytes_read=intro.bytes_read, fetch_seconds=total - intro.parse_seconds,
+                     parse_seconds=intro.parse_seconds, stopped_early=intro.done)
+    return result
+
+def compare_intro_paths(titles, max_accumulate):
+    """
+    Fetch every title with both the DOM path and the streaming path and print parse time, bytes
+    read and peak traced memory per page. Returns the per-page rows.
+    """
+    rows = []
+    print(f"{'Title':<40}{'Path':<8}{'Parse (ms)':>12}{'Bytes':>12}{'Peak (KiB)':>12}")
+    for title in titles:
+        for name, func in (("dom", get_wiki_intro), ("stream", get_wiki_intro_streaming)):
+            stats = {}
+            tracemalloc.start()
+            try:
+                func(title, max_accumulate, stats=stats, session=sessions.get_session(html=True))
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            row = {"title": title, "path": name, "parse_ms": round(stats["parse_seconds"] * 1000, 2),
+                   "bytes_read": stats["bytes_read"], "peak_kib": round(peak / 1024, 1),
+                   "stopped_early": stats["stopped_early"]}
+            rows.append(row)
+            print(f"{title[:38]:<40}{name:<8}{row['parse_ms']:>12}{row['bytes_read']:>12}{row['peak_kib']:>12}")
+    return rows
+
+# `out` is the run's ResultSink; tasks outside this process leave writing to the parent
+def wiki_scrape_page(title, max_accumulate, queue=None, session=None, index=None, out=None):
     try:
-        intro = get_wiki_intro(title, max_accumulate)
-        filename = f"wiki_{title}.csv"
-        with open(filename, mode="w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(["Index", "Title", "Post Text"])
-            writer.writerow([i, title, intro])
+        get_intro = get_wiki_intro_streaming if STREAM_INTROS else get_wiki_intro
+        intro = get_intro(title, max_accumulate, session=session)
+        if out is not None:
+            with timeline.span("write"):
+                out.put([index, title, intro])
         
     except Exception as e:
         intro = f"Error scraping {title}: {e}"
@@ -100,103 +222,333 @@ def wiki_scrape_page(title, max_accumulate, queue=None):
 
     return intro
 
-def wiki_get_titles(limit):
-    url = 'https://en.wikipedia.org/wiki/Wikipedia:Contents/Technology_and_applied_sciences'
-    session = get_session()
-    r = session.get(url)
-
-    links = r.html.find('a[href^="/wiki/"]')
-
-    titles = set()
+# one unit of work for any executor method (thread, pool worker or event loop task)
+def wiki_scrape_task(title, max_accumulate, index=None, out=None):
+    return title, wiki_scrape_page(title, max_accumulate, index=index, out=out)
 
-    for link in links:
-        href = link.attrs.get("href", "")
-
-        if not href.startswith("/wiki/"):
-            continue
-        if ":" in href:  # filters File:, Category:, Help:, etc.
-            continue
-        if href.startswith("/wiki/Wikipedia:"):
-            continue
+async def get_wiki_intro_async(title, max_accumulate, min_chars=120):
+    """
+    get_wiki_intro_streaming for tasks on the event loop, reading through the loop's asynchttp
+    client and the response cache (httpcache.get_stream_async). With STREAM_INTROS off the
+    whole page is fetched and parsed by the same extractor, as in the pipeline's parse stage.
+    """
+    url = f"{WIKI_BASE_URL}/wiki/{title}"
+    start = time.perf_counter()
+    if not STREAM_INTROS:
+        r = await policy.get_async("wiki", url)
+        r.raise_for_status()
+        fetched = time.perf_counter()
+        timeline.record("fetch", start, fetched, bytes=len(r.content))
+        result = parse_intro(r.text, max_accumulate, min_chars)
+        timeline.record("parse", fetched)
+        return result
+
+    r = await policy.get_async("wiki", url, send=httpcache.get_stream_async, stream=True)
+    try:
+        r.raise_for_status()
+        intro = StreamedIntro(max_accumulate, min_chars, r.encoding, start)
+        async for chunk in r.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            if intro.feed(chunk):
+                break
+    finally:
+        # as in the blocking path, leaving early drops the connection
+        r.close()
+    return intro.result()
+
+async def wiki_scrape_page_async(title, max_accumulate, queue=None, index=None, out=None):
+    try:
+        intro = await get_wiki_intro_async(title, max_accumulate)
+        if out is not None:
+            with timeline.span("write"):
+                out.put([index, title, intro])
+    except Exception as e:
+        intro = f"Error scraping {title}: {e}"
+    if queue:
+        queue.put((title, intro))
+    return intro
 
-        titles.add(href.replace("/wiki/", ""))
+async def wiki_scrape_task_async(title, max_accumulate, index=None, out=None):
+    return title, await wiki_scrape_page_async(title, max_accumulate, index=index, out=out)
 
-        if len(titles) >= limit:
-            break
+# what the AsyncIO methods await instead of running wiki_scrape_task in a thread (asyncengine.coroutine_function)
+wiki_scrape_task.aio = wiki_scrape_task_async
 
-    return list(titles)
+def wiki_fetch_part(title, max_accumulate):
+    # pipeline fetch stage: the whole page (through the response cache); parsing happens in a pool worker
+    start = time.perf_counter()
+    try:
+        r = policy.get("wiki", f"{WIKI_BASE_URL}/wiki/{title}")
+        r.raise_for_status()
+    except Exception as e:
+        yield title, max_accumulate, None, f"Error scraping {title}: {e}"
+        return
+    timeline.record("fetch", start, task=title, bytes=len(r.content))
+    yield title, max_accumulate, r.text, None
+
+def wiki_parse_part(part):
+    # pipeline parse stage: the intro of a fetched page, by the same rules as get_wiki_intro
+    title, max_accumulate, text, error = part
+    if error is not None:
+        return title, error
+    start = time.perf_counter()
+    intro = parse_intro(text, max_accumulate)
+    timeline.record("parse", start, task=title)
+    return title, intro
+
+# the pipeline method's unit of work (other methods run wiki_scrape_task)
+WIKI_PAGE_TASK = pipeline.Staged(wiki_fetch_part, wiki_parse_part)
+
+def wiki_page_links(title):
+    r = policy.get("wiki", f"{WIKI_BASE_URL}/wiki/{title}")
+    r.raise_for_status()
+    return frontier.page_links(r.text)
+
+# titles in breadth-first order from the seed pages, discovered in a background thread
+def wiki_discover(limit, seeds=None, max_depth=None, priority=None):
+    crawl = frontier.Frontier(seeds or WIKI_SEEDS, WIKI_MAX_DEPTH if max_depth is None else max_depth, priority)
+    return frontier.TitleStream(crawl, wiki_page_links, limit)
+
+def wiki_get_titles(limit, seeds=None, max_depth=None):
+    return list(wiki_discover(limit, seeds, max_depth))
+
+
+class ApiQuery:
+    """
+    The requests and pages of one action=query over `titles`, following `continue` until the
+    API is done; a page may come back once per round. Titles are given back as passed in: they
+    are sent unescaped (frontier titles are percent-encoded, which the API takes literally and
+    rejects) and the API's normalized and redirect targets are mapped back to them. `url` is
+    the next request (None when done); pages(data) reads its response.
+    """
 
+    def __init__(self, titles, params):
+        sent = {unquote(t): t for t in titles}
+        self._base = {"action": "query", "format": "json", "formatversion": 2, "titles": "|".join(sent), **params}
+        self._original = dict(sent)
+        self.url = self._url({})
+
+    def _url(self, cont):
+        return f"{WIKI_BASE_URL}/w/api.php?{urlencode({**self._base, **cont})}"
+
+    def pages(self, data):
+        # (title, page) for every page of one response; moves `url` on to the next round
+        query = data.get("query", {})
+        for n in query.get("normalized", []):
+            self._original[n["to"]] = self._original.get(n["from"], n["from"])
+        for redirect in query.get("redirects", []):
+            self._original[redirect["to"]] = self._original.get(redirect["from"], redirect["from"])
+        self.url = self._url(data["continue"]) if "continue" in data else None
+        return [(self._original.get(page["title"], page["title"]), page) for page in query.get("pages", [])]
+
+def wiki_api_pages(titles, **params):
+    # yield (title, page) from action=query for `titles` (ApiQuery)
+    query = ApiQuery(titles, params)
+    while query.url is not None:
+        r = policy.get("wiki", query.url)
+        r.raise_for_status()
+        yield from query.pages(r.json())
+
+async def wiki_api_pages_async(titles, **params):
+    # wiki_api_pages as an async generator, for tasks on the event loop
+    query = ApiQuery(titles, params)
+    while query.url is not None:
+        r = await policy.get_async("wiki", query.url)
+        r.raise_for_status()
+        for title, page in query.pages(r.json()):
+            yield title, page
+
+def wiki_get_revisions(titles):
+    """
+    Current revision id of every title, REVISION_BATCH titles per action API request
+    (prop=revisions, ids only - a few bytes per page instead of the rendered article).
+    Titles the API does not know are left out.
+    """
+    revisions = {}
+    for i in range(0, len(titles), REVISION_BATCH):
+        for title, page in wiki_api_pages(titles[i:i + REVISION_BATCH], prop="revisions", rvprop="ids"):
+            if page.get("revisions"):
+                revisions[title] = page["revisions"][0]["revid"]
+    return revisions
 
-# baseline scraper function
-# define limit of pages to scrape
-def wiki_baseline_scraper(limit, max_accumulate):
-    titles = wiki_get_titles(limit=limit)
+# the plain-text lead section of every title (prop=extracts&exintro&explaintext), one paragraph per line
+EXTRACT_PARAMS = {"prop": "extracts", "exintro": 1, "explaintext": 1, "exlimit": "max"}
 
-    startTime = time.perf_counter()
-    for title in list(titles):
-        wiki_scrape_page(title, max_accumulate)
-    endTime = time.perf_counter()
-    elapsed = round(endTime - startTime, 3)
-    print(f"\nTotal Baseline Processing Time: {elapsed} seconds")
-    return elapsed
+def wiki_get_extracts(titles):
+    # title -> lead section (EXTRACT_PARAMS)
+    return {title: page["extract"] for title, page in wiki_api_pages(titles, **EXTRACT_PARAMS) if "extract" in page}
 
-# multithreading scraper function
-# define limit of pages to scrape
-def wiki_multithreading_scraper(limit, max_accumulate):
-    titles = wiki_get_titles(limit=limit)
+async def wiki_get_extracts_async(titles):
+    return {title: page["extract"] async for title, page in wiki_api_pages_async(titles, **EXTRACT_PARAMS) if "extract" in page}
 
-    startTime = time.perf_counter()
-    threads = []
+def extract_results(titles, extracts, max_accumulate, min_chars=120):
+    # (title, intro) per title from the fetched extracts, by the same rules as the page path
+    results = []
     for title in titles:
-        t = threading.Thread(target=wiki_scrape_page, args=(title, max_accumulate))
-        t.start()
-        threads.append(t)
-
-    for index, t in enumerate(threads):
-        t.join()
-        # print(f"Thread {index} completed.")
-
-    endTime = time.perf_counter()
-    elapsed = round(endTime - startTime, 3)
-    print(f"\nTotal MultiThreading Processing Time: {elapsed} seconds")
-    return elapsed
-
-# forking scraper function
-# define limit of pages to scrape
-def wiki_forking_scraper(limit, max_accumulate):
-    titles = wiki_get_titles(limit)
+        intro_parts = select_intro(extracts.get(title, "").split("\n"), max_accumulate, min_chars)
+        results.append((title, "\n\n".join(intro_parts) if intro_parts else "No description found."))
+    return results
+
+def timed_extract_results(titles, extracts, max_accumulate, min_chars, start):
+    # extract_results for a fetch that began at `start`, with both stages on the timeline
+    fetched = time.perf_counter()
+    timeline.record("fetch", start, fetched)
+    results = extract_results(titles, extracts, max_accumulate, min_chars)
+    timeline.record("parse", fetched)
+    return results
+
+# the "api" backend's unit of work: up to EXTRACT_BATCH titles in one request, same post-processing as the page path
+def wiki_extract_task(titles, max_accumulate, min_chars=120):
+    start = time.perf_counter()
+    try:
+        extracts = wiki_get_extracts(titles)
+    except Exception as e:
+        return [(title, f"Error scraping {title}: {e}") for title in titles]
+    return timed_extract_results(titles, extracts, max_accumulate, min_chars, start)
 
-    queue = Queue()
-    processes = []
+async def wiki_extract_task_async(titles, max_accumulate, min_chars=120):
+    start = time.perf_counter()
+    try:
+        extracts = await wiki_get_extracts_async(titles)
+    except Exception as e:
+        return [(title, f"Error scraping {title}: {e}") for title in titles]
+    return timed_extract_results(titles, extracts, max_accumulate, min_chars, start)
+
+wiki_extract_task.aio = wiki_extract_task_async
+
+# scrape one batch of titles with `method`; rows are numbered from `first` on
+def wiki_scrape_titles(method, titles, max_accumulate, out, first=1, backend="html", **options):
+    if backend == "api":
+        # a handful of batch tasks; their results are written here
+        chunks = [(titles[i:i + EXTRACT_BATCH], max_accumulate) for i in range(0, len(titles), EXTRACT_BATCH)]
+        results = [pair for batch in executors.run(method, wiki_extract_task, chunks, **options) for pair in batch]
+    elif executors.staged(method):
+        # the pipeline's writer stage writes rows as pages are parsed
+        def write(i, result):
+            if not result[1].startswith("Error scraping"):
+                out.put([first + i, *result])
+        return executors.run(method, WIKI_PAGE_TASK, [(title, max_accumulate) for title in titles], write=write, **options)
+    elif executors.shares_memory(method):
+        return executors.run(method, wiki_scrape_task, [(title, max_accumulate, i, out) for i, title in enumerate(titles, start=first)], **options)
+    else:
+        results = executors.run(method, wiki_scrape_task, [(title, max_accumulate) for title in titles], **options)
+    for i, (title, intro) in enumerate(results, start=first):
+        if not intro.startswith("Error scraping"):
+            out.put([i, title, intro])
+    return results
+
+def timed_batches(discovered, size, waited):
+    # discovered.batches(size), adding the seconds spent waiting for each batch to waited[0]
+    batches = discovered.batches(size)
+    while True:
+        start = time.perf_counter()
+        titles = next(batches, None)
+        waited[0] += time.perf_counter() - start
+        if titles is None:
+            return
+        yield titles
+
+# run one scraping method (any name registered in executors.EXECUTORS) on `limit` discovered titles;
+# every intro goes to one output file written in the background. Pass a store.CrawlState as
+# `incremental` to skip pages whose revision has not changed since it last saw them.
+# backend="api" fetches intros in batches through the action API instead of one page per title.
+# Titles are discovered while earlier batches are scraped; the time spent waiting for the crawl
+# is left out of the elapsed time and printed on its own.
+def wiki_run(method, limit, max_accumulate, output=None, incremental=None, backend=None, **options):
+    backend = backend or INTRO_BACKEND
+    output = output or f"wiki_{sink.file_prefix(method)}_intros.csv"
 
     startTime = time.perf_counter()
+    results = []
+    discovery_wait = [0.0]
+    # revisions stored by earlier runs, read once (a run never sees a title twice)
+    known = incremental.versions("wiki") if incremental is not None else None
+    # leaving the loop early (an error) closes the title stream, which stops the crawl
+    with sink.ResultSink(output, FIELDS, table="intros", method=method) as out, wiki_discover(limit) as discovered:
+        for titles in timed_batches(discovered, DISCOVERY_BATCH, discovery_wait):
+            if incremental is not None:
+                revisions = wiki_get_revisions(titles)
+                changed = [title for title in titles if title not in revisions or known.get(title) != str(revisions[title])]
+                incremental.skipped["wiki"] += len(titles) - len(changed)
+                incremental.fetched["wiki"] += len(changed)
+                titles = changed
+            batch = wiki_scrape_titles(method, titles, max_accumulate, out, len(results) + 1, backend, **options)
+            if incremental is not None:
+                # only pages that were scraped successfully count as seen
+                incremental.update("wiki", "", {title: revisions[title] for title, intro in batch
+                                                if title in revisions and not intro.startswith("Error scraping")})
+            results.extend(batch)
+    endTime = time.perf_counter()
+    elapsed = round(endTime - startTime - discovery_wait[0], 3)
+    print(f"\nTotal {method} Processing Time: {elapsed} seconds (plus {discovery_wait[0]:.3f} s waiting for title discovery)")
+    return elapsed, results
 
-    for title in titles:
-        p = Process(target=wiki_scrape_page, args=(title, max_accumulate, queue))
-        p.start()
-        processes.append(p)
+def wiki_stream(method, limit, max_accumulate, output=None, backend=None, max_in_flight=None, buffer_size=None, **options):
+    """
+    wiki_run for runs too large to keep: yields (rank, title, intro) as pages finish, in the
+    order they finish, rank being the title's place in discovery order. Titles are discovered
+    while pages are scraped and nothing is kept once handed over; at most max_in_flight tasks
+    (pages, or EXTRACT_BATCH-title batches with backend="api") run at once and buffer_size
+    finished ones wait for the consumer (executors.stream). Rows go to `output` as in
+    wiki_run. Incremental runs go through wiki_run.
+    """
+    backend = backend or INTRO_BACKEND
+    output = output or f"wiki_{sink.file_prefix(method)}_intros.csv"
+    titles = wiki_discover(limit)
+    if backend == "api":
+        tasks = ((batch, max_accumulate) for batch in titles.batches(EXTRACT_BATCH))
+        results = ((i * EXTRACT_BATCH + j, pair) for i, batch in executors.stream(method, wiki_extract_task, tasks, max_in_flight, buffer_size, **options)
+                   for j, pair in enumerate(batch))
+    else:
+        task = WIKI_PAGE_TASK if executors.staged(method) else wiki_scrape_task
+        results = executors.stream(method, task, ((title, max_accumulate) for title in titles), max_in_flight, buffer_size, **options)
+    # a consumer that stops early closes the title stream too, so the crawl does not keep running
+    with titles, sink.ResultSink(output, FIELDS, table="intros", method=method) as out:
+        for i, (title, intro) in results:
+            if not intro.startswith("Error scraping"):
+                out.put([i + 1, title, intro])
+            yield i + 1, title, intro
 
-    for index, p in enumerate(processes):
-        p.join()
-        # print(f"Process {index} completed.")
+# baseline scraper function
+def wiki_baseline_scraper(limit, max_accumulate):
+    return wiki_run("Baseline", limit, max_accumulate)[0]
 
-    results = []
-    while not queue.empty():
-        results.append(queue.get())
-    
-    queue.close()
-    queue.join_thread()
+# multithreading scraper function
+def wiki_multithreading_scraper(limit, max_accumulate):
+    return wiki_run("MultiThreading", limit, max_accumulate)[0]
 
-    elapsed = round(time.perf_counter() - startTime, 3)
+# forking scraper function (persistent worker pool)
+def wiki_forking_scraper(limit, max_accumulate):
+    return wiki_run("Forking", limit, max_accumulate)[0]
 
-    print(f"\nTotal Forking Processing Time: {elapsed} seconds")
-    return elapsed
+# asyncio scraper function
+# concurrency = how many requests may be in flight at once
+def wiki_async_scraper(limit, max_accumulate, concurrency=asyncengine.DEFAULT_CONCURRENCY):
+    return wiki_run("AsyncIO", limit, max_accumulate, concurrency=concurrency)[0]
 
 
 if __name__ == "__main__":
-    baseline_times = []
-    multithreading_times = []
-    forking_times = []
+    import numpy as np # only for the summary statistics
+
+    # --no-cache: fetch everything from the network (cold-cache benchmark)
+    if "--no-cache" in sys.argv:
+        httpcache.configure(enabled=False)
+    # --dom-intro: parse the full page with requests_html instead of the streaming extractor
+    if "--dom-intro" in sys.argv:
+        STREAM_INTROS = False
+    # --api-intro: fetch intros in batches through the MediaWiki action API
+    if "--api-intro" in sys.argv:
+        INTRO_BACKEND = "api"
+    # --incremental: skip pages whose revision is unchanged since an earlier run (crawl_state.db)
+    crawl_state = store.CrawlState() if "--incremental" in sys.argv else None
+
+    # per-phase timings of every task, written next to results.csv
+    timeline.enable()
+
+    # one time accumulator per registered method
+    methods = list(executors.EXECUTORS)
+    times = {method: [] for method in methods}
+    reports = {}
+    state_dir = tempfile.TemporaryDirectory(prefix="crawl-state-") if crawl_state is not None else None # removed at exit
 
     # Get test parameters
     size = 30
@@ -209,28 +561,49 @@ if __name__ == "__main__":
     print(f"Number of Tests: {size}")
     print(f"Number of Pages per Test: {limit}")
     print(f"Length of Pages to Scrape: {text_length} pages")
+    # --compare-intro: report parse time / peak memory of both intro paths and stop
+    if "--compare-intro" in sys.argv:
+        compare_intro_paths(wiki_get_titles(limit), text_length)
+        sys.exit(0)
+
     print("\nStarting tests...")
     print("-" * 70)
 
-    # Run tests
+    # Run tests (every method gets the same titles and text length)
     for i in range(size):
-        baseline_times.append(wiki_baseline_scraper(limit, text_length))
-        multithreading_times.append(wiki_multithreading_scraper(limit, text_length))
-        forking_times.append(wiki_forking_scraper(limit, text_length))
-    
-    avr_baseline = np.round(np.mean(baseline_times), 3)
-    avr_multithreading = np.round(np.mean(multithreading_times), 3)
-    avr_forking = np.round(np.mean(forking_times), 3)
-
-    std_baseline = np.round(np.std(baseline_times), 3)
-    std_multithreading = np.round(np.std(multithreading_times), 3)
-    std_forking = np.round(np.std(forking_times), 3)
-    
+        for method in methods:
+            # every run starts from the crawl state as it was before the tests, so all methods skip the same items
+            run_state = crawl_state.copy(os.path.join(state_dir.name, f"{method}_{i}.db")) if crawl_state is not None else None
+            run_start = time.perf_counter()
+            times[method].append(wiki_run(method, limit, text_length, incremental=run_state)[0])
+            timeline.record("run", run_start, task=method)
+            if run_state is not None:
+                reports[method] = run_state.report()
+                if i == size - 1 and method == methods[-1]:
+                    crawl_state.restore(run_state) # the next session continues from what this one saw
+                run_state.close()
+
+    averages = {method: np.round(np.mean(times[method]), 3) for method in methods}
+    deviations = {method: np.round(np.std(times[method]), 3) for method in methods}
+
     print("-" * 70)
     print("\nTest Results:")
-    print(f"\nAverage Baseline Time: {avr_baseline} seconds")
-    print(f"\nAverage Threading Time: {avr_multithreading} seconds")
-    print(f"\nAverage Forking Time: {avr_forking} seconds")
+    for method in methods:
+        print(f"\nAverage {method} Time: {averages[method]} seconds")
+
+    # result transport cost of the process-based methods
+    ipc = transport.stats()
+    print(f"\nWorker result transport: {ipc['results']} task results, {ipc['bytes_per_result']} bytes/result, {ipc['us_per_result']} us/result")
+
+    if crawl_state is not None:
+        print("\nIncremental crawl (per run):")
+        for method in methods:
+            print(f"  {method}: {reports[method]}")
+
+    # Chrome trace (chrome://tracing / Perfetto) and per-method phase summary
+    phases = timeline.write_reports(timeline.split_by_run(timeline.drain(settle=0.2)), "results_trace.json", "results_phases.json")
+    print("\nPhase timings (results_trace.json, results_phases.json):")
+    timeline.print_summary(phases)
 
     # Add to csv file
     if not os.path.exists("results.csv"):
@@ -239,6 +612,5 @@ if __name__ == "__main__":
             writer.writerow(["Method", "Average Time (seconds)", "Text Length", "Pages per Test", "Standard Deviation (seconds)"])
     with open("results.csv", mode="a", newline="", encoding="utf-8") as csvfile:
         writer = csv.writer(csvfile)
-        writer.writerow(["Baseline", avr_baseline, text_length, limit, std_baseline])
-        writer.writerow(["MultiThreading", avr_multithreading, text_length, limit, std_multithreading])
-        writer.writerow(["Forking", avr_forking, text_length, limit, std_forking])
+        for method in methods:
+            writer.writerow([method, averages[method], text_length, limit, deviations[method]])
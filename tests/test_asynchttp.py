@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+import requests
+
+import asynchttp
+import httpcache
+import mockserver
+import redditfeed
+import testing_wiki
+
+REDIRECTS = {
+    "/wiki/old": (301, "/wiki/new"),
+    "/wiki/a/b": (302, "c"), # relative Location
+    "/wiki/loop": (302, "/wiki/loop"),
+    "/r/moved/top.json": (308, "/r/python/top.json?limit=5&t=all"),
+}
+
+@pytest.fixture
+def server(monkeypatch):
+    with mockserver.MockServer(redirects=REDIRECTS) as srv:
+        monkeypatch.setattr(testing_wiki, "WIKI_BASE_URL", srv.base_url)
+        monkeypatch.setattr(redditfeed, "REDDIT_BASE_URL", srv.base_url)
+        httpcache.configure(enabled=False)
+        try:
+            yield srv
+        finally:
+            httpcache.configure(enabled=True)
+
+def run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await asynchttp.close_client()
+    return asyncio.run(main())
+
+def test_follows_redirect_to_final_url(server):
+    response = run(_get(f"{server.base_url}/wiki/old"))
+    expected = requests.get(f"{server.base_url}/wiki/old")
+    assert response.status_code == 200
+    assert response.url == f"{server.base_url}/wiki/new" == expected.url
+    assert [r.status_code for r in response.history] == [301]
+    assert response.content == expected.content
+
+def test_relative_location(server):
+    response = run(_get(f"{server.base_url}/wiki/a/b"))
+    assert response.status_code == 200
+    assert response.url == f"{server.base_url}/wiki/a/c"
+
+def test_redirect_loop_is_capped(server):
+    with pytest.raises(requests.TooManyRedirects):
+        run(_get(f"{server.base_url}/wiki/loop"))
+
+def test_streamed_response_follows_redirect(server):
+    async def streamed():
+        response = await asynchttp.get_client().get(f"{server.base_url}/wiki/old", stream=True)
+        return response.url, b"".join([chunk async for chunk in response.iter_content()])
+    url, body = run(streamed())
+    assert url == f"{server.base_url}/wiki/new"
+    assert body == requests.get(f"{server.base_url}/wiki/new").content
+
+def test_wiki_intro_through_redirect_matches_sync(server):
+    intro = run(testing_wiki.get_wiki_intro_async("old", 300))
+    assert intro != "No description found."
+    assert intro == testing_wiki.get_wiki_intro_streaming("old", 300)
+
+def test_reddit_listing_through_redirect_matches_sync(server):
+    posts, after = run(redditfeed.fetch_listing_page_async("moved", 5))
+    assert len(posts) == 5
+    assert (posts, after) == redditfeed.fetch_listing_page("moved", 5)
+
+async def _get(url):
+    return await asynchttp.get_client().get(url)
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import policy
+
+class FakeResponse:
+    def __init__(self, name):
+        self.name = name
+        self.status_code = 200
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+def warmed(hedge=True):
+    # a policy whose hedge delay is known (about 10 ms)
+    p = policy.RequestPolicy(hedge=hedge, hedge_min_samples=5)
+    for _ in range(5):
+        p.record(0.01)
+    return p
+
+def test_hedging_is_opt_in():
+    assert warmed(hedge=False).hedge_delay() is None
+    assert policy.RequestPolicy().hedge is False
+    assert policy.get_policy("reddit").hedge is False
+    assert policy.get_policy("wiki").hedge is True
+
+def test_slow_attempt_is_hedged():
+    calls = []
+
+    def send(session, url, **kwargs):
+        calls.append(session)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return FakeResponse("primary")
+        return FakeResponse("hedge")
+
+    response = policy._attempt(warmed(), send, "http://example.invalid/", False, "caller-session", {})
+    assert response.name == "hedge"
+    assert calls[0] == "caller-session" and calls[1] != "caller-session"
+
+def test_busy_hedge_pool_sends_on_the_caller_thread():
+    pool, slots = policy._pool()
+    threads = []
+
+    def send(session, url, **kwargs):
+        threads.append(threading.current_thread())
+        return FakeResponse("only")
+
+    taken = 0
+    while slots.acquire(blocking=False):
+        taken += 1
+    try:
+        response = policy._attempt(warmed(), send, "http://example.invalid/", False, "caller-session", {})
+    finally:
+        for _ in range(taken):
+            slots.release()
+    assert response.name == "only"
+    assert threads == [threading.current_thread()]
@@ -0,0 +1,26 @@
+import pytest
+
+import frontier
+import httpcache
+import mockserver
+import testing_wiki
+
+@pytest.fixture
+def wiki(monkeypatch):
+    with mockserver.MockServer() as srv:
+        monkeypatch.setattr(testing_wiki, "WIKI_BASE_URL", srv.base_url)
+        httpcache.configure(enabled=False)
+        try:
+            yield srv
+        finally:
+            httpcache.configure(enabled=True)
+
+# discovered titles are percent-encoded (Newton%27s_laws_of_motion, Caf%C3%A9, AT%26T): the API
+# calls must unescape them and key their answers by the titles as discovered
+ESCAPED_TITLES = [frontier.normalize_title(title) for title in mockserver.SPECIAL_TITLES]
+
+def test_extracts_are_keyed_by_escaped_titles(wiki):
+    assert set(testing_wiki.wiki_get_extracts(ESCAPED_TITLES)) == set(ESCAPED_TITLES)
+
+def test_revisions_are_keyed_by_escaped_titles(wiki):
+    assert set(testing_wiki.wiki_get_revisions(ESCAPED_TITLES)) == set(ESCAPED_TITLES)
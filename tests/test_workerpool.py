@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# a parent that changes flags at run time, then reads them back from a pool worker
+SCRIPT = """
+import httpcache, redditfeed, testing_wiki, workerpool
+redditfeed.STREAM_LISTINGS = False
+testing_wiki.STREAM_INTROS = False
+httpcache.configure(enabled=False)
+print(workerpool.map_tasks(workerpool.current_settings, [()], processes=1)[0] == workerpool.current_settings())
+redditfeed.STREAM_LISTINGS = True
+print(workerpool.map_tasks(workerpool.current_settings, [()], processes=1)[0]["redditfeed"]["STREAM_LISTINGS"])
+"""
+
+@pytest.mark.parametrize("start_method", ["fork", "forkserver", "spawn"])
+def test_run_time_settings_reach_workers(start_method):
+    env = dict(os.environ, SCRAPER_START_METHOD=start_method)
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ["True", "True"]
+
+# flags set by a script's own __main__ block, read by a function of that script in a worker
+MAIN_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+import workerpool
+FLAG = "default"
+workerpool.share_settings(__name__, "FLAG")
+
+def read_flag():
+    return FLAG
+
+if __name__ == "__main__":
+    FLAG = "from the command line"
+    print(workerpool.map_tasks(read_flag, [()], processes=1)[0])
+"""
+
+@pytest.mark.parametrize("start_method", ["fork", "forkserver", "spawn"])
+def test_script_settings_reach_workers(start_method, tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text(MAIN_SCRIPT.format(root=ROOT))
+    env = dict(os.environ, SCRAPER_START_METHOD=start_method)
+    result = subprocess.run([sys.executable, str(script)], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "from the command line"
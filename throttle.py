@@ -0,0 +1,221 @@
+#adaptive per-host concurrency limit (AIMD) + token bucket, shared by threads, processes and asyncio tasks
+
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+import timeline
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+ENABLED = os.environ.get("SCRAPER_NO_THROTTLE", "") in ("", "0")
+
+INITIAL_LIMIT = 8        # requests in flight per host at the start
+MIN_LIMIT = 1
+MAX_LIMIT = 256
+INCREASE = 1.0           # additive increase: +1 in-flight request per window of successful responses
+DECREASE = 0.5           # multiplicative decrease on 429/503 or a failed request
+LATENCY_DECREASE = 0.9   # gentler decrease when latency rises
+LATENCY_TOLERANCE = 2.0  # back off once smoothed latency exceeds this multiple of the best latency seen
+THROTTLE_STATUSES = (429, 503)
+ASYNC_POLL = 0.01        # seconds between checks of a coroutine waiting for room
+
+# State lives in shared memory created at import time, so every worker forked from this process
+# (the persistent pool) updates the same counters; workers started another way get it through
+# shared_state()/attach(). Hosts map onto a fixed number of slots.
+SLOTS = 32
+_ctx = multiprocessing.get_context(os.environ.get("SCRAPER_START_METHOD") or None) # same as workerpool's
+_cond = _ctx.Condition()
+_limit = _ctx.Array('d', [float(INITIAL_LIMIT)] * SLOTS, lock=False)
+_in_flight = _ctx.Array('i', SLOTS, lock=False)
+_latency = _ctx.Array('d', SLOTS, lock=False)        # smoothed latency (seconds)
+_best_latency = _ctx.Array('d', SLOTS, lock=False)
+_last_decrease = _ctx.Array('d', SLOTS, lock=False)
+_backoff_until = _ctx.Array('d', SLOTS, lock=False)  # Retry-After
+_rate = _ctx.Array('d', SLOTS, lock=False)           # token bucket: requests per second (0 = off)
+_burst = _ctx.Array('d', SLOTS, lock=False)
+_tokens = _ctx.Array('d', SLOTS, lock=False)
+_last_refill = _ctx.Array('d', SLOTS, lock=False)
+_throttled = _ctx.Array('i', SLOTS, lock=False)      # 429/503 responses seen
+_SHARED = ("_cond", "_limit", "_in_flight", "_latency", "_best_latency", "_last_decrease", "_backoff_until",
+           "_rate", "_burst", "_tokens", "_last_refill", "_throttled")
+
+_hosts = {} # host -> slot, for snapshot() in this process
+_hosts_lock = threading.Lock()
+
+def _slot(host):
+    # stable across processes (unlike hash())
+    slot = int(hashlib.md5(host.encode("utf-8")).hexdigest(), 16) % SLOTS
+    with _hosts_lock:
+        _hosts[host] = slot
+    return slot
+
+def shared_state():
+    # the shared counters, to hand to pool workers that were not forked from this process
+    return {name: globals()[name] for name in _SHARED}
+
+def attach(state):
+    # use the counters of the process that started this worker (see workerpool._init_worker)
+    globals().update(state)
+
+def configure(enabled=None):
+    global ENABLED
+    if enabled is not None:
+        ENABLED = enabled
+
+def set_rate(host, rate, burst=None):
+    """
+    Cap requests per second to `host` with a token bucket (rate=0 removes the cap). Shared by
+    every thread and pool worker.
+    """
+    slot = _slot(host)
+    with _cond:
+        _rate[slot] = rate
+        _burst[slot] = burst or max(1.0, rate)
+        _tokens[slot] = _burst[slot]
+        _last_refill[slot] = time.perf_counter()
+        _cond.notify_all()
+
+def reset():
+    # back to the initial limits (rates are kept)
+    with _cond:
+        for slot in range(SLOTS):
+            _limit[slot] = float(INITIAL_LIMIT)
+            _latency[slot] = _best_latency[slot] = _last_decrease[slot] = _backoff_until[slot] = 0.0
+            _throttled[slot] = 0
+        _cond.notify_all()
+
+def _try_acquire(slot):
+    # take a place under the host's limit (returns 0), or the seconds to wait before trying again (caller holds _cond)
+    now = time.perf_counter()
+    if _backoff_until[slot] > now:
+        return _backoff_until[slot] - now
+    if _in_flight[slot] >= max(MIN_LIMIT, int(_limit[slot])):
+        return 0.5
+    if _rate[slot] > 0:
+        _tokens[slot] = min(_burst[slot], _tokens[slot] + (now - _last_refill[slot]) * _rate[slot])
+        _last_refill[slot] = now
+        if _tokens[slot] < 1:
+            return (1 - _tokens[slot]) / _rate[slot]
+        _tokens[slot] -= 1
+    _in_flight[slot] += 1
+    return 0
+
+def acquire(slot):
+    # block until the host has room under its limit, is out of back-off and has a token
+    with _cond:
+        while True:
+            wait = _try_acquire(slot)
+            if not wait:
+                return
+            _cond.wait(wait)
+
+async def acquire_async(slot):
+    """
+    acquire() for a task on an event loop: the shared condition cannot wake a coroutine, so
+    the task sleeps on the loop and checks again, at least every ASYNC_POLL seconds.
+    """
+    while True:
+        with _cond:
+            wait = _try_acquire(slot)
+        if not wait:
+            return
+        await asyncio.sleep(min(wait, ASYNC_POLL))
+
+def release(slot, status, latency, retry_after=None):
+    """
+    Record one finished request. Successes grow the limit by INCREASE per window; 429/503 or a
+    failed request (status None) halve it, and rising latency trims it. Decreases happen at most
+    once per smoothed-latency window so one burst of errors does not collapse the limit.
+    """
+    with _cond:
+        _in_flight[slot] -= 1
+        now = time.perf_counter()
+        _latency[slot] = latency if _latency[slot] == 0 else 0.8 * _latency[slot] + 0.2 * latency
+        # best latency drifts up slowly so one lucky response does not pin it forever
+        _best_latency[slot] = latency if _best_latency[slot] == 0 else min(latency, _best_latency[slot] * 1.005)
+        can_decrease = now - _last_decrease[slot] >= max(_latency[slot], 0.05)
+
+        if status is None or status in THROTTLE_STATUSES:
+            if status is not None:
+                _throttled[slot] += 1
+            if retry_after:
+                _backoff_until[slot] = max(_backoff_until[slot], now + retry_after)
+            if can_decrease:
+                _limit[slot] = max(MIN_LIMIT, _limit[slot] * DECREASE)
+                _last_decrease[slot] = now
+        elif _latency[slot] > _best_latency[slot] * LATENCY_TOLERANCE and can_decrease:
+            _limit[slot] = max(MIN_LIMIT, _limit[slot] * LATENCY_DECREASE)
+            _last_decrease[slot] = now
+        else:
+            _limit[slot] = min(MAX_LIMIT, _limit[slot] + INCREASE / max(_limit[slot], 1))
+        _cond.notify_all()
+
+def parse_retry_after(value):
+    # Retry-After is either seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _observe(response, start, stream):
+    # timeline phases of one response; returns its status and Retry-After for release()
+    status = response.status_code
+    # response.elapsed runs until the headers are parsed; a non-streamed body is read after that
+    headers_at = start + response.elapsed.total_seconds()
+    timeline.record("ttfb", start, headers_at, status=status)
+    if not stream:
+        timeline.record("download", headers_at, bytes=len(response.content))
+    return status, parse_retry_after(response.headers.get("Retry-After"))
+
+def request(session, url, **kwargs):
+    """session.get(url) under the host's adaptive limit."""
+    if not ENABLED:
+        return session.get(url, **kwargs)
+
+    slot = _slot(urlparse(url).netloc)
+    acquire(slot)
+    status = None
+    retry_after = None
+    start = time.perf_counter()
+    try:
+        response = session.get(url, **kwargs)
+        status, retry_after = _observe(response, start, kwargs.get("stream"))
+        return response
+    finally:
+        release(slot, status, time.perf_counter() - start, retry_after)
+
+async def request_async(client, url, **kwargs):
+    """request() for the event loop: await client.get(url) (an asynchttp.AsyncClient) under the same limits."""
+    if not ENABLED:
+        return await client.get(url, **kwargs)
+
+    slot = _slot(urlparse(url).netloc)
+    await acquire_async(slot)
+    status = None
+    retry_after = None
+    start = time.perf_counter()
+    try:
+        response = await client.get(url, **kwargs)
+        status, retry_after = _observe(response, start, kwargs.get("stream"))
+        return response
+    finally:
+        release(slot, status, time.perf_counter() - start, retry_after)
+
+def snapshot():
+    # current limit / latency per host seen by this process
+    with _hosts_lock:
+        hosts = dict(_hosts)
+    with _cond:
+        return {host: {"limit": round(_limit[slot], 2), "in_flight": _in_flight[slot],
+                       "latency_ms": round(_latency[slot] * 1000, 1), "throttled": _throttled[slot],
+                       "rate": _rate[slot]}
+                for host, slot in hosts.items()}
@@ -0,0 +1,192 @@
+#per-task phase instrumentation: live GUI timeline, Chrome trace export and per-phase summaries
+
+import bisect
+import contextvars
+import functools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+PHASES = ("wait", "fetch", "parse", "write") # what the GUI timeline draws
+# finer phases inside those, for traces and summaries: pool start-up, DNS + TCP/TLS connect (new
+# connections only), time to first byte and body download
+DETAIL_PHASES = ("spawn", "connect", "ttfb", "download")
+
+# Created at import so pool workers forked from this process share the switch and the queue
+# (workers started another way get them through shared_state()/attach()); workers send their
+# events to the parent, which collects them with drain().
+_ctx = multiprocessing.get_context(os.environ.get("SCRAPER_START_METHOD") or None) # same as workerpool's
+_enabled = _ctx.Value('b', False, lock=False)
+_queue = _ctx.Queue()
+_parent_pid = os.getpid()
+_local_events = deque()
+_task = contextvars.ContextVar("task", default=None) # per thread, and per coroutine on an event loop
+_detached = False
+
+def shared_state():
+    return {"_enabled": _enabled, "_queue": _queue, "_parent_pid": _parent_pid}
+
+def attach(state):
+    # record into the switch and queue of the process that started this worker
+    globals().update(state)
+
+def enable(on=True):
+    _enabled.value = on
+
+def enabled():
+    return bool(_enabled.value)
+
+def _lane():
+    return os.getpid(), threading.current_thread().name
+
+def record(phase, start, end=None, task=None, **args):
+    """
+    Record one phase of a task, from `start` to `end` (perf_counter seconds, default now), on the
+    lane of the calling process/thread. `task` defaults to the task this thread is running;
+    keyword args (e.g. bytes=...) are kept with the event. Costs one flag check while
+    recording is off, and one deque append (or queue put in a worker) while it is on.
+    """
+    if not _enabled.value:
+        return
+    global _detached
+    end = time.perf_counter() if end is None else end
+    pid, thread = _lane()
+    event = (pid, thread, task if task is not None else _task.get(), phase, start, end, args or None)
+    if pid == _parent_pid:
+        _local_events.append(event)
+    else:
+        if not _detached:
+            # a worker must not wait on exit for events nobody reads any more
+            _queue.cancel_join_thread()
+            _detached = True
+        _queue.put(event)
+
+@contextmanager
+def span(phase, task=None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, start, task=task)
+
+def timed_task(func, submitted, *args):
+    # runs in the worker: queued time becomes the task's "wait" phase, and the whole call a "task" span
+    start = time.perf_counter()
+    token = _task.set(str(args[0]) if args else func.__name__)
+    record("wait", submitted, start)
+    try:
+        return func(*args)
+    finally:
+        record("task", start)
+        _task.reset(token)
+
+async def timed_task_async(func, submitted, *args):
+    # timed_task for a coroutine function awaited on an event loop
+    start = time.perf_counter()
+    token = _task.set(str(args[0]) if args else func.__name__)
+    record("wait", submitted, start)
+    try:
+        return await func(*args)
+    finally:
+        record("task", start)
+        _task.reset(token)
+
+def wrap(func):
+    """
+    func wrapped with timed_task when recording is on (picklable, so it also works in pool
+    workers). A coroutine version of func (its `aio` attribute, see asyncengine) is wrapped too.
+    """
+    if not _enabled.value:
+        return func
+    submitted = time.perf_counter()
+    wrapped = functools.partial(timed_task, func, submitted)
+    if getattr(func, "aio", None) is not None:
+        wrapped.aio = functools.partial(timed_task_async, func.aio, submitted)
+    return wrapped
+
+def drain(settle=0.0):
+    """
+    Every event recorded since the last call, from this process and its workers. With `settle`,
+    keep reading until the workers have been quiet that many seconds, so events still in
+    flight at the end of a run are not missed.
+    """
+    events = []
+    while _local_events:
+        events.append(_local_events.popleft())
+    while True:
+        try:
+            events.append(_queue.get(timeout=settle) if settle else _queue.get_nowait())
+        except queue.Empty:
+            return events
+
+def split_by_run(events):
+    # group events by the method of the "run" span they start in (record("run", start, end, task=method))
+    runs = sorted((e[4], e[5], e[2]) for e in events if e[3] == "run")
+    starts = [run[0] for run in runs]
+    grouped = {method: [] for _, _, method in runs}
+    for event in events:
+        i = bisect.bisect_right(starts, event[4]) - 1
+        if i >= 0 and event[4] <= runs[i][1] and event[3] != "run":
+            grouped[runs[i][2]].append(event)
+    return grouped
+
+def print_summary(summary):
+    # mean milliseconds per phase, one row per method
+    phases = [p for p in ("wait",) + DETAIL_PHASES + ("fetch", "parse", "write") if any(p in s for s in summary.values())]
+    print(f"{'Method':<16}" + "".join(f"{p:>10}" for p in phases) + "   (mean ms)")
+    for method, phase_stats in summary.items():
+        print(f"{method:<16}" + "".join(f"{phase_stats[p]['mean_ms'] if p in phase_stats else '-':>10}" for p in phases))
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def summarize(events):
+    """Per phase: count, total/mean/p95 milliseconds and bytes transferred."""
+    durations = {}
+    transferred = {}
+    for _, _, _, phase, start, end, args in events:
+        durations.setdefault(phase, []).append(end - start)
+        if args and "bytes" in args:
+            transferred[phase] = transferred.get(phase, 0) + args["bytes"]
+    summary = {}
+    for phase, values in durations.items():
+        values.sort()
+        summary[phase] = {"count": len(values), "total_ms": round(sum(values) * 1000, 2),
+                          "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                          "p95_ms": round(_percentile(values, 95) * 1000, 3),
+                          "bytes": transferred.get(phase, 0)}
+    return summary
+
+def chrome_trace(events_by_method):
+    """
+    Chrome trace-event JSON (chrome://tracing, Perfetto) for {method: events}: one complete
+    ("X") event per phase, one row per process/thread, with the method as category.
+    """
+    trace = []
+    tids = {}
+    for method, events in events_by_method.items():
+        for pid, thread, task, phase, start, end, args in events:
+            if (pid, thread) not in tids:
+                tids[(pid, thread)] = len(tids) + 1
+                trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tids[(pid, thread)],
+                              "args": {"name": thread}})
+            event_args = {"task": task}
+            if args:
+                event_args.update(args)
+            trace.append({"name": phase, "cat": method, "ph": "X", "pid": pid, "tid": tids[(pid, thread)],
+                          "ts": round(start * 1e6, 1), "dur": round((end - start) * 1e6, 1), "args": event_args})
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+def write_reports(events_by_method, trace_path, summary_path):
+    # trace for the viewer plus the per-method phase summary, side by side with a results CSV
+    with open(trace_path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(events_by_method), f)
+    summary = {method: summarize(events) for method, events in events_by_method.items()}
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
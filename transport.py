@@ -0,0 +1,75 @@
+#result transport between pool workers and the parent process
+
+import pickle
+import threading
+import time
+from multiprocessing import shared_memory, resource_tracker
+
+SHM_THRESHOLD = 1024 * 1024 # payloads larger than this go through shared memory instead of the result pipe
+
+_lock = threading.Lock()
+_stats = {"batches": 0, "results": 0, "bytes": 0, "shm_batches": 0, "pack_seconds": 0.0, "unpack_seconds": 0.0}
+
+def pack(result):
+    """
+    Worker side: serialise one task's result as a single message. Small payloads travel inline
+    in the pool's result pipe; large ones are written to a shared-memory block and only its name
+    is sent. The pickling time goes along so the parent can account for it.
+    """
+    start = time.perf_counter()
+    payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(payload) <= SHM_THRESHOLD:
+        return ("inline", payload, len(payload), time.perf_counter() - start)
+
+    block = shared_memory.SharedMemory(create=True, size=len(payload))
+    block.buf[:len(payload)] = payload
+    name = block.name
+    block.close()
+    # the parent unlinks the block once it has read it
+    resource_tracker.unregister(block._name, "shared_memory")
+    return ("shm", name, len(payload), time.perf_counter() - start)
+
+def unpack(batch, results=1):
+    """
+    Parent side: rebuild what a worker sent and record the transport cost. `results` is the
+    number of task results the message carries (a chunk of tasks sends several), so per-result
+    costs compare across methods whatever shape a single result has.
+    """
+    kind, data, size, pack_seconds = batch
+    start = time.perf_counter()
+    if kind == "shm":
+        block = shared_memory.SharedMemory(name=data)
+        try:
+            result = pickle.loads(block.buf[:size])
+        finally:
+            block.close()
+            block.unlink()
+    else:
+        result = pickle.loads(data)
+    unpack_seconds = time.perf_counter() - start
+
+    with _lock:
+        _stats["batches"] += 1
+        _stats["results"] += results
+        _stats["bytes"] += size
+        _stats["shm_batches"] += kind == "shm"
+        _stats["pack_seconds"] += pack_seconds
+        _stats["unpack_seconds"] += unpack_seconds
+    return result
+
+def call_packed(func, args):
+    # pool task wrapper: run func(*args) in the worker and send the result back as one batch
+    return pack(func(*args))
+
+def stats():
+    with _lock:
+        summary = dict(_stats)
+    results = max(summary["results"], 1)
+    summary["bytes_per_result"] = round(summary["bytes"] / results, 1)
+    summary["us_per_result"] = round((summary["pack_seconds"] + summary["unpack_seconds"]) / results * 1e6, 2)
+    return summary
+
+def reset_stats():
+    with _lock:
+        for key in _stats:
+            _stats[key] = 0.0 if key.endswith("seconds") else 0
@@ -0,0 +1,46 @@
+#coalesced GUI updates: workers push results, one periodic Tk callback drains them in batches
+
+from collections import deque
+
+class UpdateChannel:
+    """
+    Buffer between the scraping workers and the Tk main loop. put()/extend() never touch Tk and
+    cost a worker one deque append, so scrape timings no longer include GUI work. The GUI
+    calls drain() from a single periodic callback and inserts the whole batch at once.
+    deque appends and pops are atomic, so no lock is needed. Workers push results as they are;
+    drain_lines() turns only the drained ones into text with `format` (item -> list of lines).
+    """
+
+    def __init__(self, format=None):
+        self._items = deque()
+        self.format = format
+
+    def put(self, item):
+        self._items.append(item)
+
+    def extend(self, items):
+        self._items.extend(items)
+
+    def drain(self, max_items=None):
+        # up to max_items of the oldest pending items (all of them by default)
+        items = []
+        pop = self._items.popleft
+        while self._items and (max_items is None or len(items) < max_items):
+            try:
+                items.append(pop())
+            except IndexError:
+                break
+        return items
+
+    def drain_lines(self, max_items=None):
+        # drain() formatted for display; without a format the items are lines already
+        items = self.drain(max_items)
+        if self.format is None:
+            return items
+        return [line for item in items for line in self.format(item)]
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,91 @@
+#streaming wikipedia intro extractor
+
+import re
+from html.parser import HTMLParser
+
+# elements that never get an end tag, so they must not change the nesting depth
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+SKIP_TAGS = {"style", "script"}
+
+class IntroExtractor(HTMLParser):
+    """
+    SAX-style parser that picks the direct <p> children of div.mw-parser-output as the HTML is
+    fed in chunks. It applies the same rules as get_wiki_intro (is_noise, min_chars,
+    max_accumulate) and sets `done` as soon as the intro is complete, so the caller can stop
+    reading the response.
+    """
+
+    def __init__(self, max_accumulate, is_noise, min_chars=120):
+        super().__init__(convert_charrefs=True)
+        self.max_accumulate = max_accumulate
+        self.min_chars = min_chars
+        self.is_noise = is_noise
+        self.intro_parts = []
+        self.accumulated = 0
+        self.first_paragraph = None # fallback: first <p> anywhere on the page
+        self.done = False
+
+        self._depth = 0
+        self._content_depth = None # depth of div.mw-parser-output while inside it
+        self._para_depth = None    # depth of the <p> being collected
+        self._para_direct = False  # is that <p> a direct child of the content div
+        self._skip_depth = None    # inside <style>/<script>
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag in VOID_TAGS:
+            if tag == "br" and self._para_depth is not None:
+                self._text.append("\n")
+            return
+        self._depth += 1
+        if self._skip_depth is None and tag in SKIP_TAGS:
+            self._skip_depth = self._depth
+        elif tag == "div" and self._content_depth is None:
+            classes = (dict(attrs).get("class") or "").split()
+            if "mw-parser-output" in classes:
+                self._content_depth = self._depth
+        elif tag == "p" and self._para_depth is None:
+            self._para_depth = self._depth
+            self._para_direct = self._content_depth is not None and self._depth == self._content_depth + 1
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if self.done or tag in VOID_TAGS:
+            return
+        if self._depth == self._skip_depth:
+            self._skip_depth = None
+        elif self._depth == self._para_depth:
+            self._finish_paragraph()
+        elif self._depth == self._content_depth:
+            self._content_depth = None
+        self._depth -= 1
+
+    def handle_data(self, data):
+        if self._para_depth is not None and self._skip_depth is None and not self.done:
+            self._text.append(re.sub(r"\s+", " ", data))
+
+    def _finish_paragraph(self):
+        # whitespace collapses like the DOM .text, <br> stays a line break
+        text = re.sub(r" *\n *", "\n", re.sub(r" +", " ", "".join(self._text))).strip()
+        direct = self._para_direct
+        self._para_depth = None
+        self._text = []
+        if self.first_paragraph is None:
+            self.first_paragraph = text
+        if not direct or self.is_noise(text):
+            return
+
+        self.intro_parts.append(text)
+        self.accumulated += len(text)
+        if self.accumulated >= self.min_chars and self.accumulated >= self.max_accumulate:
+            self.done = True
+
+    def result(self):
+        # same fallback and joining as the DOM path
+        if self.intro_parts:
+            return "\n\n".join(self.intro_parts)
+        if self.first_paragraph and not self.is_noise(self.first_paragraph):
+            return self.first_paragraph
+        return "No description found."
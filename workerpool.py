@@ -0,0 +1,129 @@
+#persistent worker pool
+
+import atexit
+import importlib
+import inspect
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import sessions
+import throttle
+import timeline
+
+# How pool workers start: "fork" (the Linux default) copies this process; "forkserver" forks
+# them from a server that imported PRELOAD once, so each worker starts with the scraping stack
+# loaded but without the parent's GUI or benchmark state; "spawn" starts a fresh interpreter.
+# Read once at import (throttle and timeline create their shared state for it): set
+# SCRAPER_START_METHOD before importing the scrapers. Module settings changed at run time in the
+# parent (command-line flags) reach the workers through share_settings, whatever the start method.
+START_METHOD = os.environ.get("SCRAPER_START_METHOD") or None
+PRELOAD = ["sessions", "policy", "transport", "wikistream", "redditfeed", "requests_html"]
+
+_pools = {} # processes -> (running pool, the settings its workers started with)
+_retired = [] # pools replaced after a settings change, still finishing their tasks
+_shared_settings = {} # module name -> names of its settings copied into every worker
+_lock = threading.Lock()
+
+def share_settings(module_name, *names):
+    """
+    Copy the module-level settings `names` of `module_name` (pass __name__) into every pool
+    worker as it starts, so values set at run time in the parent, such as command-line flags,
+    hold in workers that were not forked from it. A pool started under other values is
+    replaced by the next get_pool.
+    """
+    _shared_settings.setdefault(module_name, set()).update(names)
+
+def current_settings():
+    # the parent's values of every shared setting, by module name
+    return {name: {attr: getattr(sys.modules[name], attr) for attr in sorted(attrs)}
+            for name, attrs in _shared_settings.items() if name in sys.modules}
+
+def _apply_settings(settings):
+    for name, values in settings.items():
+        module = sys.modules.get(name) or importlib.import_module(name)
+        namespaces = {id(vars(module)): vars(module)}
+        # a script run as __main__ is loaded into spawned workers by runpy, whose functions
+        # keep their globals in a copy of the module's namespace
+        for value in list(vars(module).values()):
+            if inspect.isfunction(value) and value.__module__ == module.__name__:
+                namespaces[id(value.__globals__)] = value.__globals__
+        for namespace in namespaces.values():
+            namespace.update(values)
+
+def _init_worker(started, shared, settings):
+    # runs once in every worker: take the parent's settings, share its throttle and timeline, open the session up front
+    _apply_settings(settings)
+    throttle.attach(shared["throttle"])
+    timeline.attach(shared["timeline"])
+    sessions.get_session()
+    # from the parent starting the pool until this worker is ready
+    timeline.record("spawn", started, task="pool")
+
+def _start_forkserver():
+    # the forkserver is a fresh interpreter that does not always get this process's sys.path:
+    # start it with this directory on PYTHONPATH so it can import PRELOAD from anywhere
+    from multiprocessing import forkserver
+    saved = os.environ.get("PYTHONPATH")
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)), saved]))
+    try:
+        forkserver.ensure_running()
+    finally:
+        if saved is None:
+            del os.environ["PYTHONPATH"]
+        else:
+            os.environ["PYTHONPATH"] = saved
+
+def worker_session():
+    # pooled session owned by the current worker process (requests_html loads on first use)
+    return sessions.get_session(html=True)
+
+def get_pool(processes=None):
+    """
+    Return the shared worker pool of `processes` workers (default: the CPU count), starting it
+    on first use. Pools live until the interpreter exits, so repeated test iterations and GUI
+    runs reuse the same warm processes instead of paying process start-up for every page.
+    Each size gets its own pool (e.g. a hybrid shape next to the default one): a caller asking
+    for another size never shuts down a pool that other runs may still be using.
+    """
+    processes = processes or os.cpu_count() or 1
+    settings = current_settings()
+    with _lock:
+        pool, started_with = _pools.get(processes, (None, None))
+        if pool is not None and started_with != settings:
+            # a flag changed since these workers started: new runs get workers that see it
+            pool.close()
+            _retired.append(pool)
+            pool = None
+        if pool is None:
+            ctx = multiprocessing.get_context(START_METHOD)
+            if ctx.get_start_method() == "forkserver":
+                ctx.set_forkserver_preload(PRELOAD)
+                _start_forkserver()
+            shared = {"throttle": throttle.shared_state(), "timeline": timeline.shared_state()}
+            pool = ctx.Pool(processes, initializer=_init_worker, initargs=(time.perf_counter(), shared, settings))
+            _pools[processes] = (pool, settings)
+        return pool
+
+def shutdown_pool():
+    # stop every pool (at exit, or to start the next run with fresh workers)
+    with _lock:
+        pools = [pool for pool, _ in _pools.values()] + _retired
+        _pools.clear()
+        _retired.clear()
+    for pool in pools:
+        pool.close()
+        pool.join()
+
+atexit.register(shutdown_pool)
+
+def chunk_size(num_items, processes):
+    # a few chunks per worker keeps the IPC count low while still balancing slow pages
+    return max(1, num_items // (processes * 4))
+
+def map_tasks(func, arg_list, processes=None):
+    # run func(*args) for every args tuple on the pool, results in input order
+    arg_list = list(arg_list)
+    processes = processes or os.cpu_count() or 1
+    return get_pool(processes).starmap(func, arg_list, chunksize=chunk_size(len(arg_list), processes))